@@ -0,0 +1,63 @@
+"""
+Benchmark of building and signing transactions in bulk.
+
+Signs the same batch of transactions, spread across several wallets, one after
+another with `Builder.build` and in parallel with `Builder.build_many` over a
+thread pool.
+
+Usage:
+    python benchmarks/bulk_signing.py [transactions] [workers]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dydx_v4_client.key_pair import KeyPair
+from dydx_v4_client.node.builder import Builder
+from dydx_v4_client.node.message import send_token
+from dydx_v4_client.wallet import Wallet
+
+DEFAULT_TRANSACTIONS = 20000
+WALLETS = 16
+SENDER = "dydx14zzueazeh0hj67cghhf9jypslcf9sh2n5k6art"
+RECIPIENT = "dydx1slanxj8x9ntk9knwa6cvfv2tzlsq5gk3dshml0"
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TRANSACTIONS
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    builder = Builder("dydx-mainnet-1", "adydx")
+    wallets = [
+        Wallet(KeyPair.from_hex(f"{index + 1:064x}"), index, 0)
+        for index in range(WALLETS)
+    ]
+    message = send_token(SENDER, RECIPIENT, 1000, "adydx")
+    batch = [
+        (wallets[index % WALLETS], [message], index // WALLETS)
+        for index in range(transactions)
+    ]
+
+    start = time.perf_counter()
+    for wallet, messages, sequence in batch:
+        builder.build(wallet, messages[0], sequence=sequence).SerializeToString()
+    sequential = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Warm the workers up so thread start-up is not measured.
+        builder.build_many(batch[:workers], executor=executor, chunk_size=1)
+        start = time.perf_counter()
+        builder.build_many(batch, executor=executor)
+        parallel = time.perf_counter() - start
+
+    print(f"sequential:             {transactions / sequential:10.0f} tx/s")
+    print(
+        f"build_many ({workers} workers): {transactions / parallel:10.0f} tx/s "
+        f"({sequential / parallel:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of converting candles from an indexer response.
+
+Compares converting every candle with `float()` in Python, as pipelines did,
+with the columnar `candle_columns`, both from the parsed JSON as returned by
+`MarketsClient.get_perpetual_market_candles`, and with `decode_json` from the
+response body, as `get_perpetual_market_candles(..., columnar=True)` does.
+
+Usage:
+    python benchmarks/columnar.py [candles] [runs]
+"""
+
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from dydx_v4_client.indexer.rest.backfill import to_iso
+from dydx_v4_client.indexer.rest.columnar import (
+    CANDLE_FIELDS,
+    FLOAT,
+    candle_columns,
+    decode_json,
+)
+
+DEFAULT_CANDLES = 100_000
+DEFAULT_RUNS = 5
+
+
+def response(count: int):
+    start = datetime(2024, 5, 1)
+    return {
+        "candles": [
+            {
+                "startedAt": to_iso(start + timedelta(minutes=index)),
+                "ticker": "BTC-USD",
+                "resolution": "1MIN",
+                "low": f"{60000 + index % 1000}.5",
+                "high": "60010.1",
+                "open": "60001",
+                "close": "60002.25",
+                "baseTokenVolume": "1.2345",
+                "usdVolume": "74000.12",
+                "trades": 12,
+                "startingOpenInterest": "1234.5",
+            }
+            for index in range(count)
+        ]
+    }
+
+
+def per_row(response):
+    return [
+        {
+            "startedAt": datetime.fromisoformat(candle["startedAt"][:-1]),
+            "trades": candle["trades"],
+            **{
+                field: float(candle[field])
+                for field, kind in CANDLE_FIELDS.items()
+                if kind == FLOAT
+            },
+        }
+        for candle in response["candles"]
+    ]
+
+
+def measure(convert, data, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        convert(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CANDLES
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RUNS
+    data = response(count)
+
+    body = json.dumps(data).encode()
+
+    rows = measure(per_row, data, runs)
+    columns = measure(candle_columns, data, runs)
+    loaded_rows = measure(lambda body: per_row(json.loads(body)), body, runs)
+    decoded = measure(lambda body: decode_json(body, CANDLE_FIELDS), body, runs)
+    print(f"{count} candles, best of {runs} runs")
+    print(f"per-row float():        {rows * 1000:8.1f} ms")
+    print(f"candle_columns:         {columns * 1000:8.1f} ms ({rows / columns:.1f}x)")
+    print(f"json.loads + per-row:   {loaded_rows * 1000:8.1f} ms")
+    print(
+        f"decode_json:            {decoded * 1000:8.1f} ms "
+        f"({loaded_rows / decoded:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
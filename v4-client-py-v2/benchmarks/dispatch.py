@@ -0,0 +1,90 @@
+"""
+Benchmark of dispatching socket messages to per-market handlers.
+
+Compares a single `on_message` callback checking the channel and id of every
+subscription in turn, as consumers did, with the handlers given to `subscribe`,
+routed by channel and id. Both receive the same messages, spread over all the
+markets, as text from the socket.
+
+Usage:
+    python benchmarks/dispatch.py [messages]
+"""
+
+import json
+import random
+import sys
+import time
+
+from dydx_v4_client.indexer.socket.websocket import IndexerSocket
+
+DEFAULT_MESSAGES = 50_000
+MARKET_COUNTS = [10, 100, 1000]
+
+
+def messages(markets: int, count: int):
+    random.seed(0)
+    return [
+        json.dumps(
+            {
+                "type": "channel_data",
+                "channel": "v4_trades",
+                "id": f"M{random.randrange(markets)}-USD",
+                "message_id": index,
+                "contents": {"trades": [{"price": "1", "size": "1", "side": "BUY"}]},
+            }
+        )
+        for index in range(count)
+    ]
+
+
+def single_callback(markets: int, texts):
+    handled = []
+    handlers = [
+        ("v4_trades", f"M{market}-USD", handled.append) for market in range(markets)
+    ]
+
+    def on_message(ws, message):
+        for channel, id, handler in handlers:
+            if message["channel"] == channel and message["id"] == id:
+                handler(message)
+                return
+
+    socket = IndexerSocket("ws://indexer", on_message=on_message)
+    socket.send = lambda text: None
+    return socket, texts
+
+
+def routed_handlers(markets: int, texts):
+    handled = []
+    socket = IndexerSocket("ws://indexer")
+    socket.send = lambda text: None
+    for market in range(markets):
+        socket.trades.subscribe(f"M{market}-USD", handler=handled.append)
+    return socket, texts
+
+
+def measure(socket, texts) -> float:
+    on_message = socket.on_message
+    start = time.perf_counter()
+    for text in texts:
+        on_message(socket, text)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGES
+    for markets in MARKET_COUNTS:
+        texts = messages(markets, count)
+        for name, setup in [
+            ("single callback", single_callback),
+            ("routed handlers", routed_handlers),
+        ]:
+            elapsed = measure(*setup(markets, texts))
+            print(
+                f"{markets:>5} markets, {name:>15}:"
+                f" {elapsed / count * 1e6:7.2f} us per message"
+            )
+
+
+if __name__ == "__main__":
+    main()
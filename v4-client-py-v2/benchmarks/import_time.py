@@ -0,0 +1,59 @@
+"""
+Benchmark of the time to import a module, as reported by `python -X importtime`.
+
+Imports the module in fresh interpreters and prints the median cumulative import
+time of the module itself and of the slowest modules it pulls in.
+
+Usage:
+    python benchmarks/import_time.py [module] [runs]
+
+For example, the cold start of the node client:
+    python benchmarks/import_time.py dydx_v4_client.node.client
+"""
+
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_MODULE = "dydx_v4_client.network"
+DEFAULT_RUNS = 15
+SLOWEST = 10
+
+
+def import_times(module: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODULE
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RUNS
+
+    samples = defaultdict(list)
+    for _ in range(runs):
+        for name, cumulative in import_times(module).items():
+            samples[name].append(cumulative)
+    medians = {name: statistics.median(times) for name, times in samples.items()}
+
+    print(f"{module}: {medians[module] / 1000:.1f} ms (median of {runs} runs)")
+    print("slowest imports:")
+    del medians[module]
+    slowest = sorted(medians.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[:SLOWEST]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of maintaining an order book from `v4_orderbook` updates.
+
+Compares rebuilding the best levels with dictionaries sorted on every update, as
+consumers did, with the `LocalOrderBook`. After each update, both read the best
+bid and ask and the 10 best levels of each side.
+
+Usage:
+    python benchmarks/order_book.py [levels] [updates]
+"""
+
+import random
+import sys
+import time
+from decimal import Decimal
+
+from dydx_v4_client.indexer.socket.order_book import LocalOrderBook
+
+DEFAULT_LEVELS = 1_000
+DEFAULT_UPDATES = 20_000
+
+
+def messages(levels: int, updates: int):
+    random.seed(0)
+    snapshot = {
+        "type": "subscribed",
+        "contents": {
+            "bids": [
+                {"price": str(2000 - index), "size": "1"} for index in range(levels)
+            ],
+            "asks": [
+                {"price": str(2001 + index), "size": "1"} for index in range(levels)
+            ],
+        },
+    }
+    deltas = []
+    for _ in range(updates):
+        offset = random.randrange(levels)
+        size = random.choice(["0", "1.5", "3"])
+        side, price = random.choice([("bids", 2000 - offset), ("asks", 2001 + offset)])
+        deltas.append(
+            {"type": "channel_data", "contents": {side: [[str(price), size]]}}
+        )
+    return snapshot, deltas
+
+
+def sorted_dicts(snapshot, deltas):
+    books = {
+        side: {
+            Decimal(level["price"]): Decimal(level["size"])
+            for level in snapshot["contents"][side]
+        }
+        for side in ("bids", "asks")
+    }
+    for delta in deltas:
+        for side, levels in delta["contents"].items():
+            for price, size in levels:
+                if Decimal(size):
+                    books[side][Decimal(price)] = Decimal(size)
+                else:
+                    books[side].pop(Decimal(price), None)
+        bids = sorted(books["bids"].items(), reverse=True)
+        asks = sorted(books["asks"].items())
+        bids[:1], asks[:1], bids[:10], asks[:10]
+
+
+def local_order_book(snapshot, deltas):
+    book = LocalOrderBook("ETH-USD")
+    book.apply(snapshot)
+    for delta in deltas:
+        book.apply(delta)
+        book.best_bid, book.best_ask, book.bids.top(10), book.asks.top(10)
+
+
+def measure(run, *args) -> float:
+    start = time.perf_counter()
+    run(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LEVELS
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_UPDATES
+    snapshot, deltas = messages(levels, updates)
+
+    for name, run in [
+        ("sorted dicts", sorted_dicts),
+        ("LocalOrderBook", local_order_book),
+    ]:
+        elapsed = measure(run, snapshot, deltas)
+        print(
+            f"{name:>15}: {elapsed * 1000:8.1f} ms,"
+            f" {elapsed / updates * 1e6:7.2f} us per update"
+        )
+
+
+if __name__ == "__main__":
+    main()
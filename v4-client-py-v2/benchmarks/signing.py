@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of building and signing transactions.
+
+Compares assembling every transaction from protobuf objects, serializing the
+`AuthInfo` and `SignDoc` on each call (the previous behaviour of `Builder`), with
+`Builder.build`, which reuses the precomputed signing context of the wallet.
+
+Usage:
+    python benchmarks/signing.py [transactions]
+"""
+
+import sys
+import time
+
+from v4_proto.cosmos.tx.v1beta1.tx_pb2 import AuthInfo, Tx, TxBody
+
+from dydx_v4_client.key_pair import KeyPair
+from dydx_v4_client.node.builder import (
+    DEFAULT_FEE,
+    Builder,
+    as_any,
+    get_signature,
+    get_signer_info,
+)
+from dydx_v4_client.node.message import send_token
+from dydx_v4_client.wallet import Wallet
+
+DEFAULT_TRANSACTIONS = 5000
+PRIVATE_KEY = "e92a6595c934c991d3b3e987ea9b3125bf61a076deab3a9cb519787b7b3e8d77"
+SENDER = "dydx14zzueazeh0hj67cghhf9jypslcf9sh2n5k6art"
+RECIPIENT = "dydx1slanxj8x9ntk9knwa6cvfv2tzlsq5gk3dshml0"
+
+
+def legacy_build(builder: Builder, wallet: Wallet, message) -> Tx:
+    body = TxBody(messages=[as_any(message)], memo=builder.memo)
+    auth_info = AuthInfo(
+        signer_infos=[get_signer_info(wallet.public_key, wallet.sequence)],
+        fee=DEFAULT_FEE,
+    )
+    signature = get_signature(
+        wallet.key, body, auth_info, wallet.account_number, builder.chain_id
+    )
+    return Tx(body=body, auth_info=auth_info, signatures=[signature])
+
+
+def measure(build, transactions: int) -> float:
+    builder = Builder("dydx-mainnet-1", "adydx")
+    wallet = Wallet(KeyPair.from_hex(PRIVATE_KEY), 12345, 0)
+    message = send_token(SENDER, RECIPIENT, 1000, "adydx")
+    start = time.perf_counter()
+    for sequence in range(transactions):
+        wallet.sequence = sequence
+        build(builder, wallet, message)
+    return (time.perf_counter() - start) / transactions
+
+
+def sign_only(transactions: int) -> float:
+    key = KeyPair.from_hex(PRIVATE_KEY)
+    start = time.perf_counter()
+    for index in range(transactions):
+        key.sign(index.to_bytes(200, "big"))
+    return (time.perf_counter() - start) / transactions
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TRANSACTIONS
+    legacy = measure(legacy_build, transactions)
+    current = measure(Builder.build, transactions)
+    signing = sign_only(transactions)
+    print(f"legacy build:     {legacy * 1e6:8.1f} us/tx")
+    print(f"signing context:  {current * 1e6:8.1f} us/tx ({legacy / current:.2f}x)")
+    print(f"ECDSA sign alone: {signing * 1e6:8.1f} us/tx")
+
+
+if __name__ == "__main__":
+    main()
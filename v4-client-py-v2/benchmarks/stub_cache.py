@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of the per-call overhead of building gRPC stubs.
+
+Starts an in-process gRPC server on localhost and compares querying the latest
+block through a freshly built stub on every call (the previous behaviour of
+`QueryNodeClient`) with querying it through the client's cached stub.
+
+Usage:
+    python benchmarks/stub_cache.py [calls]
+"""
+
+import asyncio
+import sys
+import time
+from concurrent import futures
+
+import grpc
+from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
+from v4_proto.cosmos.base.tendermint.v1beta1 import (
+    query_pb2_grpc as tendermint_query_grpc,
+)
+
+from dydx_v4_client.node.client import QueryNodeClient
+
+DEFAULT_CALLS = 5000
+
+
+class TendermintService(tendermint_query_grpc.ServiceServicer):
+    def GetLatestBlock(self, request, context):
+        return tendermint_query.GetLatestBlockResponse()
+
+
+def per_call_us(elapsed: float, calls: int) -> float:
+    return elapsed / calls * 1e6
+
+
+async def benchmark(calls: int):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    tendermint_query_grpc.add_ServiceServicer_to_server(TendermintService(), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    client = QueryNodeClient(channel)
+    request = tendermint_query.GetLatestBlockRequest()
+
+    # Warm up the connection.
+    await client.latest_block()
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        tendermint_query_grpc.ServiceStub(channel)
+    construction = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        tendermint_query_grpc.ServiceStub(channel).GetLatestBlock(request)
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await client.latest_block()
+    cached = time.perf_counter() - start
+
+    channel.close()
+    server.stop(None)
+
+    print(f"calls:                    {calls}")
+    print(f"stub construction only:   {per_call_us(construction, calls):8.2f} us/call")
+    print(f"new stub per call:        {per_call_us(uncached, calls):8.2f} us/call")
+    print(f"cached stub (client):     {per_call_us(cached, calls):8.2f} us/call")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLS))
@@ -0,0 +1,97 @@
+"""
+Benchmark of converting query responses to Python values.
+
+Compares the previous `transcode_response` path (`MessageToDict`, `json.dumps`,
+then re-parsing while trying to base64-decode every string) with the
+descriptor-based `message_to_dict`, on an "all subaccounts" response.
+
+Usage:
+    python benchmarks/transcode.py [subaccounts] [runs]
+"""
+
+import base64
+import json
+import sys
+import time
+
+from google.protobuf.json_format import MessageToDict
+from v4_proto.dydxprotocol.subaccounts.asset_position_pb2 import AssetPosition
+from v4_proto.dydxprotocol.subaccounts.perpetual_position_pb2 import (
+    PerpetualPosition,
+)
+from v4_proto.dydxprotocol.subaccounts.query_pb2 import QuerySubaccountAllResponse
+from v4_proto.dydxprotocol.subaccounts.subaccount_pb2 import Subaccount, SubaccountId
+
+from dydx_v4_client.node.transcode import message_to_dict
+
+DEFAULT_SUBACCOUNTS = 2000
+DEFAULT_RUNS = 5
+OWNER = "dydx14zzueazeh0hj67cghhf9jypslcf9sh2n5k6art"
+
+
+def decode_base64(value):
+    if isinstance(value, str):
+        try:
+            return list(base64.b64decode(value))
+        except (base64.binascii.Error, ValueError):
+            return value
+    return value
+
+
+def legacy_transcode(response):
+    decoder = json.JSONDecoder(
+        object_hook=lambda data: {k: decode_base64(v) for k, v in data.items()}
+    )
+    return decoder.decode(json.dumps(MessageToDict(response)))
+
+
+def all_subaccounts(count: int) -> QuerySubaccountAllResponse:
+    response = QuerySubaccountAllResponse()
+    for number in range(count):
+        response.subaccount.append(
+            Subaccount(
+                id=SubaccountId(owner=OWNER, number=number),
+                asset_positions=[
+                    AssetPosition(asset_id=0, quantums=b"\x02\x0f\x42\x40", index=1)
+                ],
+                perpetual_positions=[
+                    PerpetualPosition(
+                        perpetual_id=perpetual_id,
+                        quantums=b"\x03\x01",
+                        funding_index=b"\x02\x05\x00",
+                        quote_balance=b"\x03\x10\x00",
+                    )
+                    for perpetual_id in range(5)
+                ],
+                margin_enabled=True,
+            )
+        )
+    return response
+
+
+def measure(convert, response, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        convert(response)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SUBACCOUNTS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RUNS
+    response = all_subaccounts(count)
+
+    legacy = measure(legacy_transcode, response, runs)
+    current = measure(message_to_dict, response, runs)
+    print(f"{count} subaccounts, best of {runs} runs")
+    print(f"MessageToDict + JSON round trip: {legacy * 1000:8.1f} ms")
+    print(
+        f"message_to_dict:                 {current * 1000:8.1f} ms "
+        f"({legacy / current:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.rest.modules.markets import MarketsClient
+from dydx_v4_client.indexer.rest.shared.throttling import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_SECOND = 10
+DEFAULT_CANDLES_PAGE_SIZE = 100
+
+RESOLUTION_SPANS = {
+    CandlesResolution.ONE_MINUTE: timedelta(minutes=1),
+    CandlesResolution.FIVE_MINUTES: timedelta(minutes=5),
+    CandlesResolution.FIFTEEN_MINUTES: timedelta(minutes=15),
+    CandlesResolution.THIRTY_MINUTES: timedelta(minutes=30),
+    CandlesResolution.ONE_HOUR: timedelta(hours=1),
+    CandlesResolution.FOUR_HOURS: timedelta(hours=4),
+    CandlesResolution.ONE_DAY: timedelta(days=1),
+}
+
+ShardKey = Tuple[str, str, str, str]
+
+
+def to_utc(time: datetime) -> datetime:
+    """
+    Converts a time to UTC, taking a naive one as UTC already.
+    """
+    if time.tzinfo is None:
+        return time.replace(tzinfo=timezone.utc)
+    return time.astimezone(timezone.utc)
+
+
+def to_iso(time: datetime) -> str:
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time.isoformat(timespec="milliseconds") + "Z"
+
+
+def shards(
+    start: datetime, end: datetime, span: timedelta
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Splits `[start, end)` into consecutive ranges of at most `span`.
+    """
+    ranges = []
+    while start < end:
+        ranges.append((start, min(start + span, end)))
+        start += span
+    return ranges
+
+
+async def gather_or_cancel(*awaitables: Awaitable) -> List:
+    """
+    Awaits concurrently like `asyncio.gather`, but cancels the others when one
+    fails (or the caller is cancelled), as a task group does.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class BackfillCheckpoint:
+    """
+    Candles of the completed shards, appended to a JSON lines file.
+
+    A line is only written once its shard is complete, so after a crash the file
+    holds every finished shard; a line cut short by the crash is dropped.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def lines(self) -> Iterable[bytes]:
+        """
+        Iterates over the complete lines, dropping a truncated last one.
+        """
+        if not self.path.exists():
+            return
+        with self.path.open("r+b") as file:
+            end = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    logger.warning("Dropping a truncated line of %s", self.path)
+                    file.truncate(end)
+                    return
+                end += len(line)
+                yield line
+
+    def keys(self) -> Set[ShardKey]:
+        """
+        Retrieves the keys of the completed shards.
+        """
+        return {tuple(json.loads(line)["shard"]) for line in self.lines()}
+
+    def load(self, keys: Set[ShardKey]) -> Dict[ShardKey, List[Dict]]:
+        """
+        Retrieves the candles of some completed shards, reading the file line by
+        line.
+        """
+        candles = {}
+        for line in self.lines():
+            record = json.loads(line)
+            key = tuple(record["shard"])
+            if key in keys:
+                candles[key] = record["candles"]
+        return candles
+
+    def save(self, shard: ShardKey, candles: List[Dict]):
+        with self.path.open("a") as file:
+            file.write(json.dumps({"shard": shard, "candles": candles}) + "\n")
+
+
+class CandleBackfill:
+    """
+    Backfills the candles of markets over long time ranges.
+
+    The range is split into shards of one page of candles each, fetched
+    concurrently (at most `concurrency` requests in flight, started at most
+    `requests_per_second` times per second across all markets). A shard is
+    fetched in a single request, so `page_size` must not exceed the page limit
+    of the indexer. The candles are merged and deduplicated by `startedAt`.
+
+    With a `checkpoint` file, completed shards are recorded, and a backfill
+    restarted after a crash only fetches the missing ones. Only the keys of the
+    completed shards are kept in memory; their candles are read back from the
+    file when a backfill needs them. A shard ending after the current time is
+    still open, as its last candles may change, so it is fetched every time.
+
+    When a shard fails, the other shards of the backfill are cancelled.
+    """
+
+    def __init__(
+        self,
+        markets: MarketsClient,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND,
+        page_size: int = DEFAULT_CANDLES_PAGE_SIZE,
+        checkpoint: Optional[Union[str, Path]] = None,
+    ):
+        self.markets = markets
+        self.page_size = page_size
+        self.checkpoint = BackfillCheckpoint(checkpoint) if checkpoint else None
+        self.concurrency = concurrency
+        self._requests: Optional[asyncio.Semaphore] = None
+        self._bucket = (
+            TokenBucket(requests_per_second, burst=1) if requests_per_second else None
+        )
+        self._completed: Optional[Set[ShardKey]] = None
+
+    async def backfill(
+        self,
+        market: str,
+        resolution: CandlesResolution,
+        start: datetime,
+        end: datetime,
+    ) -> List[Dict]:
+        """
+        Retrieves the candles of a market started within `[start, end)`.
+
+        Args:
+            market (str): The market ticker.
+            resolution (CandlesResolution): The candle resolution.
+            start (datetime): The earliest candle start, UTC if naive.
+            end (datetime): The end of the range, excluded, UTC if naive.
+
+        Returns:
+            List[Dict]: The candles, from the earliest.
+        """
+        if self._completed is None:
+            self._completed = self.checkpoint.keys() if self.checkpoint else set()
+        if self._requests is None:
+            self._requests = asyncio.Semaphore(self.concurrency)
+        span = RESOLUTION_SPANS[resolution] * self.page_size
+        now = datetime.now(timezone.utc)
+        keys = {
+            shard_key(market, resolution, shard_start, shard_end): shard_end <= now
+            for shard_start, shard_end in shards(to_utc(start), to_utc(end), span)
+        }
+        saved = {}
+        if self.checkpoint and self._completed.intersection(keys):
+            saved = self.checkpoint.load(self._completed.intersection(keys))
+        fetched = await gather_or_cancel(
+            *(
+                self._fetch_shard(key, closed)
+                for key, closed in keys.items()
+                if key not in saved
+            )
+        )
+        merged = {}
+        for candles in [*saved.values(), *fetched]:
+            for candle in candles:
+                merged[candle["startedAt"]] = candle
+        return [merged[started_at] for started_at in sorted(merged)]
+
+    async def backfill_markets(
+        self,
+        markets: Sequence[str],
+        resolution: CandlesResolution,
+        start: datetime,
+        end: datetime,
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        Retrieves the candles of several markets at once, sharing the limits.
+
+        The candles of each market are yielded as soon as they are complete, e.g.
+        to be written to a store, rather than collected for all the markets:
+
+            async for market, candles in backfill.backfill_markets(...):
+                ...
+
+        The backfills still running are cancelled when one fails, or when the
+        iteration is stopped.
+
+        Args:
+            markets (Sequence[str]): The market tickers.
+            resolution (CandlesResolution): The candle resolution.
+            start (datetime): The earliest candle start, UTC if naive.
+            end (datetime): The end of the range, excluded.
+
+        Yields:
+            Tuple[str, List[Dict]]: A market and its candles, from the earliest,
+                in order of completion.
+        """
+
+        async def backfill(market: str) -> Tuple[str, List[Dict]]:
+            return market, await self.backfill(market, resolution, start, end)
+
+        tasks = [asyncio.ensure_future(backfill(market)) for market in markets]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_shard(self, key: ShardKey, closed: bool) -> List[Dict]:
+        market, resolution, from_iso, until_iso = key
+        async with self._requests:
+            if self._bucket is not None:
+                await self._bucket.acquire()
+            response = await self.markets.get_perpetual_market_candles(
+                market, resolution, from_iso, until_iso, self.page_size
+            )
+        # The shard spans `page_size` candles, so a single page holds all of them.
+        candles = response.get("candles") or []
+
+        if closed:
+            self._completed.add(key)
+            if self.checkpoint:
+                self.checkpoint.save(key, candles)
+        return candles
+
+
+def shard_key(
+    market: str, resolution: CandlesResolution, start: datetime, end: datetime
+) -> ShardKey:
+    # The indexer bounds are inclusive, so the shard ends just before `end`.
+    return (
+        market,
+        resolution.value,
+        to_iso(start),
+        to_iso(end - timedelta(milliseconds=1)),
+    )
@@ -0,0 +1,391 @@
+"""
+Columnar decoding of indexer responses into NumPy arrays.
+
+NumPy is an optional dependency, needed only by this module (the `columnar`
+extra).
+"""
+
+import json
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "Columnar decoding requires NumPy, install it with "
+        "`pip install dydx-v4-client[columnar]`"
+    ) from e
+
+TIME = "time"
+FLOAT = "float"
+INT = "int"
+TEXT = "text"
+
+CANDLE_FIELDS = {
+    "startedAt": TIME,
+    "open": FLOAT,
+    "high": FLOAT,
+    "low": FLOAT,
+    "close": FLOAT,
+    "baseTokenVolume": FLOAT,
+    "usdVolume": FLOAT,
+    "trades": INT,
+    "startingOpenInterest": FLOAT,
+}
+
+TRADE_FIELDS = {
+    "id": TEXT,
+    "side": TEXT,
+    "size": FLOAT,
+    "price": FLOAT,
+    "type": TEXT,
+    "createdAt": TIME,
+    "createdAtHeight": INT,
+}
+
+FUNDING_FIELDS = {
+    "ticker": TEXT,
+    "rate": FLOAT,
+    "price": FLOAT,
+    "effectiveAt": TIME,
+    "effectiveAtHeight": INT,
+}
+
+FILL_FIELDS = {
+    "id": TEXT,
+    "side": TEXT,
+    "liquidity": TEXT,
+    "type": TEXT,
+    "market": TEXT,
+    "marketType": TEXT,
+    "price": FLOAT,
+    "size": FLOAT,
+    "fee": FLOAT,
+    "createdAt": TIME,
+    "createdAtHeight": INT,
+    "orderId": TEXT,
+    "subaccountNumber": INT,
+}
+
+# The fields of the items of each list response, by the name of the list.
+FIELDS = {
+    "candles": CANDLE_FIELDS,
+    "trades": TRADE_FIELDS,
+    "historicalFunding": FUNDING_FIELDS,
+    "fills": FILL_FIELDS,
+}
+
+# "2024-05-01T00:00:00.000Z", the timestamp format of the indexer.
+ISO_LENGTH = 24
+DIGIT_SPANS = [(0, 4), (5, 7), (8, 10), (11, 13), (14, 16), (17, 19), (20, 23)]
+SEPARATORS = {4: "-", 7: "-", 10: "T", 13: ":", 16: ":", 19: ".", 23: "Z"}
+# The largest value of each of month, day, hour, minute and second.
+MAXIMA = [12, 31, 23, 59, 59]
+
+# Scaled decimals of at most this many digits fit in `int64`.
+MAX_SCALED_DIGITS = 18
+
+Items = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+def days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray):
+    # Howard Hinnant's algorithm, on arrays.
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_timestamps(values: List[str]) -> np.ndarray:
+    """
+    Parses ISO timestamps into nanoseconds since the epoch.
+
+    Timestamps in the indexer format are parsed digit by digit on whole arrays,
+    after checking their separators and digits. Others are parsed through
+    `numpy.datetime64`.
+
+    Args:
+        values (List[str]): The UTC timestamps, None where missing.
+
+    Returns:
+        np.ndarray: The `int64` timestamps, missing ones being `NaT` (the smallest
+            `int64`).
+    """
+    raw = np.array(values, dtype=f"S{ISO_LENGTH + 1}")
+    if not len(raw) or (np.char.str_len(raw) != ISO_LENGTH).any():
+        return parse_other_timestamps(values)
+    characters = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(
+        len(raw), ISO_LENGTH + 1
+    )
+    if any(
+        (characters[:, index] != ord(separator)).any()
+        for index, separator in SEPARATORS.items()
+    ):
+        return parse_other_timestamps(values)
+    digits = characters.astype(np.int64) - ord("0")
+    if any(
+        ((digits[:, start:end] < 0) | (digits[:, start:end] > 9)).any()
+        for start, end in DIGIT_SPANS
+    ):
+        return parse_other_timestamps(values)
+    year, month, day, hour, minute, second, millisecond = (
+        sum(digits[:, index] * 10 ** (end - index - 1) for index in range(start, end))
+        for start, end in DIGIT_SPANS
+    )
+    if (
+        (month < 1).any()
+        or (day < 1).any()
+        or any(
+            (field > maximum).any()
+            for field, maximum in zip((month, day, hour, minute, second), MAXIMA)
+        )
+    ):
+        return parse_other_timestamps(values)
+    seconds = (
+        days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+    )
+    return seconds * 1_000_000_000 + millisecond * 1_000_000
+
+
+def parse_other_timestamps(values: List[str]) -> np.ndarray:
+    return np.array(
+        [None if value is None else value.rstrip("Z") for value in values],
+        dtype="datetime64[ns]",
+    ).astype(np.int64)
+
+
+def parse_numbers(values: List[Any], dtype) -> np.ndarray:
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        # Missing values, which only floats can represent.
+        return np.array(
+            [np.nan if value is None else value for value in values], dtype=np.float64
+        )
+
+
+def scale(value: Any, decimals: int) -> int:
+    return int(Decimal(str(value)).scaleb(decimals).to_integral_value(ROUND_HALF_EVEN))
+
+
+def parse_scaled(values: List[Any], decimals: int) -> np.ndarray:
+    """
+    Parses decimal strings into integers scaled by `10 ** decimals`, exactly.
+    """
+    if None in values:
+        # Missing values, which only floats can represent.
+        return np.array(
+            [np.nan if value is None else scale(value, decimals) for value in values],
+            dtype=np.float64,
+        )
+    scaled = parse_decimal_strings(values, decimals)
+    if scaled is None:
+        scaled = np.array([scale(value, decimals) for value in values], dtype=np.int64)
+    return scaled
+
+
+def parse_decimal_strings(values: List[Any], decimals: int) -> Optional[np.ndarray]:
+    """
+    Scales plain decimal strings, e.g. "-123.4500", on whole arrays.
+
+    The integer and fraction digits are parsed separately, and the fraction digits
+    beyond `decimals` round the result half to even, as `scale` does.
+
+    Returns:
+        Optional[np.ndarray]: The `int64` values, or None if a value is not a plain
+            decimal string (e.g. has an exponent) or may not fit in `int64`.
+    """
+    if decimals < 0 or not all(isinstance(value, str) for value in values):
+        return None
+    if not values:
+        return np.array([], dtype=np.int64)
+    try:
+        raw = np.array(values, dtype=np.bytes_)
+    except UnicodeEncodeError:
+        return None
+    negative = np.char.startswith(raw, b"-")
+    parts = np.char.partition(np.where(negative, np.char.lstrip(raw, b"-"), raw), b".")
+    integer, fraction = parts[:, 0], parts[:, 2]
+    fraction_length = np.char.str_len(fraction)
+    if not (
+        np.char.isdigit(integer).all()
+        and (np.char.isdigit(fraction) | (fraction_length == 0)).all()
+        and np.char.str_len(integer).max() + decimals <= MAX_SCALED_DIGITS
+    ):
+        return None
+
+    # The fractions padded with zeros to the kept digits and the rounding digit.
+    width = max(decimals + 1, int(fraction_length.max()))
+    padded = np.char.ljust(fraction, width, b"0").astype(f"S{width}")
+    digits = np.frombuffer(padded.tobytes(), dtype=np.uint8).reshape(
+        len(raw), width
+    ).astype(np.int64) - ord("0")
+    powers = 10 ** np.arange(decimals - 1, -1, -1, dtype=np.int64)
+    result = integer.astype(np.int64) * 10**decimals + digits[:, :decimals] @ powers
+    rounding = digits[:, decimals]
+    beyond_half = digits[:, decimals + 1 :].any(axis=1)
+    result += (rounding > 5) | ((rounding == 5) & (beyond_half | (result % 2 == 1)))
+    return np.where(negative, -result, result)
+
+
+def decode_columns(
+    items: List[Dict[str, Any]],
+    fields: Dict[str, str],
+    decimals: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Converts items into one typed array per field.
+
+    Args:
+        items (List[Dict[str, Any]]): The items of a response.
+        fields (Dict[str, str]): The kind of each field: `TIME`, `FLOAT`, `INT` or
+            `TEXT`.
+        decimals (Optional[int]): If provided, the `FLOAT` fields are parsed as
+            exact decimals, scaled by `10 ** decimals` and rounded (half to even)
+            to `int64`.
+
+    Returns:
+        Dict[str, np.ndarray]: The columns, by field name. Timestamps are `int64`
+            nanoseconds since the epoch.
+    """
+    return decode_values(
+        {field: [item.get(field) for item in items] for field in fields},
+        fields,
+        decimals,
+    )
+
+
+def decode_values(
+    values: Dict[str, List[Any]],
+    fields: Dict[str, str],
+    decimals: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Converts the values of each field into a typed array, see `decode_columns`.
+    """
+    columns = {}
+    for field, kind in fields.items():
+        field_values = values[field]
+        if kind == TIME:
+            columns[field] = parse_timestamps(field_values)
+        elif kind == INT:
+            columns[field] = parse_numbers(field_values, np.int64)
+        elif kind == FLOAT and decimals is not None:
+            columns[field] = parse_scaled(field_values, decimals)
+        elif kind == FLOAT:
+            columns[field] = parse_numbers(field_values, np.float64)
+        else:
+            columns[field] = np.array(
+                field_values, dtype=object if None in field_values else str
+            )
+    return columns
+
+
+class ColumnCollector:
+    """
+    A JSON `object_pairs_hook` gathering the values of the items of a response into
+    one list per field, as the response is decoded, instead of a dictionary per
+    item.
+
+    Objects having one of the `fields` are items, which are replaced with None in
+    the decoded response. Other objects are decoded as usual.
+
+    Args:
+        fields (Dict[str, str]): The fields of the items.
+    """
+
+    def __init__(self, fields: Dict[str, str]):
+        self.values: Dict[str, List[Any]] = {field: [] for field in fields}
+        self.count = 0
+
+    def __call__(self, pairs: List[Any]) -> Optional[Dict[str, Any]]:
+        values = self.values
+        count = self.count
+        is_item = False
+        for key, value in pairs:
+            field_values = values.get(key)
+            if field_values is not None:
+                if len(field_values) < count:
+                    # The previous items missed the field.
+                    field_values.extend([None] * (count - len(field_values)))
+                field_values.append(value)
+                is_item = True
+        if not is_item:
+            return dict(pairs)
+        self.count = count + 1
+        return None
+
+    def columns(self) -> Dict[str, List[Any]]:
+        for field_values in self.values.values():
+            field_values.extend([None] * (self.count - len(field_values)))
+        return self.values
+
+
+def decode_json(
+    content: Union[str, bytes],
+    fields: Dict[str, str],
+    decimals: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Decodes a JSON list response, e.g. of candles, straight into typed arrays.
+
+    Args:
+        content (Union[str, bytes]): The body of the response.
+        fields (Dict[str, str]): The kind of each field of its items, e.g.
+            `CANDLE_FIELDS`.
+        decimals (Optional[int]): See `decode_columns`.
+
+    Returns:
+        Dict[str, np.ndarray]: The columns, by field name.
+    """
+    collector = ColumnCollector(fields)
+    json.loads(content, object_pairs_hook=collector)
+    return decode_values(collector.columns(), fields, decimals)
+
+
+def items_of(response: Items, field: str) -> List[Dict[str, Any]]:
+    if isinstance(response, dict):
+        return response.get(field) or []
+    return response
+
+
+def candle_columns(
+    response: Items, decimals: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Converts a `get_perpetual_market_candles` response, or its candles, to columns.
+    """
+    return decode_columns(items_of(response, "candles"), CANDLE_FIELDS, decimals)
+
+
+def trade_columns(
+    response: Items, decimals: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Converts a `get_perpetual_market_trades` response, or its trades, to columns.
+    """
+    return decode_columns(items_of(response, "trades"), TRADE_FIELDS, decimals)
+
+
+def funding_columns(
+    response: Items, decimals: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Converts a `get_perpetual_market_historical_funding` response, or its funding
+    rates, to columns.
+    """
+    return decode_columns(
+        items_of(response, "historicalFunding"), FUNDING_FIELDS, decimals
+    )
+
+
+def fill_columns(
+    response: Items, decimals: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Converts a `get_subaccount_fills` response, or its fills, to columns.
+    """
+    return decode_columns(items_of(response, "fills"), FILL_FIELDS, decimals)
@@ -1,25 +1,76 @@
 from typing import Optional
 
+import httpx
+
 from .constants import DEFAULT_API_TIMEOUT
 from .modules.account import AccountClient
 from .modules.markets import MarketsClient
 from .modules.status import StatusClient
 from .modules.vaults import MegaVaultClient
 from .modules.affiliate import AffiliateClient
+from .shared.rest import HttpClient
+from .shared.throttling import RequestMetrics, RetryPolicy
 
 
 class IndexerClient:
     """
     Client for Indexer
+
+    All modules share one HTTP client, so connections are kept alive and reused
+    across requests. Use the client as an async context manager, or call `close`,
+    to release them.
     """
 
-    def __init__(self, host: str, api_timeout: Optional[float] = None):
+    def __init__(
+        self,
+        host: str,
+        api_timeout: Optional[float] = None,
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        """
+        Args:
+            host (str): The indexer REST URL.
+            api_timeout (Optional[float]): The timeout of the requests, in seconds.
+            limits (Optional[httpx.Limits]): The connection pool limits.
+            http2 (bool): Whether to use HTTP/2, which requires the `http2` extra of httpx.
+            rate_limit (Optional[float]): The requests per second to the indexer,
+                shared by all modules, unlimited if not provided.
+            burst (Optional[int]): The requests which can be sent at once, within
+                the rate limit.
+            retry (Optional[RetryPolicy]): The retries of throttled (429) or
+                temporarily failing requests, e.g. `RetryPolicy()`. Requests are
+                not retried if not provided.
+        """
         api_timeout = api_timeout or DEFAULT_API_TIMEOUT
-        self._markets = MarketsClient(host, api_timeout)
-        self._account = AccountClient(host, api_timeout)
-        self._status = StatusClient(host, api_timeout)
-        self._megavault = MegaVaultClient(host, api_timeout)
-        self._affiliates = AffiliateClient(host, api_timeout)
+        self._http_client = HttpClient(limits, http2, rate_limit, burst, retry)
+        self._markets = MarketsClient(host, api_timeout, self._http_client)
+        self._account = AccountClient(host, api_timeout, self._http_client)
+        self._status = StatusClient(host, api_timeout, self._http_client)
+        self._megavault = MegaVaultClient(host, api_timeout, self._http_client)
+        self._affiliates = AffiliateClient(host, api_timeout, self._http_client)
+
+    @property
+    def metrics(self) -> RequestMetrics:
+        """
+        Get the counts of queued, throttled and retried requests of all modules.
+        """
+        return self._http_client.metrics
+
+    async def close(self):
+        """
+        Closes the connections of the shared HTTP client.
+        """
+        await self._http_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
     @property
     def markets(self) -> MarketsClient:
@@ -1,5 +1,12 @@
-from typing import Any, Optional
-
+from typing import Any, AsyncIterator, Optional
+
+from dydx_v4_client.indexer.rest.shared.pagination import (
+    DEFAULT_PAGE_SIZE,
+    HeightCursor,
+    PageCursor,
+    TimeCursor,
+    paginate,
+)
 from dydx_v4_client.indexer.rest.shared.rest import RestClient
 
 from ..constants import (
@@ -318,6 +325,8 @@ class AccountClient(RestClient):
         limit: Optional[int] = None,
         created_before_or_at_height: Optional[int] = None,
         created_before_or_at: Optional[str] = None,
+        columnar: bool = False,
+        decimals: Optional[int] = None,
     ) -> Any:
         """
         Retrieves fills for a specific subaccount.
@@ -330,23 +339,27 @@ class AccountClient(RestClient):
             limit (Optional[int]): The maximum number of fills to retrieve.
             created_before_or_at_height (Optional[int]): The block height filter for fills created before or at.
             created_before_or_at (Optional[str]): The timestamp filter for fills created before or at.
+            columnar (bool): Whether to decode the fills straight into NumPy arrays,
+                one per field, which requires NumPy.
+            decimals (Optional[int]): With `columnar`, scales the decimal fields by
+                `10 ** decimals` to exact `int64`.
 
         Returns:
-            Any: The fills data.
+            Any: The fills data, or its columns with `columnar`.
         """
         uri = "/v4/fills"
-        return await self.get(
-            uri,
-            params={
-                "address": address,
-                "subaccountNumber": subaccount_number,
-                "ticker": ticker,
-                "tickerType": ticker_type,
-                "limit": limit,
-                "createdBeforeOrAtHeight": created_before_or_at_height,
-                "createdBeforeOrAt": created_before_or_at,
-            },
-        )
+        params = {
+            "address": address,
+            "subaccountNumber": subaccount_number,
+            "ticker": ticker,
+            "tickerType": ticker_type,
+            "limit": limit,
+            "createdBeforeOrAtHeight": created_before_or_at_height,
+            "createdBeforeOrAt": created_before_or_at,
+        }
+        if columnar:
+            return await self.get_columns(uri, "fills", params, decimals)
+        return await self.get(uri, params=params)
 
     async def get_subaccount_historical_pnls(
         self,
@@ -354,6 +367,7 @@ class AccountClient(RestClient):
         subaccount_number: int,
         effective_before_or_at: Optional[str] = None,
         effective_at_or_after: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> Any:
         """
         Retrieves historical PnLs for a specific subaccount.
@@ -363,6 +377,7 @@ class AccountClient(RestClient):
             subaccount_number (int): The subaccount number.
             effective_before_or_at (Optional[str]): The timestamp filter for PnLs effective before or at.
             effective_at_or_after (Optional[str]): The timestamp filter for PnLs effective at or after.
+            limit (Optional[int]): The maximum number of PnLs to retrieve.
 
         Returns:
             Any: The historical PnLs data.
@@ -375,6 +390,7 @@ class AccountClient(RestClient):
                 "subaccountNumber": subaccount_number,
                 "effectiveBeforeOrAt": effective_before_or_at,
                 "effectiveAtOrAfter": effective_at_or_after,
+                "limit": limit,
             },
         )
 
@@ -700,3 +716,135 @@ class AccountClient(RestClient):
                 "page": page,
             },
         )
+
+    def iter_subaccount_transfers(
+        self,
+        address: str,
+        subaccount_number: int,
+        created_before_or_at_height: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all transfers of a subaccount, from the latest, page by page.
+
+        Args:
+            address (str): The address.
+            subaccount_number (int): The subaccount number.
+            created_before_or_at_height (Optional[int]): The block height to start from.
+            page_size (int): The number of transfers requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The transfers.
+        """
+        return paginate(
+            lambda height, limit: self.get_subaccount_transfers(
+                address, subaccount_number, limit, height
+            ),
+            "transfers",
+            HeightCursor("createdAtHeight"),
+            page_size,
+            start=created_before_or_at_height,
+        )
+
+    def iter_subaccount_fills(
+        self,
+        address: str,
+        subaccount_number: int,
+        ticker: Optional[str] = None,
+        ticker_type: TickerType = TickerType.PERPETUAL,
+        created_before_or_at_height: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all fills of a subaccount, from the latest, page by page.
+
+        Args:
+            address (str): The address.
+            subaccount_number (int): The subaccount number.
+            ticker (Optional[str]): The ticker filter.
+            ticker_type (TickerType): The ticker type filter.
+            created_before_or_at_height (Optional[int]): The block height to start from.
+            page_size (int): The number of fills requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The fills.
+        """
+        return paginate(
+            lambda height, limit: self.get_subaccount_fills(
+                address, subaccount_number, ticker, ticker_type, limit, height
+            ),
+            "fills",
+            HeightCursor("createdAtHeight"),
+            page_size,
+            start=created_before_or_at_height,
+        )
+
+    def iter_subaccount_historical_pnls(
+        self,
+        address: str,
+        subaccount_number: int,
+        effective_before_or_at: Optional[str] = None,
+        effective_at_or_after: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all historical PnLs of a subaccount, from the latest, page by page.
+
+        Args:
+            address (str): The address.
+            subaccount_number (int): The subaccount number.
+            effective_before_or_at (Optional[str]): The timestamp to start from.
+            effective_at_or_after (Optional[str]): The timestamp to stop at.
+            page_size (int): The number of PnLs requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The historical PnLs.
+        """
+        return paginate(
+            lambda timestamp, limit: self.get_subaccount_historical_pnls(
+                address,
+                subaccount_number,
+                timestamp,
+                effective_at_or_after,
+                limit,
+            ),
+            "historicalPnl",
+            TimeCursor("createdAt"),
+            page_size,
+            start=effective_before_or_at,
+        )
+
+    def iter_funding_payments(
+        self,
+        address: str,
+        subaccount_id: int,
+        ticker: Optional[str] = None,
+        after_or_at: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all funding payments of a subaccount, page by page.
+
+        Args:
+            address (str): Address of the account
+            subaccount_id (int): Subaccount number
+            ticker (Optional[str]): Ticker filter
+            after_or_at (Optional[str]): Filter result after or at specified time
+            page_size (int): The number of payments requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The funding payments.
+        """
+        return paginate(
+            lambda page, limit: self.get_funding_payments(
+                address, subaccount_id, limit, ticker, after_or_at, page
+            ),
+            "fundingPayments",
+            PageCursor(),
+            page_size,
+            key=lambda payment: (
+                payment.get("subaccountNumber"),
+                payment.get("ticker"),
+                payment.get("createdAtHeight"),
+            ),
+        )
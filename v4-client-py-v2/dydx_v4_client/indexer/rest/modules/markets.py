@@ -1,6 +1,11 @@
-from typing import Optional
+from typing import Any, AsyncIterator, Optional
 
 from dydx_v4_client.indexer.rest.constants import TimePeriod
+from dydx_v4_client.indexer.rest.shared.pagination import (
+    DEFAULT_PAGE_SIZE,
+    HeightCursor,
+    paginate,
+)
 from dydx_v4_client.indexer.rest.shared.rest import RestClient
 
 
@@ -37,6 +42,8 @@ class MarketsClient(RestClient):
         market: str,
         starting_before_or_at_height: Optional[int] = None,
         limit: Optional[int] = None,
+        columnar: bool = False,
+        decimals: Optional[int] = None,
     ) -> dict:
         """
         Retrieves trades for a specific perpetual market.
@@ -45,18 +52,22 @@ class MarketsClient(RestClient):
             market (str): The market ticker.
             starting_before_or_at_height (Optional[int]): The block height to start retrieving trades from.
             limit (Optional[int]): The maximum number of trades to retrieve.
+            columnar (bool): Whether to decode the trades straight into NumPy
+                arrays, one per field, which requires NumPy.
+            decimals (Optional[int]): With `columnar`, scales the decimal fields by
+                `10 ** decimals` to exact `int64`.
 
         Returns:
-            dict: The trades data.
+            dict: The trades data, or its columns with `columnar`.
         """
         uri = f"/v4/trades/perpetualMarket/{market}"
-        return await self.get(
-            uri,
-            params={
-                "createdBeforeOrAtHeight": starting_before_or_at_height,
-                "limit": limit,
-            },
-        )
+        params = {
+            "createdBeforeOrAtHeight": starting_before_or_at_height,
+            "limit": limit,
+        }
+        if columnar:
+            return await self.get_columns(uri, "trades", params, decimals)
+        return await self.get(uri, params=params)
 
     async def get_perpetual_market_candles(
         self,
@@ -65,6 +76,8 @@ class MarketsClient(RestClient):
         from_iso: Optional[str] = None,
         to_iso: Optional[str] = None,
         limit: Optional[int] = None,
+        columnar: bool = False,
+        decimals: Optional[int] = None,
     ) -> dict:
         """
         Retrieves candle data for a specific perpetual market.
@@ -75,20 +88,24 @@ class MarketsClient(RestClient):
             from_iso (Optional[str]): The start timestamp in ISO format.
             to_iso (Optional[str]): The end timestamp in ISO format.
             limit (Optional[int]): The maximum number of candles to retrieve.
+            columnar (bool): Whether to decode the candles straight into NumPy
+                arrays, one per field, which requires NumPy.
+            decimals (Optional[int]): With `columnar`, scales the decimal fields by
+                `10 ** decimals` to exact `int64`.
 
         Returns:
-            dict: The candle data.
+            dict: The candle data, or its columns with `columnar`.
         """
         uri = f"/v4/candles/perpetualMarkets/{market}"
-        return await self.get(
-            uri,
-            params={
-                "resolution": resolution,
-                "fromISO": from_iso,
-                "toISO": to_iso,
-                "limit": limit,
-            },
-        )
+        params = {
+            "resolution": resolution,
+            "fromISO": from_iso,
+            "toISO": to_iso,
+            "limit": limit,
+        }
+        if columnar:
+            return await self.get_columns(uri, "candles", params, decimals)
+        return await self.get(uri, params=params)
 
     async def get_perpetual_market_historical_funding(
         self,
@@ -96,6 +113,8 @@ class MarketsClient(RestClient):
         effective_before_or_at: Optional[str] = None,
         effective_before_or_at_height: Optional[int] = None,
         limit: Optional[int] = None,
+        columnar: bool = False,
+        decimals: Optional[int] = None,
     ) -> dict:
         """
         Retrieves historical funding rates for a specific perpetual market.
@@ -105,19 +124,24 @@ class MarketsClient(RestClient):
             effective_before_or_at (Optional[str]): The timestamp to retrieve funding rates effective before or at.
             effective_before_or_at_height (Optional[int]): The block height to retrieve funding rates effective before or at.
             limit (Optional[int]): The maximum number of funding rates to retrieve.
+            columnar (bool): Whether to decode the funding rates straight into NumPy
+                arrays, one per field, which requires NumPy.
+            decimals (Optional[int]): With `columnar`, scales the decimal fields by
+                `10 ** decimals` to exact `int64`.
 
         Returns:
-            dict: The historical funding rates data.
+            dict: The historical funding rates data, or its columns with
+                `columnar`.
         """
         uri = f"/v4/historicalFunding/{market}"
-        return await self.get(
-            uri,
-            params={
-                "effectiveBeforeOrAt": effective_before_or_at,
-                "effectiveBeforeOrAtHeight": effective_before_or_at_height,
-                "limit": limit,
-            },
-        )
+        params = {
+            "effectiveBeforeOrAt": effective_before_or_at,
+            "effectiveBeforeOrAtHeight": effective_before_or_at_height,
+            "limit": limit,
+        }
+        if columnar:
+            return await self.get_columns(uri, "historicalFunding", params, decimals)
+        return await self.get(uri, params=params)
 
     async def get_perpetual_market_sparklines(
         self, period: str = TimePeriod.ONE_DAY
@@ -133,3 +157,59 @@ class MarketsClient(RestClient):
         """
         uri = "/v4/sparklines"
         return await self.get(uri, params={"timePeriod": period})
+
+    def iter_perpetual_market_trades(
+        self,
+        market: str,
+        starting_before_or_at_height: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all trades of a perpetual market, from the latest, page by page.
+
+        Args:
+            market (str): The market ticker.
+            starting_before_or_at_height (Optional[int]): The block height to start from.
+            page_size (int): The number of trades requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The trades.
+        """
+        return paginate(
+            lambda height, limit: self.get_perpetual_market_trades(
+                market, height, limit
+            ),
+            "trades",
+            HeightCursor("createdAtHeight"),
+            page_size,
+            start=starting_before_or_at_height,
+        )
+
+    def iter_perpetual_market_historical_funding(
+        self,
+        market: str,
+        effective_before_or_at_height: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        Iterates over all historical funding rates of a perpetual market, from the
+        latest, page by page.
+
+        Args:
+            market (str): The market ticker.
+            effective_before_or_at_height (Optional[int]): The block height to start from.
+            page_size (int): The number of funding rates requested per page.
+
+        Returns:
+            AsyncIterator[Any]: The historical funding rates.
+        """
+        return paginate(
+            lambda height, limit: self.get_perpetual_market_historical_funding(
+                market, effective_before_or_at_height=height, limit=limit
+            ),
+            "historicalFunding",
+            HeightCursor("effectiveAtHeight"),
+            page_size,
+            start=effective_before_or_at_height,
+            key=lambda funding: (funding["ticker"], funding["effectiveAtHeight"]),
+        )
@@ -0,0 +1,118 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List
+
+DEFAULT_PAGE_SIZE = 100
+# The largest `limit` accepted by the indexer.
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class HeightCursor:
+    """
+    Pages backwards with a "before or at height" parameter.
+
+    The next page starts at the height of the last item, so pages overlap at
+    that height.
+    """
+
+    field: str
+
+    def advance(self, cursor, items: List[Dict]) -> int:
+        return int(items[-1][self.field])
+
+
+@dataclass(frozen=True)
+class TimeCursor:
+    """
+    Pages backwards with a "before or at" ISO timestamp parameter.
+
+    The next page starts at the timestamp of the last item, so pages overlap at
+    that timestamp.
+    """
+
+    field: str
+
+    def advance(self, cursor, items: List[Dict]) -> str:
+        return items[-1][self.field]
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """
+    Pages with a 1-based page number.
+    """
+
+    def advance(self, cursor, items: List[Dict]) -> int:
+        return (cursor or 1) + 1
+
+
+def item_id(item: Dict) -> Hashable:
+    return item["id"]
+
+
+async def paginate(
+    fetch: Callable[[Any], Awaitable[Dict]],
+    field: str,
+    cursor,
+    page_size: int,
+    start: Any = None,
+    key: Callable[[Dict], Hashable] = item_id,
+) -> AsyncIterator[Dict]:
+    """
+    Iterates over the items of every page of an indexer endpoint.
+
+    The next page is requested as soon as the current one arrives, so it is
+    fetched while the caller consumes the current page. At most these two pages
+    are held at a time. Items repeated at page boundaries are yielded once.
+
+    When a whole page shares the height or timestamp of the cursor, the cursor
+    cannot move past it without skipping items, so the page is requested again
+    with twice the limit, up to `MAX_PAGE_SIZE`.
+
+    Args:
+        fetch (Callable[[Any, int], Awaitable[Dict]]): Requests the page at a
+            cursor, with a limit.
+        field (str): The response field listing the items.
+        cursor: How the cursor advances, a `HeightCursor`, `TimeCursor` or
+            `PageCursor`.
+        page_size (int): The number of items requested per page. A shorter page
+            is the last one.
+        start (Any): The cursor of the first page, the latest one if not provided.
+        key (Callable[[Dict], Hashable]): Identifies an item, its `id` by default.
+
+    Yields:
+        Dict: The items, in the order of the endpoint.
+
+    Raises:
+        ValueError: If more than `MAX_PAGE_SIZE` items share a height or timestamp.
+    """
+    position = start
+    limit = page_size
+    next_page = asyncio.ensure_future(fetch(position, limit))
+    previous_keys = set()
+    try:
+        while next_page is not None:
+            items = (await next_page).get(field) or []
+            next_page = None
+            if len(items) >= limit:
+                next_position = cursor.advance(position, items)
+                if next_position != position:
+                    limit = page_size
+                elif limit < MAX_PAGE_SIZE:
+                    limit = min(limit * 2, MAX_PAGE_SIZE)
+                else:
+                    raise ValueError(
+                        f"More than {MAX_PAGE_SIZE} {field} at {position}, "
+                        "which cannot be paged through"
+                    )
+                position = next_position
+                next_page = asyncio.ensure_future(fetch(position, limit))
+            keys = set(map(key, items))
+            fresh = [item for item in items if key(item) not in previous_keys]
+            previous_keys = keys
+            for item in fresh:
+                yield item
+    finally:
+        if next_page is not None:
+            next_page.cancel()
@@ -1,25 +1,222 @@
-from typing import Any, Dict, Optional
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, MutableMapping, Optional
 
 import httpx
 
 from dydx_v4_client.indexer.rest.constants import DEFAULT_API_TIMEOUT
+from dydx_v4_client.indexer.rest.shared.throttling import (
+    RequestMetrics,
+    RetryPolicy,
+    TokenBucket,
+)
 from dydx_v4_client.indexer.rest.utils.request_helpers import generate_query_path
 
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """
+    An HTTP client keeping its connections alive between requests.
+
+    Pooled connections are bound to the event loop they were opened in, so an
+    `httpx.AsyncClient` is kept per event loop, e.g. for successive `asyncio.run`
+    calls or loops running in several threads. `aclose` closes the clients of
+    every loop still running, so it should be called (e.g. by `async with`)
+    before the loop using the client completes. The clients of completed loops
+    can no longer be closed; they are dropped with their loop.
+
+    Requests to each host can be limited to `rate_limit` per second, with a token
+    bucket shared by everything using the client. Throttled (429) and temporarily
+    failing responses are retried following `retry`. With a `rate_limit`, the
+    `Retry-After` of a response holds back every request to the host; without,
+    only the retried request waits. `metrics` counts the queued, throttled and
+    retried requests.
+
+    Args:
+        limits (Optional[httpx.Limits]): The connection pool limits, httpx's
+            defaults if not provided.
+        http2 (bool): Whether to negotiate HTTP/2, which requires the `h2` package
+            (the `http2` extra of httpx).
+        rate_limit (Optional[float]): The requests per second to each host,
+            unlimited if not provided.
+        burst (Optional[int]): The requests which can be sent at once to a host,
+            within the rate limit.
+        retry (Optional[RetryPolicy]): The retries, none if not provided.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.limits = limits or httpx.Limits()
+        self.http2 = http2
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.retry = retry
+        self.metrics = RequestMetrics()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._clients: MutableMapping[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is not None and not client.is_closed:
+            return client
+        # Pooled connections refer to their loop, which then stays referenced.
+        for other_loop in [other for other in self._clients if other.is_closed()]:
+            del self._clients[other_loop]
+        client = self._clients[loop] = httpx.AsyncClient(
+            limits=self.limits, http2=self.http2
+        )
+        return client
+
+    def bucket(self, host: str) -> Optional[TokenBucket]:
+        if self.rate_limit is None:
+            return None
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate_limit, self.burst)
+        return bucket
+
+    def is_retried(self, method: str, response: httpx.Response) -> bool:
+        if self.retry is None or response.status_code not in self.retry.status_codes:
+            return False
+        # Other methods may not be idempotent, so are only retried when throttled.
+        return method == "GET" or response.status_code == 429
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request within the rate limit, retrying it if needed.
+
+        Returns:
+            httpx.Response: The last response, whatever its status.
+        """
+        bucket = self.bucket(httpx.URL(url).host)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                waited = await bucket.acquire()
+                if waited:
+                    self.metrics.queued += 1
+                    self.metrics.queued_time += waited
+            self.metrics.requests += 1
+            response = await self.client.request(method, url, **kwargs)
+            if response.status_code == 429:
+                self.metrics.throttled += 1
+            if not self.is_retried(method, response):
+                return response
+            if attempt >= self.retry.max_retries:
+                self.metrics.failed += 1
+                return response
+            delay = self.retry.delay(attempt, response)
+            logger.info(
+                "%s %s returned %s, retrying in %.2fs",
+                method,
+                url,
+                response.status_code,
+                delay,
+            )
+            if bucket is not None:
+                bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+            self.metrics.retried += 1
+            attempt += 1
+
+    @property
+    def is_closed(self) -> bool:
+        return all(client.is_closed for client in self._clients.values())
+
+    async def aclose(self):
+        """
+        Closes the clients of the running loop and of the other running loops.
+        """
+        running_loop = asyncio.get_running_loop()
+        clients = list(self._clients.items())
+        self._clients.clear()
+        for loop, client in clients:
+            if loop is running_loop:
+                await client.aclose()
+            elif loop.is_running():
+                # Closed in its own loop, without waiting for it.
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
 
 class RestClient:
-    def __init__(self, host: str, api_timeout: Optional[float] = None):
+    def __init__(
+        self,
+        host: str,
+        api_timeout: Optional[float] = None,
+        http_client: Optional[HttpClient] = None,
+    ):
         if host.endswith("/"):
             self.host = host[:-1]
         else:
             self.host = host
         self.api_timeout = api_timeout or DEFAULT_API_TIMEOUT
+        # Without a shared HTTP client, the rest client owns its own.
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or HttpClient()
+
+    async def close(self):
+        """
+        Closes the connections of the HTTP client, unless it is shared.
+        """
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
     async def get(self, request_path: str, params: Dict = {}) -> Dict[str, Any]:
+        return (await self.get_response(request_path, params)).json()
+
+    async def get_response(
+        self, request_path: str, params: Dict = {}
+    ) -> httpx.Response:
         url = f"{self.host}{generate_query_path(request_path, params)}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=self.api_timeout)
-            response.raise_for_status()
-            return response.json()
+        response = await self.http_client.request("GET", url, timeout=self.api_timeout)
+        response.raise_for_status()
+        return response
+
+    async def get_columns(
+        self,
+        request_path: str,
+        items: str,
+        params: Dict = {},
+        decimals: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieves a list response decoded straight into one NumPy array per field
+        of its items, without a dictionary per item. Requires NumPy (the
+        `columnar` extra).
+
+        Args:
+            request_path (str): The path of the request.
+            items (str): The list of the response, e.g. "candles".
+            params (Dict): The query parameters.
+            decimals (Optional[int]): If provided, the decimal fields are scaled
+                by `10 ** decimals` to exact `int64`, see `columnar.decode_columns`.
+
+        Returns:
+            Dict[str, np.ndarray]: The columns, by field name.
+        """
+        from dydx_v4_client.indexer.rest import columnar
+
+        response = await self.get_response(request_path, params)
+        return columnar.decode_json(response.content, columnar.FIELDS[items], decimals)
 
     async def post(
         self,
@@ -29,9 +226,8 @@ class RestClient:
         headers: Dict = {},
     ) -> httpx.Response:
         url = f"{self.host}{generate_query_path(request_path, params)}"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url, json=body, headers=headers, timeout=self.api_timeout
-            )
-            response.raise_for_status()
-            return response
+        response = await self.http_client.request(
+            "POST", url, json=body, headers=headers, timeout=self.api_timeout
+        )
+        response.raise_for_status()
+        return response
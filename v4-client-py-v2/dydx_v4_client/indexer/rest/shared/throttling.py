@@ -0,0 +1,118 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Optional
+
+import httpx
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_DELAY_SECS = 0.5
+DEFAULT_MAX_DELAY_SECS = 30
+
+# Responses after which the request is retried: throttled or temporarily unavailable.
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+
+class TokenBucket:
+    """
+    Lets requests through at `rate` per second on average, in bursts of up to
+    `burst` requests.
+
+    Tokens are reserved in order of arrival, so waiting requests are served first
+    come, first served.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """
+        Waits for a token.
+
+        Returns:
+            float: The time waited, in seconds.
+        """
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        wait = -self.tokens / self.rate
+        await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, delay: float):
+        """
+        Holds back the requests not yet let through for at least `delay` seconds.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, -delay * self.rate)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries of throttled or failed requests, with jittered exponential backoff.
+
+    The n-th retry waits a random delay of up to `base_delay * 2 ** n` seconds,
+    capped at `max_delay`, and at least the `Retry-After` of the response.
+    """
+
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_BASE_DELAY_SECS
+    max_delay: float = DEFAULT_MAX_DELAY_SECS
+    status_codes: FrozenSet[int] = RETRY_STATUS_CODES
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if response is None:
+            return backoff
+        return max(backoff, retry_after(response) or 0)
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Reads the `Retry-After` header, in seconds or as an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Counts of the requests sent by an `HttpClient`.
+
+    Attributes:
+        requests (int): The requests sent, retries included.
+        queued (int): The requests which waited for the rate limiter.
+        queued_time (float): The total time spent waiting for it, in seconds.
+        throttled (int): The responses with a 429 status.
+        retried (int): The retries.
+        failed (int): The requests given up on after the last retry.
+    """
+
+    requests: int = 0
+    queued: int = 0
+    queued_time: float = 0.0
+    throttled: int = 0
+    retried: int = 0
+    failed: int = 0
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.rest.backfill import CandleBackfill, to_iso, to_utc
+from dydx_v4_client.indexer.rest.indexer_client import IndexerClient
+
+FILLS = "fills"
+TRADES = "trades"
+HISTORICAL_FUNDING = "historicalFunding"
+CANDLES = "candles"
+
+WRITE_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    time TEXT NOT NULL,
+    height INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, scope, key)
+);
+CREATE INDEX IF NOT EXISTS records_by_time ON records (kind, scope, time);
+CREATE TABLE IF NOT EXISTS synced (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    PRIMARY KEY (kind, scope)
+);
+"""
+
+Time = Union[str, datetime]
+
+
+def iso_bound(time: Optional[Time]) -> Optional[str]:
+    if time is None or isinstance(time, str):
+        return time
+    return to_iso(time)
+
+
+class HistoryStore:
+    """
+    An SQLite store of indexer history: fills, trades, historical funding and
+    candles, keyed by subaccount or market and by time.
+
+    The `sync_*` methods fetch from the indexer only what is newer than the last
+    completed sync, and the range queries read the local database only. A sync
+    interrupted before completing, e.g. by a crash, is redone in full by the next
+    one, so an interrupted first sync does not leave a hole in the history.
+
+    The database is written from a worker thread during the syncs, so they do not
+    block the event loop. The other methods access it directly.
+
+    Args:
+        path (Union[str, Path]): The database file, created if missing.
+        indexer (Optional[IndexerClient]): The indexer to sync from.
+    """
+
+    def __init__(self, path: Union[str, Path], indexer: Optional[IndexerClient] = None):
+        self.indexer = indexer
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        # Serializes the accesses of the sync worker threads and the caller's.
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(
+        self,
+        kind: str,
+        scope: str,
+        records: Iterable[Tuple[str, str, Optional[int], Dict]],
+        synced_height: Optional[int] = None,
+    ):
+        """
+        Stores records, replacing those with the same key.
+
+        Args:
+            kind (str): The kind of records, e.g. `FILLS`.
+            scope (str): The subaccount or market the records belong to.
+            records: The `(key, time, height, data)` of each record.
+            synced_height (Optional[int]): The height up to which every record is
+                now stored, recorded along with the records.
+        """
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (kind, scope, key, time, height, json.dumps(data))
+                    for key, time, height, data in records
+                ),
+            )
+            if synced_height is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO synced VALUES (?, ?, ?)",
+                    (kind, scope, synced_height),
+                )
+
+    def query(
+        self,
+        kind: str,
+        scope: str,
+        start: Optional[Time] = None,
+        end: Optional[Time] = None,
+    ) -> List[Dict]:
+        """
+        Reads the stored records within `[start, end)`, from the earliest.
+
+        Args:
+            kind (str): The kind of records, e.g. `FILLS`.
+            scope (str): The subaccount or market the records belong to.
+            start (Optional[Time]): The earliest time, ISO string or datetime.
+            end (Optional[Time]): The end of the range, excluded.
+
+        Returns:
+            List[Dict]: The records.
+        """
+        sql = "SELECT data FROM records WHERE kind = ? AND scope = ?"
+        params = [kind, scope]
+        if start is not None:
+            sql += " AND time >= ?"
+            params.append(iso_bound(start))
+        if end is not None:
+            sql += " AND time < ?"
+            params.append(iso_bound(end))
+        with self._lock:
+            rows = self.connection.execute(
+                sql + " ORDER BY time, key", params
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def synced_height(self, kind: str, scope: str) -> Optional[int]:
+        """
+        Retrieves the height up to which the last completed sync stored every
+        record, None if no sync completed yet.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT height FROM synced WHERE kind = ? AND scope = ?",
+                (kind, scope),
+            ).fetchone()
+        return row and row[0]
+
+    def last_time(self, kind: str, scope: str) -> Optional[str]:
+        with self._lock:
+            (time,) = self.connection.execute(
+                "SELECT MAX(time) FROM records WHERE kind = ? AND scope = ?",
+                (kind, scope),
+            ).fetchone()
+        return time
+
+    async def _sync_newest_first(
+        self,
+        kind: str,
+        scope: str,
+        items: AsyncIterator[Dict],
+        key_of,
+        time_field: str,
+        height_field: str,
+    ) -> int:
+        # The items arrive from the latest; those of the synced height are fetched
+        # again, as more may have been added in that block. The synced height only
+        # advances once the sync completes, so an interrupted one is redone.
+        synced_height = self.synced_height(kind, scope)
+        top_height = None
+        count = 0
+        batch = []
+        try:
+            async for item in items:
+                height = int(item[height_field])
+                if synced_height is not None and height < synced_height:
+                    break
+                if top_height is None:
+                    top_height = height
+                batch.append((key_of(item), item[time_field], height, item))
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    await asyncio.to_thread(self.write, kind, scope, batch)
+                    count += len(batch)
+                    batch = []
+        finally:
+            await items.aclose()
+        await asyncio.to_thread(self.write, kind, scope, batch, top_height)
+        return count + len(batch)
+
+    async def sync_fills(self, address: str, subaccount_number: int) -> int:
+        """
+        Fetches the fills of a subaccount newer than the stored ones.
+
+        Returns:
+            int: The number of fills written.
+        """
+        return await self._sync_newest_first(
+            FILLS,
+            f"{address}/{subaccount_number}",
+            self.indexer.account.iter_subaccount_fills(address, subaccount_number),
+            lambda fill: fill["id"],
+            "createdAt",
+            "createdAtHeight",
+        )
+
+    async def sync_trades(self, market: str) -> int:
+        """
+        Fetches the trades of a market newer than the stored ones.
+
+        Returns:
+            int: The number of trades written.
+        """
+        return await self._sync_newest_first(
+            TRADES,
+            market,
+            self.indexer.markets.iter_perpetual_market_trades(market),
+            lambda trade: trade["id"],
+            "createdAt",
+            "createdAtHeight",
+        )
+
+    async def sync_historical_funding(self, market: str) -> int:
+        """
+        Fetches the historical funding rates of a market newer than the stored ones.
+
+        Returns:
+            int: The number of funding rates written.
+        """
+        return await self._sync_newest_first(
+            HISTORICAL_FUNDING,
+            market,
+            self.indexer.markets.iter_perpetual_market_historical_funding(market),
+            lambda funding: funding["effectiveAtHeight"],
+            "effectiveAt",
+            "effectiveAtHeight",
+        )
+
+    async def sync_candles(
+        self,
+        market: str,
+        resolution: CandlesResolution,
+        since: Time,
+        until: Optional[datetime] = None,
+    ) -> int:
+        """
+        Fetches the candles of a market newer than the stored ones.
+
+        The last stored candle is fetched again, as it may not have been closed.
+
+        Args:
+            market (str): The market ticker.
+            resolution (CandlesResolution): The candle resolution.
+            since (Time): Where to start when no candle is stored yet.
+            until (Optional[datetime]): The end of the range, UTC if naive, now if
+                not provided.
+
+        Returns:
+            int: The number of candles written.
+        """
+        scope = f"{market}/{resolution.value}"
+        start = self.last_time(CANDLES, scope) or iso_bound(since)
+        # A new backfill, as the open candle must not be kept from a previous sync.
+        candles = await CandleBackfill(self.indexer.markets).backfill(
+            market,
+            resolution,
+            to_utc(datetime.fromisoformat(start.rstrip("Z"))),
+            to_utc(until or datetime.now(timezone.utc)),
+        )
+        await asyncio.to_thread(
+            self.write,
+            CANDLES,
+            scope,
+            [
+                (candle["startedAt"], candle["startedAt"], None, candle)
+                for candle in candles
+            ],
+        )
+        return len(candles)
+
+    def fills(
+        self,
+        address: str,
+        subaccount_number: int,
+        start: Optional[Time] = None,
+        end: Optional[Time] = None,
+    ) -> List[Dict]:
+        """
+        Reads the stored fills of a subaccount created within `[start, end)`.
+        """
+        return self.query(FILLS, f"{address}/{subaccount_number}", start, end)
+
+    def trades(
+        self, market: str, start: Optional[Time] = None, end: Optional[Time] = None
+    ) -> List[Dict]:
+        """
+        Reads the stored trades of a market created within `[start, end)`.
+        """
+        return self.query(TRADES, market, start, end)
+
+    def historical_funding(
+        self, market: str, start: Optional[Time] = None, end: Optional[Time] = None
+    ) -> List[Dict]:
+        """
+        Reads the stored funding rates of a market effective within `[start, end)`.
+        """
+        return self.query(HISTORICAL_FUNDING, market, start, end)
+
+    def candles(
+        self,
+        market: str,
+        resolution: CandlesResolution,
+        start: Optional[Time] = None,
+        end: Optional[Time] = None,
+    ) -> List[Dict]:
+        """
+        Reads the stored candles of a market started within `[start, end)`.
+        """
+        return self.query(CANDLES, f"{market}/{resolution.value}", start, end)
@@ -0,0 +1,517 @@
+import asyncio
+import base64
+import hashlib
+import inspect
+import json
+import os
+import random
+import ssl
+import struct
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from websocket import ABNF
+
+from dydx_v4_client.indexer.socket.websocket import (
+    RESYNCED,
+    Candles,
+    Channel,
+    Markets,
+    MessageSequence,
+    OrderBook,
+    Subaccounts,
+    Trades,
+    routes,
+)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+NORMAL_CLOSURE = 1000
+MESSAGE_TOO_BIG = 1009
+DEFAULT_RECONNECT_DELAY = 0.5
+DEFAULT_MAX_RECONNECT_DELAY = 30.0
+DEFAULT_OPEN_TIMEOUT = 10.0
+DEFAULT_PING_INTERVAL = 20.0
+DEFAULT_PING_TIMEOUT = 20.0
+DEFAULT_MAX_SIZE = 2**24
+
+
+class WebSocketClosed(Exception):
+    """
+    Raised when using a websocket which was closed.
+    """
+
+
+class MessageTooBig(Exception):
+    """
+    Raised when receiving a message larger than the connection's `max_size`.
+    """
+
+    def __init__(self, size: int):
+        super().__init__(f"Websocket message of {size} bytes or more is too big")
+
+
+class WebSocketConnection:
+    """
+    A client websocket connection over asyncio streams.
+
+    Text frames are sent masked, as clients must. Incoming fragmented messages are
+    reassembled, pings are answered and a close frame ends the connection.
+
+    When nothing is received for `ping_interval` seconds, a ping is sent, and the
+    connection is closed if nothing arrives within `ping_timeout` more, so that a
+    half-open connection is detected. Messages larger than `max_size` bytes close
+    the connection as well.
+
+    Args:
+        reader (asyncio.StreamReader): The stream of the connection.
+        writer (asyncio.StreamWriter): The stream of the connection.
+        ping_interval (Optional[float]): The seconds without receiving anything
+            before checking the connection with a ping, never if None.
+        ping_timeout (float): The seconds to wait for anything after the ping.
+        max_size (int): The maximum size of a message, in bytes.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        ping_interval: Optional[float] = DEFAULT_PING_INTERVAL,
+        ping_timeout: float = DEFAULT_PING_TIMEOUT,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.max_size = max_size
+        self.closed = False
+        self.last_received = time.monotonic()
+        self._keepalive: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def open(
+        cls,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        timeout: Optional[float] = DEFAULT_OPEN_TIMEOUT,
+        **options,
+    ) -> "WebSocketConnection":
+        """
+        Opens a connection and performs the websocket handshake.
+
+        Args:
+            url (str): The `ws://` or `wss://` URL.
+            headers (Optional[Dict[str, str]]): Additional handshake headers.
+            ssl_context (Optional[ssl.SSLContext]): The TLS settings of `wss://`
+                URLs, the default verifying ones if not provided.
+            timeout (Optional[float]): The maximum seconds to connect and complete
+                the handshake, unbounded if None.
+            **options: The `ping_interval`, `ping_timeout` and `max_size` of the
+                connection.
+
+        Returns:
+            WebSocketConnection: The open connection.
+
+        Raises:
+            asyncio.TimeoutError: If the handshake did not complete in time.
+        """
+        return await asyncio.wait_for(
+            cls._open(url, headers, ssl_context, options), timeout
+        )
+
+    @classmethod
+    async def _open(
+        cls,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        ssl_context: Optional[ssl.SSLContext],
+        options: Dict[str, Any],
+    ) -> "WebSocketConnection":
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        port = parts.port or (443 if secure else 80)
+        reader, writer = await asyncio.open_connection(
+            parts.hostname,
+            port,
+            ssl=(ssl_context or ssl.create_default_context()) if secure else None,
+        )
+        try:
+            key = base64.b64encode(os.urandom(16)).decode()
+            path = parts.path or "/"
+            if parts.query:
+                path += f"?{parts.query}"
+            request_headers = {
+                "Host": parts.netloc,
+                "Upgrade": "websocket",
+                "Connection": "Upgrade",
+                "Sec-WebSocket-Key": key,
+                "Sec-WebSocket-Version": "13",
+                **(headers or {}),
+            }
+            writer.write(
+                (
+                    f"GET {path} HTTP/1.1\r\n"
+                    + "".join(
+                        f"{name}: {value}\r\n"
+                        for name, value in request_headers.items()
+                    )
+                    + "\r\n"
+                ).encode()
+            )
+            await writer.drain()
+
+            status, response_headers = parse_response(
+                await reader.readuntil(b"\r\n\r\n")
+            )
+        except BaseException:
+            # Including the cancellation of a timed out handshake.
+            writer.close()
+            raise
+        expected = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        if status != 101 or response_headers.get("sec-websocket-accept") != expected:
+            writer.close()
+            raise ConnectionError(f"Websocket handshake with {url} failed: {status}")
+        return cls(reader, writer, **options)
+
+    async def send(self, text: str):
+        await self._send_frame(ABNF.create_frame(text, ABNF.OPCODE_TEXT))
+
+    async def send_many(self, texts: List[str]):
+        """
+        Sends several text messages, flushed at once.
+        """
+        await self._write(
+            [ABNF.create_frame(text, ABNF.OPCODE_TEXT).format() for text in texts]
+        )
+
+    async def _send_frame(self, frame: ABNF):
+        await self._write([frame.format()])
+
+    async def _write(self, data: List[bytes]):
+        """
+        Writes frames, a failure closing the connection.
+
+        Raises:
+            WebSocketClosed: If the connection is or gets closed.
+        """
+        if self.closed:
+            raise WebSocketClosed()
+        try:
+            self.writer.writelines(data)
+            await self.writer.drain()
+        except (OSError, RuntimeError) as e:
+            self._abort()
+            raise WebSocketClosed() from e
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        self.last_received = time.monotonic()
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if length > self.max_size:
+            raise MessageTooBig(length)
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask is not None:
+            payload = ABNF.mask(mask, payload)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def recv(self) -> str:
+        """
+        Waits for the next text message.
+
+        Raises:
+            WebSocketClosed: If the connection is or gets closed.
+        """
+        if self._keepalive is None and self.ping_interval is not None:
+            self._keepalive = asyncio.ensure_future(self.keepalive())
+        fragments = []
+        size = 0
+        while True:
+            if self.closed:
+                raise WebSocketClosed()
+            try:
+                fin, opcode, payload = await self._read_frame()
+                size += len(payload)
+                if size > self.max_size:
+                    raise MessageTooBig(size)
+            except MessageTooBig as e:
+                await self.close(MESSAGE_TOO_BIG)
+                raise WebSocketClosed(str(e)) from e
+            except (asyncio.IncompleteReadError, OSError) as e:
+                self._abort()
+                raise WebSocketClosed() from e
+            if opcode == ABNF.OPCODE_PING:
+                await self._send_frame(ABNF.create_frame(payload, ABNF.OPCODE_PONG))
+            elif opcode == ABNF.OPCODE_CLOSE:
+                await self.close()
+                raise WebSocketClosed()
+            elif opcode in (ABNF.OPCODE_TEXT, ABNF.OPCODE_BINARY, ABNF.OPCODE_CONT):
+                fragments.append(payload)
+                if fin:
+                    return b"".join(fragments).decode()
+            else:
+                # Control frames (pongs) are not part of the message.
+                size -= len(payload)
+
+    async def close(self, code: int = NORMAL_CLOSURE):
+        if self.closed:
+            return
+        try:
+            await self._send_frame(
+                ABNF.create_frame(struct.pack("!H", code), ABNF.OPCODE_CLOSE)
+            )
+        except WebSocketClosed:
+            pass
+        self._abort()
+
+    async def keepalive(self):
+        """
+        Pings the connection after `ping_interval` seconds without receiving
+        anything, and closes it if nothing arrives within `ping_timeout` more,
+        which ends the pending `recv`.
+        """
+        while not self.closed:
+            idle = time.monotonic() - self.last_received
+            if idle < self.ping_interval:
+                await asyncio.sleep(self.ping_interval - idle)
+                continue
+            pinged_at = time.monotonic()
+            try:
+                # A small frame, written without waiting for a concurrent drain.
+                self.writer.write(ABNF.create_frame(b"", ABNF.OPCODE_PING).format())
+            except (OSError, RuntimeError):
+                pass
+            await asyncio.sleep(self.ping_timeout)
+            if self.last_received < pinged_at:
+                self._abort()
+
+    def _abort(self):
+        self.closed = True
+        self.writer.close()
+        keepalive = self._keepalive
+        if keepalive is not None and keepalive is not asyncio.current_task():
+            keepalive.cancel()
+
+
+def parse_response(head: bytes) -> Tuple[int, Dict[str, str]]:
+    status_line, *lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    return int(status_line.split(" ")[1]), headers
+
+
+class AsyncIndexerSocket:
+    """
+    An indexer websocket client running on the caller's event loop.
+
+    Messages are parsed from JSON and read with `async for`, and subscriptions
+    are awaited, e.g.:
+
+        async with AsyncIndexerSocket(TESTNET.websocket_indexer) as socket:
+            await socket.candles.subscribe("ETH-USD", CandlesResolution.ONE_MINUTE)
+            async for message in socket:
+                ...
+
+    When the connection drops, the socket reconnects after a random delay of up
+    to `reconnect_delay * 2 ** n` seconds for the n-th failed attempt, capped at
+    `max_reconnect_delay`. The active subscriptions are then replayed, and a
+    `{"type": "resynced"}` message is returned: the replayed subscriptions send
+    new snapshots, from which the state should be rebuilt.
+
+    Alternatively, `run` passes each message to the handler of its subscription:
+
+        await socket.order_book.subscribe("ETH-USD", handler=on_order_book)
+        await socket.run(on_message=on_other_message)
+
+    The `message_id` of the messages is checked by `sequence`: after a gap, the
+    order book and subaccount subscriptions are renewed for new snapshots.
+
+    Args:
+        url (str): The websocket indexer URL.
+        headers (Optional[Dict[str, str]]): Additional handshake headers.
+        ssl_context (Optional[ssl.SSLContext]): The TLS settings of `wss://` URLs.
+        reconnect (bool): Whether to reconnect when the connection drops.
+        reconnect_delay (float): The base delay of the reconnection backoff.
+        max_reconnect_delay (float): The maximum delay between attempts.
+        open_timeout (Optional[float]): The maximum seconds to connect and
+            complete the handshake, unbounded if None.
+        ping_interval (Optional[float]): The seconds without receiving anything
+            before checking the connection with a ping, never if None.
+        ping_timeout (float): The seconds to wait for anything after the ping,
+            before reconnecting.
+        max_size (int): The maximum size of a message, in bytes.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        reconnect: bool = True,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+        max_reconnect_delay: float = DEFAULT_MAX_RECONNECT_DELAY,
+        open_timeout: Optional[float] = DEFAULT_OPEN_TIMEOUT,
+        ping_interval: Optional[float] = DEFAULT_PING_INTERVAL,
+        ping_timeout: float = DEFAULT_PING_TIMEOUT,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.url = url
+        self.headers = headers
+        self.ssl_context = ssl_context
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.open_timeout = open_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.max_size = max_size
+        self.reconnects = 0
+        self.connection: Optional[WebSocketConnection] = None
+        self.closing = False
+        self.order_book = OrderBook(self)
+        self.trades = Trades(self)
+        self.markets = Markets(self)
+        self.candles = Candles(self)
+        self.subaccounts = Subaccounts(self)
+        self.sequence = MessageSequence(self.channels)
+        self.routes = routes(self.channels)
+
+    @property
+    def channels(self) -> List[Channel]:
+        return [
+            self.order_book,
+            self.trades,
+            self.markets,
+            self.candles,
+            self.subaccounts,
+        ]
+
+    async def connect(self) -> "AsyncIndexerSocket":
+        self.closing = False
+        self.connection = await self.open()
+        return self
+
+    async def open(self) -> WebSocketConnection:
+        return await WebSocketConnection.open(
+            self.url,
+            self.headers,
+            self.ssl_context,
+            self.open_timeout,
+            ping_interval=self.ping_interval,
+            ping_timeout=self.ping_timeout,
+            max_size=self.max_size,
+        )
+
+    async def close(self):
+        self.closing = True
+        if self.connection is not None:
+            await self.connection.close()
+
+    async def __aenter__(self) -> "AsyncIndexerSocket":
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def send(self, text: str):
+        if self.connection is None:
+            raise WebSocketClosed("The socket is not connected")
+        try:
+            await self.connection.send(text)
+        except WebSocketClosed:
+            # The subscriptions are tracked, and replayed once reconnected.
+            if not self.is_reconnecting():
+                raise
+
+    async def recv(self) -> Dict[str, Any]:
+        """
+        Waits for the next message.
+
+        Raises:
+            WebSocketClosed: If the socket is or gets closed, and does not
+                reconnect.
+        """
+        if self.connection is None:
+            raise WebSocketClosed("The socket is not connected")
+        try:
+            message = json.loads(await self.connection.recv())
+        except WebSocketClosed:
+            if not self.is_reconnecting():
+                raise
+            return await self.resync()
+        for channel, id in self.sequence.check(message):
+            await channel.resubscribe(id)
+        return message
+
+    def is_reconnecting(self) -> bool:
+        return self.reconnect and not self.closing
+
+    async def resync(self) -> Dict[str, Any]:
+        """
+        Reconnects, then replays the active subscriptions in bulk.
+
+        Returns:
+            Dict[str, Any]: The `resynced` message, with the number of replayed
+                subscriptions.
+        """
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.backoff(attempt))
+            if self.closing:
+                raise WebSocketClosed()
+            try:
+                connection = await self.open()
+                break
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                attempt += 1
+        if self.closing:
+            await connection.close()
+            raise WebSocketClosed()
+        self.connection = connection
+        self.reconnects += 1
+        messages = [
+            message
+            for channel in self.channels
+            for message in channel.subscribe_messages()
+        ]
+        await self.connection.send_many(messages)
+        return {"type": RESYNCED, "subscriptions": len(messages)}
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.max_reconnect_delay, self.reconnect_delay * 2**attempt)
+        )
+
+    async def run(self, on_message: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        Reads the messages until the socket is closed, passing each to the handler
+        of its subscription, given to `subscribe`, or else to `on_message`. The
+        handlers may be coroutine functions.
+        """
+        async for message in self:
+            channel = self.routes.get(message.get("channel"))
+            handled = channel is not None and channel.process(message)
+            if not handled and on_message is not None:
+                handled = on_message(message)
+            if inspect.isawaitable(handled):
+                await handled
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        try:
+            return await self.recv()
+        except WebSocketClosed:
+            raise StopAsyncIteration
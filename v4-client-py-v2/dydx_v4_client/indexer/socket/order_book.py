@@ -0,0 +1,262 @@
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dydx_v4_client.indexer.socket.websocket import (
+    RESYNCED,
+    MessageSequence,
+    OrderBook,
+)
+
+Level = Tuple[Decimal, Decimal]
+
+ZERO = Decimal(0)
+
+
+class BookSide:
+    """
+    The price levels of one side of an order book.
+
+    Prices are kept in a sorted array, located by bisection, and the sizes in a
+    dictionary by price: a level is found in O(log n), and the best levels are
+    read without sorting.
+
+    Args:
+        descending (bool): Whether the best level is the highest price (bids).
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.prices: List[Decimal] = []
+        self.sizes: Dict[Decimal, Decimal] = {}
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __iter__(self) -> Iterator[Level]:
+        """
+        Iterates over the levels, from the best.
+        """
+        prices = reversed(self.prices) if self.descending else self.prices
+        sizes = self.sizes
+        return ((price, sizes[price]) for price in prices)
+
+    def clear(self):
+        self.prices.clear()
+        self.sizes.clear()
+
+    def update(self, price: Decimal, size: Decimal):
+        """
+        Sets the size of a level, removing it when the size is zero.
+        """
+        if not size:
+            if self.sizes.pop(price, None) is not None:
+                del self.prices[bisect_left(self.prices, price)]
+            return
+        if price not in self.sizes:
+            insort(self.prices, price)
+        self.sizes[price] = size
+
+    @property
+    def best(self) -> Optional[Level]:
+        if not self.prices:
+            return None
+        price = self.prices[-1] if self.descending else self.prices[0]
+        return price, self.sizes[price]
+
+    def top(self, count: int) -> List[Level]:
+        """
+        Retrieves the `count` best levels, from the best.
+        """
+        if self.descending:
+            prices = self.prices[: -count - 1 : -1] if count else []
+        else:
+            prices = self.prices[:count]
+        return [(price, self.sizes[price]) for price in prices]
+
+    def price_for_size(self, size: Decimal) -> Optional[Decimal]:
+        """
+        Retrieves the worst price reached when taking `size` from the side.
+
+        Returns:
+            Optional[Decimal]: The price, or None if the side is not deep enough.
+        """
+        remaining = size
+        for price, level_size in self:
+            remaining -= level_size
+            if remaining <= ZERO:
+                return price
+        return None
+
+    def vwap(self, size: Decimal) -> Optional[Decimal]:
+        """
+        Retrieves the volume weighted average price of taking `size` from the side.
+
+        Returns:
+            Optional[Decimal]: The price, or None if the side is not deep enough.
+        """
+        if size <= ZERO:
+            return None
+        remaining = size
+        notional = ZERO
+        for price, level_size in self:
+            taken = min(remaining, level_size)
+            notional += taken * price
+            remaining -= taken
+            if remaining <= ZERO:
+                return notional / size
+        return None
+
+    def size_within(self, price: Decimal) -> Decimal:
+        """
+        Retrieves the total size of the levels at `price` or better.
+        """
+        if self.descending:
+            prices = self.prices[bisect_left(self.prices, price) :]
+        else:
+            prices = self.prices[: bisect_right(self.prices, price)]
+        return sum((self.sizes[level] for level in prices), ZERO)
+
+
+class LocalOrderBook:
+    """
+    An L2 order book of a market, maintained from the `v4_orderbook` channel.
+
+    The `subscribed` snapshot sets the levels, and the `channel_data` and
+    `channel_batch_data` updates set the size of single levels, a zero size
+    removing the level.
+
+    Args:
+        market (str): The market ticker.
+    """
+
+    def __init__(self, market: str):
+        self.market = market
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.synced = False
+
+    def reset(self, snapshot: Dict[str, Any]):
+        """
+        Replaces the levels with the ones of a `subscribed` message contents.
+        """
+        self.bids.clear()
+        self.asks.clear()
+        self.apply_levels(snapshot)
+        self.synced = True
+
+    def apply_levels(self, contents: Dict[str, Any]):
+        for side, levels in (
+            (self.bids, contents.get("bids")),
+            (self.asks, contents.get("asks")),
+        ):
+            for level in levels or ():
+                if isinstance(level, dict):
+                    side.update(Decimal(level["price"]), Decimal(level["size"]))
+                else:
+                    side.update(Decimal(level[0]), Decimal(level[1]))
+
+    def apply(self, message: Dict[str, Any]):
+        """
+        Applies an order book message of the market.
+        """
+        kind = message["type"]
+        if kind == "subscribed":
+            self.reset(message["contents"])
+        elif kind == "channel_data":
+            self.apply_levels(message["contents"])
+        elif kind == "channel_batch_data":
+            for contents in message["contents"]:
+                self.apply_levels(contents)
+
+    @property
+    def best_bid(self) -> Optional[Level]:
+        return self.bids.best
+
+    @property
+    def best_ask(self) -> Optional[Level]:
+        return self.asks.best
+
+    @property
+    def spread(self) -> Optional[Decimal]:
+        if not self.bids.prices or not self.asks.prices:
+            return None
+        return self.asks.prices[0] - self.bids.prices[-1]
+
+    @property
+    def mid(self) -> Optional[Decimal]:
+        if not self.bids.prices or not self.asks.prices:
+            return None
+        return (self.asks.prices[0] + self.bids.prices[-1]) / 2
+
+    @property
+    def is_crossed(self) -> bool:
+        """
+        Whether the best bid is at or above the best ask, which a consistent book
+        never is: the book missed updates, or the indexer has yet to uncross it.
+        """
+        return bool(
+            self.bids.prices
+            and self.asks.prices
+            and self.bids.prices[-1] >= self.asks.prices[0]
+        )
+
+
+class OrderBooks:
+    """
+    The local order books of the markets subscribed to on an indexer socket.
+
+    Pass every socket message to `process`, e.g.:
+
+        books = OrderBooks(socket.sequence)
+        async for message in socket:
+            book = books.process(message)
+            if book is not None and book.synced and not book.is_crossed:
+                print(book.best_bid, book.best_ask)
+
+    On a `resynced` message, the books are marked out of sync until the snapshot
+    of their renewed subscription arrives. So are they on a gap in the message
+    numbering, with the socket's `sequence`.
+
+    Args:
+        sequence (Optional[MessageSequence]): The message sequence of the socket,
+            whose pending renewals mark the books out of sync.
+    """
+
+    def __init__(self, sequence: Optional[MessageSequence] = None):
+        self.books: Dict[str, LocalOrderBook] = {}
+        self.sequence = sequence
+
+    def __getitem__(self, market: str) -> LocalOrderBook:
+        return self.books[market]
+
+    def __contains__(self, market: str) -> bool:
+        return market in self.books
+
+    def process(self, message: Dict[str, Any]) -> Optional[LocalOrderBook]:
+        """
+        Applies a socket message.
+
+        Returns:
+            Optional[LocalOrderBook]: The book updated by the message, if any.
+        """
+        # The socket checks the numbering before the message is passed on, so the
+        # books renewed after a gap are pending from the message revealing it.
+        if self.sequence is not None and self.sequence.pending:
+            for channel, market in self.sequence.pending:
+                if channel == OrderBook.channel and market in self.books:
+                    self.books[market].synced = False
+        if message.get("channel") != OrderBook.channel:
+            if message.get("type") == RESYNCED:
+                for book in self.books.values():
+                    book.synced = False
+            return None
+        market = message["id"]
+        if message["type"] == "unsubscribed":
+            self.books.pop(market, None)
+            return None
+        book = self.books.get(market)
+        if book is None:
+            book = self.books[market] = LocalOrderBook(market)
+        book.apply(message)
+        return book
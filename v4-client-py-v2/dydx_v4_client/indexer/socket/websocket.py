@@ -1,46 +1,154 @@
+import asyncio
+import inspect
 import json
 import ssl
 from dataclasses import dataclass, field
 
 import websocket
-from typing_extensions import Any, Callable, Optional, Self, Union
+from typing_extensions import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Self,
+    Set,
+    Tuple,
+    Union,
+)
 
 from dydx_v4_client.indexer.candles_resolution import CandlesResolution
 
 
+async def resolve_to(sent, result):
+    await sent
+    return result
+
+
+async def undo_on_error(sent, undo: Callable[[], None]):
+    try:
+        return await sent
+    except BaseException:
+        undo()
+        raise
+
+
+async def resolve_all(sent):
+    for awaitable in sent:
+        await awaitable
+
+
+Handler = Callable[[dict], Any]
+
+
 @dataclass
 class Channel:
     channel: str = field(init=False)
     app: websocket.WebSocketApp
-
-    def subscribe(self, **kwargs) -> Self:
-        self.app.send(
-            json.dumps({"type": "subscribe", "channel": self.channel, **kwargs})
-        )
-        return self
+    # The arguments of the active subscriptions, by id (None for `Markets`).
+    subscriptions: Dict[Optional[str], Dict[str, Any]] = field(
+        default_factory=dict, init=False
+    )
+    # The handlers of the messages of the subscriptions, by id.
+    handlers: Dict[Optional[str], Handler] = field(default_factory=dict, init=False)
+
+    def send(self, message: dict, result=None):
+        # Asynchronous sockets return an awaitable, resolving to the result.
+        sent = self.app.send(json.dumps(message))
+        if inspect.isawaitable(sent):
+            return resolve_to(sent, result)
+        return result
+
+    def subscribe(self, handler: Optional[Handler] = None, **kwargs) -> Self:
+        # Tracked, so that the subscription is replayed when the socket reconnects,
+        # and not sent again meanwhile, e.g. by an `on_open` handler.
+        # Undone if sending fails, so that it is neither replayed nor skipped.
+        id = kwargs.get("id")
+        previous = self.subscriptions.get(id), self.handlers.get(id)
+        if handler is not None:
+            self.handlers[id] = handler
+        if previous[0] == kwargs:
+            return self.resolved(self)
+        self.subscriptions[id] = kwargs
+
+        def undo():
+            if self.subscriptions.get(id) is not kwargs:
+                return
+            for tracked, value in zip((self.subscriptions, self.handlers), previous):
+                if value is None:
+                    tracked.pop(id, None)
+                else:
+                    tracked[id] = value
+
+        try:
+            sent = self.send(
+                {"type": "subscribe", "channel": self.channel, **kwargs}, result=self
+            )
+        except BaseException:
+            undo()
+            raise
+        if inspect.isawaitable(sent):
+            return undo_on_error(sent, undo)
+        return sent
+
+    def resolved(self, result):
+        if inspect.iscoroutinefunction(self.app.send):
+            return resolve_to(asyncio.sleep(0), result)
+        return result
 
     def unsubscribe(self, **kwargs):
-        self.app.send(
-            json.dumps({"type": "unsubscribe", "channel": self.channel, **kwargs})
-        )
+        self.subscriptions.pop(kwargs.get("id"), None)
+        self.handlers.pop(kwargs.get("id"), None)
+        return self.send({"type": "unsubscribe", "channel": self.channel, **kwargs})
+
+    def resubscribe(self, id: Optional[str] = None):
+        """
+        Unsubscribes from an active subscription and subscribes again, for the
+        indexer to send a new snapshot.
+        """
+        kwargs = self.subscriptions[id]
+        unsubscribe = {"type": "unsubscribe", "channel": self.channel}
+        if id is not None:
+            unsubscribe["id"] = id
+        sent = [
+            self.app.send(json.dumps(unsubscribe)),
+            self.app.send(
+                json.dumps({"type": "subscribe", "channel": self.channel, **kwargs})
+            ),
+        ]
+        if inspect.isawaitable(sent[0]):
+            return resolve_all(sent)
+
+    def subscribe_messages(self) -> List[str]:
+        """
+        The messages renewing the active subscriptions, e.g. after reconnecting.
+        """
+        return [
+            json.dumps({"type": "subscribe", "channel": self.channel, **kwargs})
+            for kwargs in self.subscriptions.values()
+        ]
 
-    def process(self, message):
+    def process(self, message: dict):
         """
-        WIP.
-        An idea to provide per-channel processing instead of `on_message` for all messages.
+        Passes a message of the channel to the handler of its subscription.
 
-        Maybe allow creating standalone channels? Ie.:
-        order_book = OrderBook()
-        order_book.subscribe(id="ENA-USD")
+        Returns:
+            Whether the subscription has a handler, or the awaitable returned by
+            an asynchronous handler.
         """
-        raise NotImplementedError()
+        handler = self.handlers.get(message.get("id"))
+        if handler is None:
+            return False
+        handled = handler(message)
+        return handled if inspect.isawaitable(handled) else True
 
 
 class OrderBook(Channel):
     channel = "v4_orderbook"
 
-    def subscribe(self, id, batched=True) -> Self:
-        return super().subscribe(id=id, batched=batched)
+    def subscribe(self, id, batched=True, handler: Optional[Handler] = None) -> Self:
+        return super().subscribe(handler, id=id, batched=batched)
 
     def unsubscribe(self, id):
         return super().unsubscribe(id=id)
@@ -49,8 +157,8 @@ class OrderBook(Channel):
 class Trades(Channel):
     channel = "v4_trades"
 
-    def subscribe(self, id, batched=True) -> Self:
-        return super().subscribe(id=id, batched=batched)
+    def subscribe(self, id, batched=True, handler: Optional[Handler] = None) -> Self:
+        return super().subscribe(handler, id=id, batched=batched)
 
     def unsubscribe(self, id):
         return super().unsubscribe(id=id)
@@ -59,8 +167,8 @@ class Trades(Channel):
 class Markets(Channel):
     channel = "v4_markets"
 
-    def subscribe(self, batched=True) -> Self:
-        return super().subscribe(batched=batched)
+    def subscribe(self, batched=True, handler: Optional[Handler] = None) -> Self:
+        return super().subscribe(handler, batched=batched)
 
     def unsubscribe(self):
         return super().unsubscribe()
@@ -69,8 +177,16 @@ class Markets(Channel):
 class Candles(Channel):
     channel = "v4_candles"
 
-    def subscribe(self, id: str, resolution: CandlesResolution, batched=True) -> Self:
-        return super().subscribe(id=f"{id}/{resolution.value}", batched=batched)
+    def subscribe(
+        self,
+        id: str,
+        resolution: CandlesResolution,
+        batched=True,
+        handler: Optional[Handler] = None,
+    ) -> Self:
+        return super().subscribe(
+            handler, id=f"{id}/{resolution.value}", batched=batched
+        )
 
     def unsubscribe(self, id: str, resolution: CandlesResolution):
         return super().unsubscribe(id=f"{id}/{resolution.value}")
@@ -79,22 +195,115 @@ class Candles(Channel):
 class Subaccounts(Channel):
     channel = "v4_subaccounts"
 
-    def subscribe(self, address, subaccount_number) -> Self:
+    def subscribe(
+        self, address, subaccount_number, handler: Optional[Handler] = None
+    ) -> Self:
         subaccount_id = f"{address}/{subaccount_number}"
-        return super().subscribe(id=subaccount_id)
+        return super().subscribe(handler, id=subaccount_id)
 
     def unsubscribe(self, address, subaccount_number):
         subaccount_id = f"{address}/{subaccount_number}"
         return super().unsubscribe(id=subaccount_id)
 
 
-def as_json(on_message):
+class MessageSequence:
+    """
+    Tracks the `message_id` of the messages of a connection, numbered from 0 by
+    the indexer across all the subscriptions of the connection.
+
+    A number other than the next one reveals a lost or reordered message. As the
+    number does not tell which subscription missed it, the subscriptions of the
+    `stateful` channels, maintained from a snapshot and updates, are renewed for
+    new snapshots. `gaps` counts the gaps, and `resyncs` the renewed subscriptions.
+    `pending` holds the renewed subscriptions whose snapshot has yet to arrive.
+
+    Args:
+        channels (List[Channel]): The channels of the socket.
+        stateful (Collection[str]): The channels to resubscribe to after a gap.
+    """
+
+    def __init__(
+        self,
+        channels: List[Channel],
+        stateful: Collection[str] = (OrderBook.channel, Subaccounts.channel),
+    ):
+        self.channels = [channel for channel in channels if channel.channel in stateful]
+        self.next_id: Optional[int] = None
+        self.gaps = 0
+        self.resyncs = 0
+        self.pending: Set[Tuple[str, Optional[str]]] = set()
+
+    def check(self, message: dict) -> List[Tuple[Channel, Optional[str]]]:
+        """
+        Checks the number of a message.
+
+        Returns:
+            List[Tuple[Channel, Optional[str]]]: The channels and ids to resubscribe
+                to, after a gap.
+        """
+        kind = message.get("type")
+        if kind == "connected":
+            self.pending.clear()
+        elif kind == "subscribed":
+            self.pending.discard((message.get("channel"), message.get("id")))
+        elif kind == "unsubscribed":
+            self.discard_unsubscribed(message.get("channel"), message.get("id"))
+        message_id = message.get("message_id")
+        if message_id is None:
+            return []
+        expected, self.next_id = self.next_id, message_id + 1
+        if kind == "connected" or expected in (None, message_id):
+            return []
+        self.gaps += 1
+        renewed = [
+            (channel, id)
+            for channel in self.channels
+            for id in channel.subscriptions
+            if (channel.channel, id) not in self.pending
+        ]
+        self.pending.update((channel.channel, id) for channel, id in renewed)
+        self.resyncs += len(renewed)
+        return renewed
+
+    def discard_unsubscribed(self, name: Optional[str], id: Optional[str]):
+        # The unsubscription of a renewal is followed by its snapshot, so only a
+        # dropped subscription is no longer pending.
+        for channel in self.channels:
+            if channel.channel == name and id not in channel.subscriptions:
+                self.pending.discard((name, id))
+
+
+def routes(channels: List[Channel]) -> Dict[str, Channel]:
+    """
+    The routing table of messages: the channels by name, each handling the
+    messages of its subscriptions by id.
+    """
+    return {channel.channel: channel for channel in channels}
+
+
+def as_json(
+    on_message,
+    sequence: Optional[MessageSequence] = None,
+    channels: Optional[Dict[str, Channel]] = None,
+):
     def wrapper(ws, message):
-        return on_message(ws, json.loads(message))
+        message = json.loads(message)
+        if sequence is not None:
+            for channel, id in sequence.check(message):
+                channel.resubscribe(id)
+        if channels:
+            channel = channels.get(message.get("channel"))
+            if channel is not None and channel.process(message):
+                return
+        if on_message is not None:
+            return on_message(ws, message)
 
     return wrapper
 
 
+RESYNCED = "resynced"
+
+
 class IndexerSocket(websocket.WebSocketApp):
     def __init__(
         self,
@@ -110,15 +319,58 @@ class IndexerSocket(websocket.WebSocketApp):
         self.markets = Markets(self)
         self.candles = Candles(self)
         self.subaccounts = Subaccounts(self)
+        self.user_on_reconnect = kwargs.pop("on_reconnect", None)
+        self.sequence = MessageSequence(self.channels)
+        self.routes = routes(self.channels)
 
         super().__init__(
             url=url,
             header=header,
             on_open=on_open,
-            on_message=as_json(on_message),
+            on_message=as_json(on_message, self.sequence, self.routes),
+            on_reconnect=IndexerSocket.resync,
             *args,
             **kwargs,
         )
 
-    async def connect(self, sslopt={"cert_reqs": ssl.CERT_NONE}) -> None:
-        self.run_forever(sslopt=sslopt)
+    @property
+    def channels(self) -> List[Channel]:
+        return [
+            self.order_book,
+            self.trades,
+            self.markets,
+            self.candles,
+            self.subaccounts,
+        ]
+
+    def resync(self):
+        """
+        Replays the active subscriptions after reconnecting, then passes a
+        `{"type": "resynced"}` message to `on_message`: the subscriptions send new
+        snapshots, from which the state should be rebuilt.
+        """
+        messages = [
+            message
+            for channel in self.channels
+            for message in channel.subscribe_messages()
+        ]
+        for message in messages:
+            self.send(message)
+        self._callback(self.user_on_reconnect)
+        self._callback(
+            self.on_message,
+            json.dumps({"type": RESYNCED, "subscriptions": len(messages)}),
+        )
+
+    async def connect(
+        self, sslopt={"cert_reqs": ssl.CERT_NONE}, reconnect: Optional[int] = None
+    ) -> None:
+        """
+        Runs the socket until it is closed.
+
+        Args:
+            sslopt (dict): The TLS options.
+            reconnect (Optional[int]): If provided, the socket reconnects after this
+                many seconds when the connection drops, and resyncs.
+        """
+        self.run_forever(sslopt=sslopt, reconnect=reconnect)
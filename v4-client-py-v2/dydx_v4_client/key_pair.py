@@ -3,14 +3,18 @@ This module implements ECDSA (Elliptic Curve Digital Signature Algorithm) key pa
 """
 
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Tuple
 
-from bip_utils import Bip39SeedGenerator, Bip44, Bip44Coins
 from coincurve import PrivateKey
 from coincurve.utils import GROUP_ORDER_INT, int_to_bytes
 
 
 def bytes_from_mnemonic(mnemonic: str) -> bytes:
+    # bip_utils takes longer to import than the rest of the client, and is only
+    # needed to derive keys from mnemonics.
+    from bip_utils import Bip39SeedGenerator, Bip44, Bip44Coins
+
     seed = Bip39SeedGenerator(mnemonic).Generate()
     return (
         Bip44.FromSeed(seed, Bip44Coins.COSMOS)
@@ -50,10 +54,10 @@ class KeyPair:
         signature = self.key.sign_recoverable(message)
         return coinsign_canonize(signature)
 
-    @property
+    @cached_property
     def public_key_bytes(self) -> bytes:
         """
-        Returns the public key bytes of the key pair in compressed format.
+        Returns the public key bytes of the key pair in compressed format. Derived once and cached.
         """
         return self.key.public_key.format(compressed=True)
 
@@ -67,7 +71,15 @@ def coinsign_extract(signature: bytes) -> Tuple[int, int]:
     return r, s
 
 
+HALF_GROUP_ORDER_BYTES = int_to_bytes(GROUP_ORDER_INT // 2).rjust(32, b"\x00")
+
+
 def coinsign_canonize(signature: bytes) -> bytes:
+    # libsecp256k1 already produces low-S signatures, which need no conversion.
+    # Equal-length big-endian byte strings compare like the integers they encode.
+    if len(signature) == 65 and signature[32:64] <= HALF_GROUP_ORDER_BYTES:
+        return signature[:64]
+
     r, s = coinsign_extract(signature)
 
     if s > GROUP_ORDER_INT // 2:
@@ -0,0 +1,49 @@
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Dict
+
+_lock = threading.Lock()
+_lazy_modules: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule(ModuleType):
+    """
+    A module imported on first access to one of its attributes.
+
+    Unlike `importlib.util.LazyLoader`, which is not thread-safe before Python
+    3.12, the first access imports the module under a lock, so threads reading
+    attributes concurrently all see the loaded module. The attributes are then
+    copied over, and later reads do not go through the lock.
+    """
+
+    def __getattr__(self, attribute: str):
+        with _lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Imports a module on first attribute access instead of immediately.
+
+    Used for the protobuf modules of rarely used queries, whose descriptors take
+    a noticeable share of the start-up time to build.
+
+    Args:
+        name (str): The absolute module name.
+
+    Returns:
+        ModuleType: The module if already imported, or a `LazyModule` loading it
+            when one of its attributes is first read.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        lazy = _lazy_modules.get(name)
+        if lazy is None:
+            lazy = _lazy_modules[name] = LazyModule(name)
+    return lazy
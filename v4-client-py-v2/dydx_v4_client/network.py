@@ -1,23 +1,34 @@
 import logging
 from dataclasses import dataclass
 from functools import partial
+from typing import TYPE_CHECKING, Sequence, Union
 
 import grpc
 from grpc import insecure_channel
 
+if TYPE_CHECKING:
+    from dydx_v4_client.node.pool import NodePool
+
 logger = logging.getLogger(__name__)
 
 secure_channel = partial(
     grpc.secure_channel, credentials=grpc.ssl_channel_credentials()
 )
 
+# `grpc.aio` channels are bound to the event loop they are created in,
+# so configs using them have to be made from within a running loop.
+secure_aio_channel = partial(
+    grpc.aio.secure_channel, credentials=grpc.ssl_channel_credentials()
+)
+insecure_aio_channel = grpc.aio.insecure_channel
+
 
 @dataclass
 class NodeConfig:
     chain_id: str
     chaintoken_denom: str
     usdc_denom: str
-    channel: grpc.Channel
+    channel: Union[grpc.Channel, grpc.aio.Channel, "NodePool"]
 
 
 @dataclass
@@ -27,24 +38,59 @@ class Network:
     node: NodeConfig
 
 
-def make_config(
-    make_channel, make_node, rest_indexer: str, websocket_indexer: str, node_url: str
-):
+def strip_scheme(node_url: str) -> str:
     if node_url.startswith("http://") or node_url.startswith("https://"):
         logger.warning(
             "Node URL should not contain http(s)://. Stripping the prefix. In the future, consider providing the URL without the http(s) prefix."
         )
         node_url = node_url.split("://", 1)[1]
+    return node_url
+
+
+def make_config(
+    make_channel,
+    make_node,
+    rest_indexer: str,
+    websocket_indexer: str,
+    node_url: Union[str, Sequence[str]],
+    **pool_options,
+):
+    """
+    Creates a network configuration.
+
+    Args:
+        make_channel: Creates the gRPC channel to a node URL.
+        make_node: Creates the `NodeConfig` from the channel.
+        rest_indexer (str): The indexer REST URL.
+        websocket_indexer (str): The indexer websocket URL.
+        node_url (Union[str, Sequence[str]]): The node URL, or several node URLs to
+            spread the requests over with a `NodePool`.
+        **pool_options: Options of the `NodePool`, when several URLs are given.
+
+    Returns:
+        Network: The network configuration.
+    """
+    if isinstance(node_url, str):
+        channel = make_channel(strip_scheme(node_url))
+    else:
+        from dydx_v4_client.node.pool import NodeEndpoint, NodePool
+
+        endpoints = [
+            NodeEndpoint(url, make_channel(url)) for url in map(strip_scheme, node_url)
+        ]
+        channel = NodePool(endpoints, **pool_options)
 
     return Network(
         rest_indexer,
         websocket_indexer,
-        make_node(channel=make_channel(node_url)),
+        make_node(channel=channel),
     )
 
 
 make_secure = partial(make_config, secure_channel)
 make_insecure = partial(make_config, insecure_channel)
+make_secure_aio = partial(make_config, secure_aio_channel)
+make_insecure_aio = partial(make_config, insecure_aio_channel)
 
 mainnet_node = partial(
     NodeConfig,
@@ -53,6 +99,7 @@ mainnet_node = partial(
     usdc_denom="ibc/8E27BA2D5493AF5636760E354E46004562C46AB7EC0CC4C1CA14E9E20E2545B5",
 )
 make_mainnet = partial(make_secure, mainnet_node)
+make_mainnet_aio = partial(make_secure_aio, mainnet_node)
 
 
 testnet_node = partial(
@@ -68,7 +115,13 @@ make_testnet = partial(
     websocket_indexer="wss://indexer.v4testnet.dydx.exchange/v4/ws",
     node_url="test-dydx-grpc.kingnodes.com",
 )
-TESTNET = make_testnet()
+make_testnet_aio = partial(
+    make_secure_aio,
+    testnet_node,
+    rest_indexer="https://indexer.v4testnet.dydx.exchange",
+    websocket_indexer="wss://indexer.v4testnet.dydx.exchange/v4/ws",
+    node_url="test-dydx-grpc.kingnodes.com",
+)
 TESTNET_FAUCET = "https://faucet.v4testnet.dydx.exchange"
 TESTNET_NOBLE = "https://rpc.testnet.noble.strange.love"
 
@@ -85,4 +138,24 @@ make_local = partial(
     websocket_indexer="ws://localhost:3003",
     node_url="http://localhost:9090",
 )
-LOCAL = make_local()
+make_local_aio = partial(
+    make_insecure_aio,
+    local_node,
+    rest_indexer="http://localhost:3002",
+    websocket_indexer="ws://localhost:3003",
+    node_url="http://localhost:9090",
+)
+
+# Presets built on first access, so importing the module opens no channels.
+PRESETS = {
+    "TESTNET": make_testnet,
+    "LOCAL": make_local,
+}
+
+
+def __getattr__(name: str) -> Network:
+    make_preset = PRESETS.get(name)
+    if make_preset is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    preset = globals()[name] = make_preset()
+    return preset
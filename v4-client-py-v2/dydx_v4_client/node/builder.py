@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import google
 from google.protobuf.message import Message
@@ -15,6 +17,7 @@ from v4_proto.cosmos.tx.v1beta1.tx_pb2 import (
     TxBody,
 )
 
+from dydx_v4_client.key_pair import KeyPair
 from dydx_v4_client.node.fee import calculate_fee, Denom
 from dydx_v4_client.wallet import Wallet
 from v4_proto.dydxprotocol.accountplus.tx_pb2 import TxExtension
@@ -45,16 +48,133 @@ def get_signature(key_pair, body, auth_info, account_number, chain_id):
     return key_pair.sign(signdoc.SerializeToString())
 
 
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def encode_bytes_field(number: int, value: bytes) -> bytes:
+    """
+    Encodes a length-delimited protobuf field, omitted when empty as in proto3.
+    """
+    if not value:
+        return b""
+    return encode_varint(number << 3 | 2) + encode_varint(len(value)) + value
+
+
+def encode_varint_field(number: int, value: int) -> bytes:
+    """
+    Encodes a varint protobuf field, omitted when zero as in proto3.
+    """
+    if not value:
+        return b""
+    return encode_varint(number << 3) + encode_varint(value)
+
+
+@dataclass
+class SigningContext:
+    """
+    Precomputed parts of the transactions signed by one account.
+
+    The packed public key, sign mode, chain ID and account number are encoded once,
+    so signing a transaction only encodes its sequence, fee and body around them.
+    The produced bytes are the canonical protobuf encodings of `AuthInfo`,
+    `SignDoc` and `Tx`.
+    """
+
+    key_pair: KeyPair
+    signer_info_prefix: bytes
+    sign_doc_suffix: bytes
+
+    @staticmethod
+    def create(
+        key_pair: KeyPair, public_key: Message, chain_id: str, account_number: int
+    ) -> "SigningContext":
+        signer_info = SignerInfo(
+            public_key=as_any(public_key),
+            mode_info=ModeInfo(single=ModeInfo.Single(mode=SignMode.SIGN_MODE_DIRECT)),
+        )
+        sign_doc = SignDoc(chain_id=chain_id, account_number=account_number)
+        return SigningContext(
+            key_pair, signer_info.SerializeToString(), sign_doc.SerializeToString()
+        )
+
+    def auth_info_bytes(self, sequence: int, fee_bytes: Optional[bytes]) -> bytes:
+        signer_info = self.signer_info_prefix + encode_varint_field(3, sequence)
+        auth_info = encode_bytes_field(1, signer_info)
+        if fee_bytes is not None:
+            # Unlike bytes, a set but empty message field is still encoded.
+            auth_info += encode_varint(2 << 3 | 2) + encode_varint(len(fee_bytes))
+            auth_info += fee_bytes
+        return auth_info
+
+    def sign(self, body_bytes: bytes, auth_info_bytes: bytes) -> bytes:
+        sign_doc = (
+            encode_bytes_field(1, body_bytes)
+            + encode_bytes_field(2, auth_info_bytes)
+            + self.sign_doc_suffix
+        )
+        return self.key_pair.sign(sign_doc)
+
+    def encode(
+        self, body_bytes: bytes, sequence: int, fee_bytes: Optional[bytes]
+    ) -> bytes:
+        """
+        Signs the serialized body and fee, returning the serialized transaction.
+        """
+        auth_info_bytes = self.auth_info_bytes(sequence, fee_bytes)
+        signature = self.sign(body_bytes, auth_info_bytes)
+        return (
+            encode_bytes_field(1, body_bytes)
+            + encode_bytes_field(2, auth_info_bytes)
+            + encode_bytes_field(3, signature)
+        )
+
+    def build(self, body: TxBody, sequence: int, fee: Optional[Fee]) -> Tx:
+        fee_bytes = None if fee is None else fee.SerializeToString()
+        return Tx.FromString(self.encode(body.SerializeToString(), sequence, fee_bytes))
+
+
 DEFAULT_FEE = Fee(
     amount=[],
     gas_limit=1000000,
 )
 
 
+# Wallet, messages and sequence of a transaction built by `Builder.build_many`.
+BulkTransaction = Tuple[Wallet, List[Message], int]
+
+DEFAULT_BULK_CHUNK_SIZE = 64
+
+
+def build_chunk(
+    fee_bytes: bytes, chunk: List[Tuple[SigningContext, bytes, int]]
+) -> List[bytes]:
+    """
+    Signs a chunk of transactions, possibly in another thread.
+
+    Args:
+        fee_bytes: The serialized fee of every transaction.
+        chunk: The signing context, serialized body and sequence of each
+            transaction.
+
+    Returns:
+        The serialized transactions, in order.
+    """
+    return [
+        context.encode(body_bytes, sequence, fee_bytes)
+        for context, body_bytes, sequence in chunk
+    ]
+
+
 @dataclass
 class TxOptions:
     authenticators: List[int]
-    sequence: int
+    sequence: Optional[int]
     account_number: int
 
 
@@ -63,6 +183,45 @@ class Builder:
     chain_id: str
     denomination: str
     memo: str = "Client Example"
+    _signing_contexts: Dict[Tuple[bytes, int], SigningContext] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _executor: Optional[Executor] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def executor(self) -> Executor:
+        """
+        Retrieves the thread pool signing the transactions of `build_many`,
+        starting it on first use. It lives until `close`.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(thread_name_prefix="dydx-signing")
+        return self._executor
+
+    def close(self):
+        """
+        Shuts the thread pool of `build_many` down, if started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def signing_context(
+        self, wallet: Wallet, account_number: Optional[int] = None
+    ) -> SigningContext:
+        """
+        Retrieves the signing context of the wallet, creating it on first use.
+        """
+        if account_number is None:
+            account_number = wallet.account_number
+        key = (wallet.key.public_key_bytes, account_number)
+        context = self._signing_contexts.get(key)
+        if context is None or context.key_pair is not wallet.key:
+            context = self._signing_contexts[key] = SigningContext.create(
+                wallet.key, wallet.public_key, self.chain_id, account_number
+            )
+        return context
 
     def calculate_fee(self, gas_used) -> Fee:
         gas_limit, amount = calculate_fee(gas_used, Denom(self.denomination))
@@ -83,7 +242,10 @@ class Builder:
         messages: List[Message],
         fee: Fee,
         tx_options: Optional[TxOptions] = None,
+        sequence: Optional[int] = None,
     ) -> Tx:
+        if sequence is None:
+            sequence = wallet.sequence
         non_critical_extension_options = []
         if tx_options is not None:
             tx_extension = TxExtension(
@@ -95,24 +257,82 @@ class Builder:
             memo=self.memo,
             non_critical_extension_options=non_critical_extension_options,
         )
-        auth_info = AuthInfo(
-            signer_infos=[
-                get_signer_info(
-                    wallet.public_key,
-                    tx_options.sequence if tx_options else wallet.sequence,
-                )
-            ],
-            fee=fee,
-        )
-        signature = get_signature(
-            wallet.key,
-            body,
-            auth_info,
-            tx_options.account_number if tx_options else wallet.account_number,
-            self.chain_id,
-        )
+        if tx_options:
+            context = self.signing_context(wallet, tx_options.account_number)
+            sequence = tx_options.sequence
+        else:
+            context = self.signing_context(wallet)
+
+        return context.build(body, sequence, fee)
 
-        return Tx(body=body, auth_info=auth_info, signatures=[signature])
+    def build_many(
+        self,
+        transactions: Iterable[BulkTransaction],
+        fee: Fee = DEFAULT_FEE,
+        executor: Optional[Executor] = None,
+        chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+        tx_options: Optional[TxOptions] = None,
+    ) -> List[bytes]:
+        """
+        Builds and signs many transactions in parallel.
+
+        The bodies are serialized here, then split into chunks that are signed by
+        the threads of the executor. libsecp256k1 is called through cffi, which
+        releases the GIL, so the signatures (most of the work) are computed in
+        parallel. The private keys stay in this process: unlike a process pool,
+        the workers share the signing contexts of the builder, so no key is
+        pickled or copied to another process.
+
+        Args:
+            transactions: The wallet, messages (not packed into `Any`) and sequence
+                of each transaction.
+            fee: The fee of every transaction.
+            executor: The executor running the chunks, which must share this
+                process' memory (a thread pool). Defaults to the thread pool of
+                the builder (see `executor`), started once and reused by later
+                calls.
+            chunk_size: The number of transactions built per task.
+            tx_options: The authenticators and account number of every
+                transaction. Each transaction keeps its own sequence, so
+                `tx_options.sequence` must be left out (None).
+
+        Returns:
+            The serialized transactions, ready to be broadcast, in the given order.
+
+        Raises:
+            ValueError: If `tx_options` sets a sequence.
+        """
+        extension_options = []
+        account_number = None
+        if tx_options is not None:
+            if tx_options.sequence is not None:
+                raise ValueError(
+                    "build_many signs each transaction with its own sequence, "
+                    "tx_options.sequence must be None"
+                )
+            extension_options.append(
+                as_any(TxExtension(selected_authenticators=tx_options.authenticators))
+            )
+            account_number = tx_options.account_number
+        items = [
+            (
+                self.signing_context(wallet, account_number),
+                TxBody(
+                    messages=[as_any(message) for message in messages],
+                    memo=self.memo,
+                    non_critical_extension_options=extension_options,
+                ).SerializeToString(),
+                sequence,
+            )
+            for wallet, messages, sequence in transactions
+        ]
+        chunks = [
+            items[start : start + chunk_size]
+            for start in range(0, len(items), chunk_size)
+        ]
+        build = partial(build_chunk, fee.SerializeToString())
+        results = (executor or self.executor()).map(build, chunks)
+        return [transaction for result in results for transaction in result]
 
     def build(
         self,
@@ -120,5 +340,8 @@ class Builder:
         message: Message,
         fee: Fee = DEFAULT_FEE,
         tx_options: Optional[dict] = None,
+        sequence: Optional[int] = None,
     ) -> Tx:
-        return self.build_transaction(wallet, [as_any(message)], fee, tx_options)
+        return self.build_transaction(
+            wallet, [as_any(message)], fee, tx_options, sequence
+        )
@@ -1,14 +1,16 @@
+from __future__ import annotations
+
 import asyncio
-import base64
-import json
+import inspect
+import logging
 import random
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Tuple
 
 import grpc
 from google._upb._message import Message
-from google.protobuf.json_format import MessageToDict
 from typing_extensions import List, Optional, Self
 
 from dydx_v4_client import MAX_CLIENT_ID, OrderFlags
@@ -25,20 +27,10 @@ from dydx_v4_client.utility import convert_quantum_bytes_to_value_with_order_sid
 from v4_proto.cosmos.auth.v1beta1 import query_pb2_grpc as auth
 from v4_proto.cosmos.auth.v1beta1.auth_pb2 import BaseAccount
 from v4_proto.cosmos.auth.v1beta1.query_pb2 import QueryAccountRequest
-from v4_proto.cosmos.bank.v1beta1 import query_pb2 as bank_query
-from v4_proto.cosmos.bank.v1beta1 import query_pb2_grpc as bank_query_grpc
 from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
 from v4_proto.cosmos.base.tendermint.v1beta1 import (
     query_pb2_grpc as tendermint_query_grpc,
 )
-from v4_proto.cosmos.base.query.v1beta1 import pagination_pb2 as pagination_query
-from v4_proto.cosmos.staking.v1beta1 import query_pb2 as staking_query
-from v4_proto.cosmos.staking.v1beta1 import query_pb2_grpc as staking_query_grpc
-from v4_proto.cosmos.distribution.v1beta1 import query_pb2 as distribution_query
-from v4_proto.cosmos.distribution.v1beta1 import (
-    query_pb2_grpc as distribution_query_grpc,
-    tx_pb2,
-)
 from v4_proto.cosmos.tx.v1beta1 import service_pb2_grpc
 from v4_proto.cosmos.tx.v1beta1.service_pb2 import (
     BroadcastMode,
@@ -46,72 +38,77 @@ from v4_proto.cosmos.tx.v1beta1.service_pb2 import (
     SimulateRequest,
     GetTxRequest,
 )
-from v4_proto.cosmos.gov.v1 import query_pb2 as gov_query
-from v4_proto.cosmos.gov.v1 import query_pb2_grpc as gov_query_grpc
 from v4_proto.cosmos.tx.v1beta1.tx_pb2 import Tx
-from v4_proto.dydxprotocol.accountplus import query_pb2 as accountplus_query
-from v4_proto.dydxprotocol.accountplus import query_pb2_grpc as accountplus_query_grpc
-from v4_proto.dydxprotocol.bridge import query_pb2 as bridge_query
-from v4_proto.dydxprotocol.bridge import query_pb2_grpc as bridge_query_grpc
 from v4_proto.dydxprotocol.clob import clob_pair_pb2 as clob_pair_type
-from v4_proto.dydxprotocol.clob import (
-    equity_tier_limit_config_pb2 as equity_tier_limit_config_type,
-)
-from v4_proto.dydxprotocol.clob import query_pb2 as clob_query
-from v4_proto.dydxprotocol.clob import query_pb2_grpc as clob_query_grpc
 from v4_proto.dydxprotocol.clob.order_pb2 import Order, OrderId
-from v4_proto.dydxprotocol.clob.query_pb2 import (
-    QueryAllClobPairRequest,
-    QueryClobPairAllResponse,
-    QueryLeverageRequest,
-    QueryLeverageResponse,
-)
-from v4_proto.dydxprotocol.feetiers import query_pb2 as fee_tier_query
-from v4_proto.dydxprotocol.feetiers import query_pb2_grpc as fee_tier_query_grpc
-from v4_proto.dydxprotocol.perpetuals import query_pb2_grpc as perpetuals_query_grpc
-from v4_proto.dydxprotocol.perpetuals.query_pb2 import (
-    QueryAllPerpetualsRequest,
-    QueryAllPerpetualsResponse,
-    QueryPerpetualRequest,
-    QueryPerpetualResponse,
+from v4_proto.dydxprotocol.clob.tx_pb2 import (
+    MsgBatchCancel,
+    MsgCancelOrder,
+    MsgPlaceOrder,
+    OrderBatch,
 )
-from v4_proto.dydxprotocol.prices import market_price_pb2 as market_price_type
-from v4_proto.dydxprotocol.prices import query_pb2_grpc as prices_query_grpc
-from v4_proto.dydxprotocol.prices.query_pb2 import (
-    QueryAllMarketPricesRequest,
-    QueryAllMarketPricesResponse,
-    QueryMarketPriceRequest,
-)
-from v4_proto.dydxprotocol.revshare.revshare_pb2 import OrderRouterRevShare
-from v4_proto.dydxprotocol.rewards import query_pb2 as rewards_query
-from v4_proto.dydxprotocol.rewards import query_pb2_grpc as rewards_query_grpc
-from v4_proto.dydxprotocol.stats import query_pb2 as stats_query
-from v4_proto.dydxprotocol.stats import query_pb2_grpc as stats_query_grpc
-from v4_proto.dydxprotocol.subaccounts import query_pb2 as subaccount_query
-from v4_proto.dydxprotocol.subaccounts import query_pb2_grpc as subaccounts_query_grpc
 from v4_proto.dydxprotocol.subaccounts import subaccount_pb2 as subaccount_type
-from v4_proto.dydxprotocol.subaccounts.query_pb2 import (
-    QueryAllSubaccountRequest,
-    QueryGetSubaccountRequest,
-    QuerySubaccountAllResponse,
-)
 from v4_proto.dydxprotocol.subaccounts.subaccount_pb2 import SubaccountId
-from v4_proto.dydxprotocol.clob.tx_pb2 import OrderBatch
-from v4_proto.dydxprotocol.ratelimit import query_pb2 as rate_query
-from v4_proto.dydxprotocol.ratelimit import query_pb2_grpc as rate_query_grpc
-from v4_proto.dydxprotocol.affiliates import query_pb2 as affiliate_query
-from v4_proto.dydxprotocol.affiliates import query_pb2_grpc as affiliate_query_grpc
-from v4_proto.dydxprotocol.revshare import query_pb2_grpc as revshare_query_grpc
-from v4_proto.dydxprotocol.revshare import query_pb2 as revshare_query
-from v4_proto.dydxprotocol.revshare import tx_pb2_grpc as revshare_tx_grpc
-from v4_proto.dydxprotocol.revshare import tx_pb2 as revshare_tx_query
-from v4_proto.dydxprotocol.revshare import params_pb2 as revshare_param
-from v4_proto.dydxprotocol.revshare import revshare_pb2
+
+from dydx_v4_client.lazy import lazy_import
+
+# Modules of the queries outside of order placement, loaded on first use.
+bank_query = lazy_import("v4_proto.cosmos.bank.v1beta1.query_pb2")
+bank_query_grpc = lazy_import("v4_proto.cosmos.bank.v1beta1.query_pb2_grpc")
+pagination_query = lazy_import("v4_proto.cosmos.base.query.v1beta1.pagination_pb2")
+staking_query = lazy_import("v4_proto.cosmos.staking.v1beta1.query_pb2")
+staking_query_grpc = lazy_import("v4_proto.cosmos.staking.v1beta1.query_pb2_grpc")
+distribution_query = lazy_import("v4_proto.cosmos.distribution.v1beta1.query_pb2")
+distribution_query_grpc = lazy_import(
+    "v4_proto.cosmos.distribution.v1beta1.query_pb2_grpc"
+)
+gov_query = lazy_import("v4_proto.cosmos.gov.v1.query_pb2")
+gov_query_grpc = lazy_import("v4_proto.cosmos.gov.v1.query_pb2_grpc")
+accountplus_query = lazy_import("v4_proto.dydxprotocol.accountplus.query_pb2")
+accountplus_query_grpc = lazy_import("v4_proto.dydxprotocol.accountplus.query_pb2_grpc")
+bridge_query = lazy_import("v4_proto.dydxprotocol.bridge.query_pb2")
+bridge_query_grpc = lazy_import("v4_proto.dydxprotocol.bridge.query_pb2_grpc")
+equity_tier_limit_config_type = lazy_import(
+    "v4_proto.dydxprotocol.clob.equity_tier_limit_config_pb2"
+)
+clob_query = lazy_import("v4_proto.dydxprotocol.clob.query_pb2")
+clob_query_grpc = lazy_import("v4_proto.dydxprotocol.clob.query_pb2_grpc")
+fee_tier_query = lazy_import("v4_proto.dydxprotocol.feetiers.query_pb2")
+fee_tier_query_grpc = lazy_import("v4_proto.dydxprotocol.feetiers.query_pb2_grpc")
+perpetuals_query = lazy_import("v4_proto.dydxprotocol.perpetuals.query_pb2")
+perpetuals_query_grpc = lazy_import("v4_proto.dydxprotocol.perpetuals.query_pb2_grpc")
+market_price_type = lazy_import("v4_proto.dydxprotocol.prices.market_price_pb2")
+prices_query = lazy_import("v4_proto.dydxprotocol.prices.query_pb2")
+prices_query_grpc = lazy_import("v4_proto.dydxprotocol.prices.query_pb2_grpc")
+rewards_query = lazy_import("v4_proto.dydxprotocol.rewards.query_pb2")
+rewards_query_grpc = lazy_import("v4_proto.dydxprotocol.rewards.query_pb2_grpc")
+stats_query = lazy_import("v4_proto.dydxprotocol.stats.query_pb2")
+stats_query_grpc = lazy_import("v4_proto.dydxprotocol.stats.query_pb2_grpc")
+subaccount_query = lazy_import("v4_proto.dydxprotocol.subaccounts.query_pb2")
+subaccounts_query_grpc = lazy_import("v4_proto.dydxprotocol.subaccounts.query_pb2_grpc")
+rate_query = lazy_import("v4_proto.dydxprotocol.ratelimit.query_pb2")
+rate_query_grpc = lazy_import("v4_proto.dydxprotocol.ratelimit.query_pb2_grpc")
+affiliate_query = lazy_import("v4_proto.dydxprotocol.affiliates.query_pb2")
+affiliate_query_grpc = lazy_import("v4_proto.dydxprotocol.affiliates.query_pb2_grpc")
+revshare_query = lazy_import("v4_proto.dydxprotocol.revshare.query_pb2")
+revshare_query_grpc = lazy_import("v4_proto.dydxprotocol.revshare.query_pb2_grpc")
+revshare_tx_query = lazy_import("v4_proto.dydxprotocol.revshare.tx_pb2")
+revshare_tx_grpc = lazy_import("v4_proto.dydxprotocol.revshare.tx_pb2_grpc")
+revshare_param = lazy_import("v4_proto.dydxprotocol.revshare.params_pb2")
+revshare_pb2 = lazy_import("v4_proto.dydxprotocol.revshare.revshare_pb2")
 
 from dydx_v4_client.network import NodeConfig
 from dydx_v4_client.node.authenticators import Authenticator, validate_authenticator
 from dydx_v4_client.node.builder import Builder, TxOptions
+from dydx_v4_client.node.confirmation import (
+    ConfirmationTracker,
+    TxConfirmation,
+    tx_hash,
+)
 from dydx_v4_client.node.fee import Coin, Fee, calculate_fee, Denom
+from dydx_v4_client.node.gas import GasEstimateCache
+from dydx_v4_client.node.pool import NodePool
+from dydx_v4_client.node.transcode import message_to_dict
 from dydx_v4_client.node.message import (
     cancel_order,
     deposit,
@@ -131,51 +128,70 @@ from dydx_v4_client.node.message import (
 )
 from dydx_v4_client.wallet import Wallet
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_QUERY_TIMEOUT_SECS = 15
-DEFAULT_QUERY_INTERVAL_SECS = 2
 GOOD_TIL_BLOCK_OFFSET = 20
+ACCOUNT_SEQUENCE_MISMATCH_CODESPACE = "sdk"
+ACCOUNT_SEQUENCE_MISMATCH_CODE = 32
+OUT_OF_GAS_CODESPACE = "sdk"
+OUT_OF_GAS_CODE = 11
+ACCOUNT_SEQUENCE_MISMATCH_PATTERN = re.compile(r"expected (\d+), got \d+")
 
 
-class CustomJSONDecoder:
-    def __init__(self):
-        self.decoder = json.JSONDecoder(object_hook=self.decode_dict)
-
-    def decode(self, json_string):
-        return self.decoder.decode(json_string)
+async def resolve(response):
+    """
+    Resolves the result of a stub call.
 
-    @staticmethod
-    def decode_base64(value):
-        if isinstance(value, str):
-            try:
-                return list(base64.b64decode(value))
-            except (base64.binascii.Error, ValueError):
-                return value
-        return value
-
-    def decode_dict(self, data):
-        if isinstance(data, dict):
-            return {k: self.decode_base64(v) for k, v in data.items()}
-        return data
+    Stubs bound to a `grpc.aio` channel return awaitable calls, which are awaited
+    without blocking the event loop. Results of blocking stubs are returned as is.
+    """
+    if inspect.isawaitable(response):
+        return await response
+    return response
 
 
 @dataclass
 class QueryNodeClient:
-    channel: grpc.Channel
+    channel: Union[grpc.Channel, grpc.aio.Channel, NodePool]
+    _stubs: Dict[type, Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _stubs_channel: Any = field(default=None, init=False, repr=False, compare=False)
+
+    def stub(self, stub_type: type) -> Any:
+        """
+        Retrieves a stub of the given type bound to the current channel.
+
+        Stubs are created on first use and reused by subsequent calls. The cache is
+        dropped whenever the channel is replaced.
+
+        Args:
+            stub_type (type): The generated stub class, e.g. `bank_query_grpc.QueryStub`.
+
+        Returns:
+            Any: The stub bound to `self.channel`.
+        """
+        if self._stubs_channel is not self.channel:
+            self._stubs = {}
+            self._stubs_channel = self.channel
+        stub = self._stubs.get(stub_type)
+        if stub is None:
+            stub = self._stubs[stub_type] = stub_type(self.channel)
+        return stub
 
     @staticmethod
-    def transcode_response(response: Message) -> Union[Dict[str, Any], List[Any]]:
+    def transcode_response(response: Message) -> Dict[str, Any]:
         """
-        Encodes the response using the custom JSON encoder.
+        Converts the response to Python values. See `message_to_dict`.
 
         Args:
             response (Message): The response message to encode.
 
         Returns:
-            Union[Dict[str, Any], List[Any]]: The encoded response.
+            Dict[str, Any]: The encoded response.
         """
-        response_dict = MessageToDict(response)
-        json_string = json.dumps(response_dict)
-        return CustomJSONDecoder().decode(json_string)
+        return message_to_dict(response)
 
     async def get_account_balances(
         self, address: str
@@ -189,8 +205,10 @@ class QueryNodeClient:
         Returns:
             bank_query.QueryAllBalancesResponse: The response containing all account balances.
         """
-        stub = bank_query_grpc.QueryStub(self.channel)
-        return stub.AllBalances(bank_query.QueryAllBalancesRequest(address=address))
+        stub = self.stub(bank_query_grpc.QueryStub)
+        return await resolve(
+            stub.AllBalances(bank_query.QueryAllBalancesRequest(address=address))
+        )
 
     async def get_account_balance(
         self, address: str, denom: str
@@ -205,9 +223,9 @@ class QueryNodeClient:
         Returns:
             bank_query.QueryBalanceResponse: The response containing the account balance.
         """
-        stub = bank_query_grpc.QueryStub(self.channel)
-        return stub.Balance(
-            bank_query.QueryBalanceRequest(address=address, denom=denom)
+        stub = self.stub(bank_query_grpc.QueryStub)
+        return await resolve(
+            stub.Balance(bank_query.QueryBalanceRequest(address=address, denom=denom))
         )
 
     async def get_account(self, address: str) -> BaseAccount:
@@ -221,8 +239,8 @@ class QueryNodeClient:
             BaseAccount: The base account information.
         """
         account = BaseAccount()
-        response = auth.QueryStub(self.channel).Account(
-            QueryAccountRequest(address=address)
+        response = await resolve(
+            self.stub(auth.QueryStub).Account(QueryAccountRequest(address=address))
         )
         if not response.account.Unpack(account):
             raise Exception("Failed to unpack account")
@@ -235,8 +253,10 @@ class QueryNodeClient:
         Returns:
             tendermint_query.GetLatestBlockResponse: The response containing the latest block information.
         """
-        return tendermint_query_grpc.ServiceStub(self.channel).GetLatestBlock(
-            tendermint_query.GetLatestBlockRequest()
+        return await resolve(
+            self.stub(tendermint_query_grpc.ServiceStub).GetLatestBlock(
+                tendermint_query.GetLatestBlockRequest()
+            )
         )
 
     async def latest_block_height(self) -> int:
@@ -249,6 +269,24 @@ class QueryNodeClient:
         block = await self.latest_block()
         return block.block.header.height
 
+    async def get_block_by_height(
+        self, height: int
+    ) -> tendermint_query.GetBlockByHeightResponse:
+        """
+        Retrieves the block at the given height.
+
+        Args:
+            height (int): The block height.
+
+        Returns:
+            tendermint_query.GetBlockByHeightResponse: The response containing the block.
+        """
+        return await resolve(
+            self.stub(tendermint_query_grpc.ServiceStub).GetBlockByHeight(
+                tendermint_query.GetBlockByHeightRequest(height=height)
+            )
+        )
+
     async def get_user_stats(self, address: str) -> stats_query.QueryUserStatsResponse:
         """
         Retrieves the user stats for a given address.
@@ -259,8 +297,10 @@ class QueryNodeClient:
         Returns:
             stats_query.QueryUserStatsResponse: The response containing the user stats.
         """
-        stub = stats_query_grpc.QueryStub(self.channel)
-        return stub.UserStats(stats_query.QueryUserStatsRequest(user=address))
+        stub = self.stub(stats_query_grpc.QueryStub)
+        return await resolve(
+            stub.UserStats(stats_query.QueryUserStatsRequest(user=address))
+        )
 
     async def get_all_validators(
         self, status: str = ""
@@ -274,8 +314,10 @@ class QueryNodeClient:
         Returns:
             staking_query.QueryValidatorsResponse: The response containing all validators.
         """
-        stub = staking_query_grpc.QueryStub(self.channel)
-        return stub.Validators(staking_query.QueryValidatorsRequest(status=status))
+        stub = self.stub(staking_query_grpc.QueryStub)
+        return await resolve(
+            stub.Validators(staking_query.QueryValidatorsRequest(status=status))
+        )
 
     async def get_subaccount(
         self, address: str, account_number: int
@@ -290,21 +332,27 @@ class QueryNodeClient:
         Returns:
             Optional[subaccount_type.Subaccount]: The subaccount, if found.
         """
-        stub = subaccounts_query_grpc.QueryStub(self.channel)
-        response = stub.Subaccount(
-            QueryGetSubaccountRequest(owner=address, number=account_number)
+        stub = self.stub(subaccounts_query_grpc.QueryStub)
+        response = await resolve(
+            stub.Subaccount(
+                subaccount_query.QueryGetSubaccountRequest(
+                    owner=address, number=account_number
+                )
+            )
         )
         return ExtendedSubaccount(response.subaccount)
 
-    async def get_subaccounts(self) -> QuerySubaccountAllResponse:
+    async def get_subaccounts(self) -> subaccount_query.QuerySubaccountAllResponse:
         """
         Retrieves all subaccounts.
 
         Returns:
-            QuerySubaccountAllResponse: The response containing all subaccounts.
+            subaccount_query.QuerySubaccountAllResponse: The response containing all subaccounts.
         """
-        stub = subaccounts_query_grpc.QueryStub(self.channel)
-        return stub.SubaccountAll(QueryAllSubaccountRequest())
+        stub = self.stub(subaccounts_query_grpc.QueryStub)
+        return await resolve(
+            stub.SubaccountAll(subaccount_query.QueryAllSubaccountRequest())
+        )
 
     async def get_clob_pair(self, pair_id: int) -> clob_pair_type.ClobPair:
         """
@@ -316,23 +364,25 @@ class QueryNodeClient:
         Returns:
             clob_pair_type.ClobPair: The CLOB pair.
         """
-        stub = clob_query_grpc.QueryStub(self.channel)
-        response = stub.ClobPair(clob_query.QueryGetClobPairRequest(id=pair_id))
+        stub = self.stub(clob_query_grpc.QueryStub)
+        response = await resolve(
+            stub.ClobPair(clob_query.QueryGetClobPairRequest(id=pair_id))
+        )
         return response.clob_pair
 
-    async def get_clob_pairs(self) -> QueryClobPairAllResponse:
+    async def get_clob_pairs(self) -> clob_query.QueryClobPairAllResponse:
         """
         Retrieves all CLOB pairs.
 
         Returns:
-            QueryClobPairAllResponse: The response containing all CLOB pairs.
+            clob_query.QueryClobPairAllResponse: The response containing all CLOB pairs.
         """
-        stub = clob_query_grpc.QueryStub(self.channel)
-        return stub.ClobPairAll(QueryAllClobPairRequest())
+        stub = self.stub(clob_query_grpc.QueryStub)
+        return await resolve(stub.ClobPairAll(clob_query.QueryAllClobPairRequest()))
 
     async def get_leverage(
         self, address: str, subaccount_number: int
-    ) -> QueryLeverageResponse:
+    ) -> clob_query.QueryLeverageResponse:
         """
         Retrieves leverage information for a subaccount.
 
@@ -341,11 +391,13 @@ class QueryNodeClient:
             subaccount_number (int): The subaccount number.
 
         Returns:
-            QueryLeverageResponse: The response containing leverage information.
+            clob_query.QueryLeverageResponse: The response containing leverage information.
         """
-        stub = clob_query_grpc.QueryStub(self.channel)
-        return stub.Leverage(
-            QueryLeverageRequest(owner=address, number=subaccount_number)
+        stub = self.stub(clob_query_grpc.QueryStub)
+        return await resolve(
+            stub.Leverage(
+                clob_query.QueryLeverageRequest(owner=address, number=subaccount_number)
+            )
         )
 
     async def get_price(self, market_id: int) -> market_price_type.MarketPrice:
@@ -358,21 +410,27 @@ class QueryNodeClient:
         Returns:
             market_price_type.MarketPrice: The market price.
         """
-        stub = prices_query_grpc.QueryStub(self.channel)
-        response = stub.MarketPrice(QueryMarketPriceRequest(id=market_id))
+        stub = self.stub(prices_query_grpc.QueryStub)
+        response = await resolve(
+            stub.MarketPrice(prices_query.QueryMarketPriceRequest(id=market_id))
+        )
         return response.market_price
 
-    async def get_prices(self) -> QueryAllMarketPricesResponse:
+    async def get_prices(self) -> prices_query.QueryAllMarketPricesResponse:
         """
         Retrieves all market prices.
 
         Returns:
-            QueryAllMarketPricesResponse: The response containing all market prices.
+            prices_query.QueryAllMarketPricesResponse: The response containing all market prices.
         """
-        stub = prices_query_grpc.QueryStub(self.channel)
-        return stub.AllMarketPrices(QueryAllMarketPricesRequest())
+        stub = self.stub(prices_query_grpc.QueryStub)
+        return await resolve(
+            stub.AllMarketPrices(prices_query.QueryAllMarketPricesRequest())
+        )
 
-    async def get_perpetual(self, perpetual_id: int) -> QueryPerpetualResponse:
+    async def get_perpetual(
+        self, perpetual_id: int
+    ) -> perpetuals_query.QueryPerpetualResponse:
         """
         Retrieves a perpetual by its ID.
 
@@ -380,20 +438,24 @@ class QueryNodeClient:
             perpetual_id (int): The perpetual ID.
 
         Returns:
-            QueryPerpetualResponse: The response containing the perpetual.
+            perpetuals_query.QueryPerpetualResponse: The response containing the perpetual.
         """
-        stub = perpetuals_query_grpc.QueryStub(self.channel)
-        return stub.Perpetual(QueryPerpetualRequest(id=perpetual_id))
+        stub = self.stub(perpetuals_query_grpc.QueryStub)
+        return await resolve(
+            stub.Perpetual(perpetuals_query.QueryPerpetualRequest(id=perpetual_id))
+        )
 
-    async def get_perpetuals(self) -> QueryAllPerpetualsResponse:
+    async def get_perpetuals(self) -> perpetuals_query.QueryAllPerpetualsResponse:
         """
         Retrieves all perpetuals.
 
         Returns:
-            QueryAllPerpetualsResponse: The response containing all perpetuals.
+            perpetuals_query.QueryAllPerpetualsResponse: The response containing all perpetuals.
         """
-        stub = perpetuals_query_grpc.QueryStub(self.channel)
-        return stub.AllPerpetuals(QueryAllPerpetualsRequest())
+        stub = self.stub(perpetuals_query_grpc.QueryStub)
+        return await resolve(
+            stub.AllPerpetuals(perpetuals_query.QueryAllPerpetualsRequest())
+        )
 
     async def get_equity_tier_limit_config(
         self,
@@ -404,9 +466,11 @@ class QueryNodeClient:
         Returns:
             equity_tier_limit_config_type.EquityTierLimitConfiguration: The equity tier limit configuration.
         """
-        stub = clob_query_grpc.QueryStub(self.channel)
-        response = stub.EquityTierLimitConfiguration(
-            clob_query.QueryEquityTierLimitConfigurationRequest()
+        stub = self.stub(clob_query_grpc.QueryStub)
+        response = await resolve(
+            stub.EquityTierLimitConfiguration(
+                clob_query.QueryEquityTierLimitConfigurationRequest()
+            )
         )
         return response.equity_tier_limit_config
 
@@ -422,10 +486,12 @@ class QueryNodeClient:
         Returns:
             staking_query.QueryDelegatorDelegationsResponse: The response containing the delegator delegations.
         """
-        stub = staking_query_grpc.QueryStub(self.channel)
-        return stub.DelegatorDelegations(
-            staking_query.QueryDelegatorDelegationsRequest(
-                delegator_addr=delegator_addr
+        stub = self.stub(staking_query_grpc.QueryStub)
+        return await resolve(
+            stub.DelegatorDelegations(
+                staking_query.QueryDelegatorDelegationsRequest(
+                    delegator_addr=delegator_addr
+                )
             )
         )
 
@@ -441,10 +507,12 @@ class QueryNodeClient:
         Returns:
             staking_query.QueryDelegatorUnbondingDelegationsResponse: The response containing the delegator unbonding delegations.
         """
-        stub = staking_query_grpc.QueryStub(self.channel)
-        return stub.DelegatorUnbondingDelegations(
-            staking_query.QueryDelegatorUnbondingDelegationsRequest(
-                delegator_addr=delegator_addr
+        stub = self.stub(staking_query_grpc.QueryStub)
+        return await resolve(
+            stub.DelegatorUnbondingDelegations(
+                staking_query.QueryDelegatorUnbondingDelegationsRequest(
+                    delegator_addr=delegator_addr
+                )
             )
         )
 
@@ -460,9 +528,11 @@ class QueryNodeClient:
         Returns:
             bridge_query.QueryDelayedCompleteBridgeMessagesResponse: The response containing the delayed complete bridge messages.
         """
-        stub = bridge_query_grpc.QueryStub(self.channel)
-        return stub.DelayedCompleteBridgeMessages(
-            bridge_query.QueryDelayedCompleteBridgeMessagesRequest(address=address)
+        stub = self.stub(bridge_query_grpc.QueryStub)
+        return await resolve(
+            stub.DelayedCompleteBridgeMessages(
+                bridge_query.QueryDelayedCompleteBridgeMessagesRequest(address=address)
+            )
         )
 
     async def get_fee_tiers(self) -> fee_tier_query.QueryPerpetualFeeParamsResponse:
@@ -472,8 +542,10 @@ class QueryNodeClient:
         Returns:
             fee_tier_query.QueryPerpetualFeeParamsResponse: The response containing the perpetual fee parameters.
         """
-        stub = fee_tier_query_grpc.QueryStub(self.channel)
-        return stub.PerpetualFeeParams(fee_tier_query.QueryPerpetualFeeParamsRequest())
+        stub = self.stub(fee_tier_query_grpc.QueryStub)
+        return await resolve(
+            stub.PerpetualFeeParams(fee_tier_query.QueryPerpetualFeeParamsRequest())
+        )
 
     async def get_user_fee_tier(
         self, address: str
@@ -487,8 +559,10 @@ class QueryNodeClient:
         Returns:
             fee_tier_query.QueryUserFeeTierResponse: The response containing the user fee tier.
         """
-        stub = fee_tier_query_grpc.QueryStub(self.channel)
-        return stub.UserFeeTier(fee_tier_query.QueryUserFeeTierRequest(user=address))
+        stub = self.stub(fee_tier_query_grpc.QueryStub)
+        return await resolve(
+            stub.UserFeeTier(fee_tier_query.QueryUserFeeTierRequest(user=address))
+        )
 
     async def get_rewards_params(self) -> rewards_query.QueryParamsResponse:
         """
@@ -497,15 +571,17 @@ class QueryNodeClient:
         Returns:
             rewards_query.QueryParamsResponse: The response containing the rewards parameters.
         """
-        stub = rewards_query_grpc.QueryStub(self.channel)
-        return stub.Params(rewards_query.QueryParamsRequest())
+        stub = self.stub(rewards_query_grpc.QueryStub)
+        return await resolve(stub.Params(rewards_query.QueryParamsRequest()))
 
     async def get_authenticators(
         self, address: str
     ) -> accountplus_query.GetAuthenticatorsResponse:
-        stub = accountplus_query_grpc.QueryStub(self.channel)
-        return stub.GetAuthenticators(
-            accountplus_query.GetAuthenticatorsRequest(account=address)
+        stub = self.stub(accountplus_query_grpc.QueryStub)
+        return await resolve(
+            stub.GetAuthenticators(
+                accountplus_query.GetAuthenticatorsRequest(account=address)
+            )
         )
 
     async def get_node_info(self) -> tendermint_query.GetNodeInfoResponse:
@@ -515,8 +591,10 @@ class QueryNodeClient:
         Returns:
             tendermint_query.GetNodeInfoResponse: The response containing the node information.
         """
-        return tendermint_query_grpc.ServiceStub(self.channel).GetNodeInfo(
-            tendermint_query.GetNodeInfoRequest()
+        return await resolve(
+            self.stub(tendermint_query_grpc.ServiceStub).GetNodeInfo(
+                tendermint_query.GetNodeInfoRequest()
+            )
         )
 
     async def get_delegation_total_rewards(
@@ -531,9 +609,11 @@ class QueryNodeClient:
         Returns:
             distribution_query.QueryDelegationTotalRewardsResponse: All unbonding delegations from a delegator.
         """
-        return distribution_query_grpc.QueryStub(self.channel).DelegationTotalRewards(
-            distribution_query.QueryDelegationTotalRewardsRequest(
-                delegator_address=address
+        return await resolve(
+            self.stub(distribution_query_grpc.QueryStub).DelegationTotalRewards(
+                distribution_query.QueryDelegationTotalRewardsRequest(
+                    delegator_address=address
+                )
             )
         )
 
@@ -561,18 +641,20 @@ class QueryNodeClient:
             count_total (Optional[bool]): Filter to return total count or not
             reverse (Optional[bool]): Direction of the list
         """
-        return gov_query_grpc.QueryStub(self.channel).Proposals(
-            gov_query.QueryProposalsRequest(
-                proposal_status=proposal_status,
-                voter=voter,
-                depositor=depositor,
-                pagination=pagination_query.PageRequest(
-                    key=key,
-                    offset=offset,
-                    limit=limit,
-                    count_total=count_total,
-                    reverse=reverse,
-                ),
+        return await resolve(
+            self.stub(gov_query_grpc.QueryStub).Proposals(
+                gov_query.QueryProposalsRequest(
+                    proposal_status=proposal_status,
+                    voter=voter,
+                    depositor=depositor,
+                    pagination=pagination_query.PageRequest(
+                        key=key,
+                        offset=offset,
+                        limit=limit,
+                        count_total=count_total,
+                        reverse=reverse,
+                    ),
+                )
             )
         )
 
@@ -588,11 +670,13 @@ class QueryNodeClient:
         Returns:
             subaccount_query.QueryGetWithdrawalAndTransfersBlockedInfoResponse: Withdrawal and transfer gating status of the perpetual id
         """
-        return subaccounts_query_grpc.QueryStub(
-            self.channel
-        ).GetWithdrawalAndTransfersBlockedInfo(
-            subaccount_query.QueryGetWithdrawalAndTransfersBlockedInfoRequest(
-                perpetual_id=perpetual_id
+        return await resolve(
+            self.stub(
+                subaccounts_query_grpc.QueryStub
+            ).GetWithdrawalAndTransfersBlockedInfo(
+                subaccount_query.QueryGetWithdrawalAndTransfersBlockedInfoRequest(
+                    perpetual_id=perpetual_id
+                )
             )
         )
 
@@ -608,8 +692,10 @@ class QueryNodeClient:
         Returns:
             rate_query.QueryCapacityByDenomResponse: Return withdraw capacity
         """
-        return rate_query_grpc.QueryStub(self.channel).CapacityByDenom(
-            rate_query.QueryCapacityByDenomRequest(denom=denom)
+        return await resolve(
+            self.stub(rate_query_grpc.QueryStub).CapacityByDenom(
+                rate_query.QueryCapacityByDenomRequest(denom=denom)
+            )
         )
 
     async def get_affiliate_info(
@@ -624,8 +710,10 @@ class QueryNodeClient:
         Returns:
             affiliate_query.AffiliateInfoResponse: Affiliate information of the address
         """
-        return affiliate_query_grpc.QueryStub(self.channel).AffiliateInfo(
-            affiliate_query.AffiliateInfoRequest(address=address)
+        return await resolve(
+            self.stub(affiliate_query_grpc.QueryStub).AffiliateInfo(
+                affiliate_query.AffiliateInfoRequest(address=address)
+            )
         )
 
     async def get_referred_by(self, address: str) -> affiliate_query.ReferredByResponse:
@@ -638,8 +726,10 @@ class QueryNodeClient:
         Returns:
             affiliate_query.ReferredByResponse: Referred by information
         """
-        return affiliate_query_grpc.QueryStub(self.channel).ReferredBy(
-            affiliate_query.ReferredByRequest(address=address)
+        return await resolve(
+            self.stub(affiliate_query_grpc.QueryStub).ReferredBy(
+                affiliate_query.ReferredByRequest(address=address)
+            )
         )
 
     async def get_all_affiliate_tiers(
@@ -651,8 +741,10 @@ class QueryNodeClient:
         Returns:
             affiliate_query.AllAffiliateTiersResponse: All affiliate tiers
         """
-        return affiliate_query_grpc.QueryStub(self.channel).AllAffiliateTiers(
-            affiliate_query.AllAffiliateTiersRequest()
+        return await resolve(
+            self.stub(affiliate_query_grpc.QueryStub).AllAffiliateTiers(
+                affiliate_query.AllAffiliateTiersRequest()
+            )
         )
 
     async def get_affiliate_whitelist(
@@ -664,8 +756,10 @@ class QueryNodeClient:
         Returns:
             affiliate_query.AffiliateWhitelistResponse: List of whitelisted affiliate
         """
-        return affiliate_query_grpc.QueryStub(self.channel).AffiliateWhitelist(
-            affiliate_query.AffiliateWhitelistRequest()
+        return await resolve(
+            self.stub(affiliate_query_grpc.QueryStub).AffiliateWhitelist(
+                affiliate_query.AffiliateWhitelistRequest()
+            )
         )
 
     async def get_market_mapper_revenue_share_param(
@@ -677,10 +771,10 @@ class QueryNodeClient:
         Returns:
             revshare_query.QueryMarketMapperRevenueShareParamsResponse: Market mapper revenue share parameters
         """
-        return revshare_query_grpc.QueryStub(
-            self.channel
-        ).MarketMapperRevenueShareParams(
-            revshare_query.QueryMarketMapperRevenueShareParams()
+        return await resolve(
+            self.stub(revshare_query_grpc.QueryStub).MarketMapperRevenueShareParams(
+                revshare_query.QueryMarketMapperRevenueShareParams()
+            )
         )
 
     async def get_market_mapper_revenue_share_details(
@@ -695,8 +789,10 @@ class QueryNodeClient:
         Returns:
             revshare_query.QueryMarketMapperRevShareDetailsResponse: Details of market mapper revenue share
         """
-        return revshare_query_grpc.QueryStub(self.channel).MarketMapperRevShareDetails(
-            revshare_query.QueryMarketMapperRevShareDetails(market_id=market_id)
+        return await resolve(
+            self.stub(revshare_query_grpc.QueryStub).MarketMapperRevShareDetails(
+                revshare_query.QueryMarketMapperRevShareDetails(market_id=market_id)
+            )
         )
 
     async def get_unconditional_revenue_sharing_config(
@@ -708,8 +804,10 @@ class QueryNodeClient:
         Returns:
             revshare_query.QueryUnconditionalRevShareConfigResponse: The configuration of unconditional revenue sharing
         """
-        return revshare_query_grpc.QueryStub(self.channel).UnconditionalRevShareConfig(
-            revshare_query.QueryUnconditionalRevShareConfig()
+        return await resolve(
+            self.stub(revshare_query_grpc.QueryStub).UnconditionalRevShareConfig(
+                revshare_query.QueryUnconditionalRevShareConfig()
+            )
         )
 
     async def get_order_router_revenue_share(
@@ -724,46 +822,288 @@ class QueryNodeClient:
         Returns:
             revshare_query.QueryOrderRouterRevShareResponse: Order router revenue share response
         """
-        return revshare_query_grpc.QueryStub(self.channel).OrderRouterRevShare(
-            revshare_query.QueryOrderRouterRevShare(address=address)
+        return await resolve(
+            self.stub(revshare_query_grpc.QueryStub).OrderRouterRevShare(
+                revshare_query.QueryOrderRouterRevShare(address=address)
+            )
         )
 
 
+def consumes_sequence(message: Message) -> bool:
+    """
+    Checks whether a transaction carrying the message increments the account sequence.
+
+    Short-term order placements and cancellations skip sequence verification on
+    dYdX, so they can be signed with any sequence and do not use one up.
+
+    Args:
+        message (Message): The transaction message.
+
+    Returns:
+        bool: False for short-term order messages, True otherwise.
+    """
+    if isinstance(message, MsgPlaceOrder):
+        return message.order.order_id.order_flags != OrderFlags.SHORT_TERM
+    if isinstance(message, MsgCancelOrder):
+        return message.order_id.order_flags != OrderFlags.SHORT_TERM
+    return not isinstance(message, MsgBatchCancel)
+
+
+def transaction_consumes_sequence(transaction: Tx) -> bool:
+    """
+    Checks whether every message of the transaction increments the account sequence.
+
+    Args:
+        transaction (Tx): The transaction.
+
+    Returns:
+        bool: False if the transaction carries a short-term order message.
+    """
+    for packed in transaction.body.messages:
+        for message_type in (MsgPlaceOrder, MsgCancelOrder, MsgBatchCancel):
+            if packed.Is(message_type.DESCRIPTOR):
+                message = message_type()
+                packed.Unpack(message)
+                if not consumes_sequence(message):
+                    return False
+    return True
+
+
+def is_sequence_mismatch(response) -> bool:
+    """
+    Checks whether a broadcast was rejected with an account sequence mismatch.
+
+    Args:
+        response: The broadcast response.
+
+    Returns:
+        bool: True if the node expected a different sequence.
+    """
+    tx_response = getattr(response, "tx_response", None)
+    return (
+        tx_response is not None
+        and tx_response.codespace == ACCOUNT_SEQUENCE_MISMATCH_CODESPACE
+        and tx_response.code == ACCOUNT_SEQUENCE_MISMATCH_CODE
+    )
+
+
+def is_out_of_gas(response) -> bool:
+    """
+    Checks whether a broadcast was rejected for running out of gas.
+
+    Args:
+        response: The broadcast response.
+
+    Returns:
+        bool: True if the gas limit of the transaction was too low.
+    """
+    tx_response = getattr(response, "tx_response", None)
+    return (
+        tx_response is not None
+        and tx_response.codespace == OUT_OF_GAS_CODESPACE
+        and tx_response.code == OUT_OF_GAS_CODE
+    )
+
+
+def expected_sequence(response) -> Optional[int]:
+    """
+    Extracts the sequence expected by the node from a rejected broadcast.
+
+    Args:
+        response: The broadcast response.
+
+    Returns:
+        Optional[int]: The expected sequence, or None if the transaction was not
+            rejected with an account sequence mismatch or the log has no sequence.
+    """
+    if not is_sequence_mismatch(response):
+        return None
+    match = ACCOUNT_SEQUENCE_MISMATCH_PATTERN.search(response.tx_response.raw_log)
+    return int(match.group(1)) if match else None
+
+
 class SequenceManager:
-    def __init__(self, query_node_client: QueryNodeClient):
+    """
+    Allocates account sequences locally.
+
+    The sequence of a wallet is queried once, after which every send takes the next
+    number without another round trip, so concurrent broadcasts from one wallet can
+    be in flight at the same time. The allocator resyncs only when the node rejects
+    a transaction with an account sequence mismatch (or the send itself fails).
+    """
+
+    def __init__(self, query_node_client: Optional[QueryNodeClient]):
         self.query_node_client = query_node_client
+        self._sequences: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def before_send(self, wallet: Wallet, consume: bool = True) -> int:
+        """
+        Allocates the sequence for the next transaction of the wallet.
+
+        Args:
+            wallet (Wallet): The sending wallet. Its `sequence` is updated as well.
+            consume (bool): Whether the transaction uses the sequence up.
+                See `consumes_sequence`.
+
+        Returns:
+            int: The sequence to sign the transaction with.
+        """
+        address = wallet.address
+        if address not in self._sequences:
+            lock = self._locks.setdefault(address, asyncio.Lock())
+            async with lock:
+                if address not in self._sequences:
+                    self._sequences[address] = await self._fetch_sequence(wallet)
+
+        sequence = self._sequences[address]
+        if consume:
+            self._sequences[address] = sequence + 1
+        wallet.sequence = sequence
+        return sequence
+
+    async def after_send(self, wallet: Wallet, response=None):
+        """
+        Resyncs the wallet if the node rejected the transaction's sequence.
+
+        Args:
+            wallet (Wallet): The sending wallet.
+            response (optional): The broadcast response.
+        """
+        if not is_sequence_mismatch(response):
+            return
+        expected = expected_sequence(response)
+        if expected is None:
+            self.reset(wallet)
+        else:
+            self._sequences[wallet.address] = expected
 
-    async def before_send(self, wallet: Wallet):
-        if self.query_node_client:
-            account = await self.query_node_client.get_account(wallet.address)
-            wallet.sequence = account.sequence
+    def reset(self, wallet: Wallet):
+        """
+        Drops the local sequence of the wallet, so the next send queries it again.
+
+        Args:
+            wallet (Wallet): The wallet to resync.
+        """
+        self._sequences.pop(wallet.address, None)
 
-    async def after_send(self, wallet: Wallet):
+    async def _fetch_sequence(self, wallet: Wallet) -> int:
         if not self.query_node_client:
-            wallet.sequence += 1
+            return wallet.sequence
+        account = await self.query_node_client.get_account(wallet.address)
+        return account.sequence
 
 
 @dataclass
 class MutatingNodeClient(QueryNodeClient):
     builder: Builder
     sequence_manager: SequenceManager = None
+    sequence_mismatch_retries: int = 0
+    gas_cache: Optional[GasEstimateCache] = None
+    confirmation_tracker: Optional[ConfirmationTracker] = None
+    short_term_fanout: int = 1
+    _gas_refreshes: set = field(default_factory=set, init=False, repr=False)
 
-    async def broadcast(self, transaction: Tx, mode=BroadcastMode.BROADCAST_MODE_SYNC):
+    async def broadcast(
+        self,
+        transaction: Tx,
+        mode=BroadcastMode.BROADCAST_MODE_SYNC,
+        fanout: Optional[int] = None,
+    ):
         """
         Broadcasts a transaction.
 
+        When the client is connected through a `NodePool`, the transaction can be sent
+        to several nodes at once, returning the first accepted response (see
+        `NodePool.fan_out`). This shortens the time short-term orders take to reach
+        the proposer, so they are fanned out to `short_term_fanout` nodes by default.
+
+        Accepted transactions are registered with the confirmation tracker, if any,
+        under their locally computed hash, which then follows the blocks until they
+        are included. See `wait_for_confirmation`.
+
         Args:
             transaction (Tx): The transaction to broadcast.
             mode (BroadcastMode, optional): The broadcast mode. Defaults to BroadcastMode.BROADCAST_MODE_SYNC.
+            fanout (int, optional): The number of nodes to send the transaction to.
+                Defaults to `short_term_fanout` for short-term orders, 1 otherwise.
 
         Returns:
             The response from the broadcast.
         """
-        request = BroadcastTxRequest(
-            tx_bytes=transaction.SerializeToString(), mode=mode
-        )
+        tx_bytes = transaction.SerializeToString()
+        request = BroadcastTxRequest(tx_bytes=tx_bytes, mode=mode)
+        short_term = not transaction_consumes_sequence(transaction)
+        if fanout is None:
+            fanout = self.short_term_fanout if short_term else 1
+
+        if fanout > 1 and isinstance(self.channel, NodePool):
+            response = await self.channel.fan_out(
+                service_pb2_grpc.ServiceStub,
+                "BroadcastTx",
+                request,
+                fanout,
+                lambda response: response.tx_response.code == 0,
+            )
+        else:
+            response = await resolve(
+                self.stub(service_pb2_grpc.ServiceStub).BroadcastTx(request)
+            )
+        if (
+            self.confirmation_tracker is not None
+            and response.tx_response.code == 0
+            and not short_term
+        ):
+            self.confirmation_tracker.track(tx_hash(tx_bytes))
+        return response
+
+    def confirmations(self) -> ConfirmationTracker:
+        """
+        Retrieves the confirmation tracker, creating it on first use.
+        """
+        if self.confirmation_tracker is None:
+            self.confirmation_tracker = ConfirmationTracker(self)
+        return self.confirmation_tracker
 
-        return service_pb2_grpc.ServiceStub(self.channel).BroadcastTx(request)
+    async def wait_for_confirmation(
+        self, tx_hash: str, timeout: float = DEFAULT_QUERY_TIMEOUT_SECS
+    ) -> TxConfirmation:
+        """
+        Waits for a broadcast transaction to be included in a block.
+
+        Transactions that are not tracked yet are queried first, in case they were
+        already included, then awaited through the confirmation tracker.
+
+        Args:
+            tx_hash (str): Transaction hash, e.g. `response.tx_response.txhash`.
+            timeout (float): The maximum seconds to wait.
+
+        Returns:
+            TxConfirmation: The height of the block and the included transaction.
+
+        Raises:
+            asyncio.TimeoutError: If the transaction was not included in time.
+        """
+        tracker = self.confirmations()
+        if tracker.is_pending(tx_hash):
+            return await tracker.wait(tx_hash, timeout)
+
+        # Track before querying, so a block committed in between is not missed.
+        tracker.track(tx_hash, timeout)
+        try:
+            response = await resolve(
+                self.stub(service_pb2_grpc.ServiceStub).GetTx(
+                    GetTxRequest(hash=tx_hash)
+                )
+            )
+            if response.HasField("tx"):
+                tracker.forget(tx_hash)
+                return TxConfirmation(
+                    tx_hash.upper(), response.tx_response.height, response.tx
+                )
+        except grpc.RpcError:
+            pass
+        return await tracker.wait(tx_hash, timeout)
 
     async def simulate(self, transaction: Tx):
         """
@@ -777,7 +1117,7 @@ class MutatingNodeClient(QueryNodeClient):
         """
         request = SimulateRequest(tx=transaction)
 
-        return service_pb2_grpc.ServiceStub(self.channel).Simulate(request)
+        return await resolve(self.stub(service_pb2_grpc.ServiceStub).Simulate(request))
 
     async def send(
         self, wallet: Wallet, transaction: Tx, mode=BroadcastMode.BROADCAST_MODE_SYNC
@@ -785,6 +1125,13 @@ class MutatingNodeClient(QueryNodeClient):
         """
         Sends a transaction.
 
+        With a `gas_cache`, a transaction rejected for running out of gas before
+        entering the mempool, i.e. by the ante handler during CheckTx, is simulated
+        and sent again with the same sequence, which it did not use up. Messages
+        are only executed once the transaction is included in a block, so running
+        out of gas then is not retried: the fee and the sequence are spent, and
+        only the cached estimate is dropped.
+
         Args:
             wallet (Wallet): The wallet to use for signing the transaction.
             transaction (Tx): The transaction to send.
@@ -794,13 +1141,107 @@ class MutatingNodeClient(QueryNodeClient):
             The response from the broadcast.
         """
         builder = self.builder
-        simulated = await self.simulate(transaction)
+        sequence = transaction.auth_info.signer_infos[0].sequence
+
+        fee = self.builder.calculate_fee(await self.estimate_gas(transaction))
+
+        transaction = builder.build_transaction(
+            wallet, transaction.body.messages, fee, sequence=sequence
+        )
+
+        response = await self.broadcast(transaction, mode)
+
+        if self.gas_cache and is_out_of_gas(response):
+            logger.info(f"Gas estimate too low: {response.tx_response.raw_log}")
+            self.gas_cache.invalidate(transaction)
+            if response.tx_response.height:
+                # Delivered in a block: the sequence is used up.
+                return response
+            # Rejected before entering the mempool, with its sequence unused.
+            simulated = await self.simulate(transaction)
+            self.gas_cache.update(transaction, simulated.gas_info.gas_used)
+            transaction = builder.build_transaction(
+                wallet,
+                transaction.body.messages,
+                builder.calculate_fee(simulated.gas_info.gas_used),
+                sequence=sequence,
+            )
+            response = await self.broadcast(transaction, mode)
+
+        if (
+            self.gas_cache
+            and response.tx_response.code == 0
+            and self.gas_cache.needs_refresh(transaction)
+        ):
+            self.refresh_gas_estimate(wallet, transaction)
+
+        return response
 
-        fee = self.builder.calculate_fee(simulated.gas_info.gas_used)
+    async def estimate_gas(self, transaction: Tx) -> int:
+        """
+        Estimates the gas used by a transaction.
+
+        Without a `gas_cache` the transaction is simulated. With one, the estimate is
+        taken from the cache without a round trip. Shapes not cached yet are
+        simulated once and cached, the offline table of the cache being used only
+        if the simulation fails.
+
+        Args:
+            transaction (Tx): The transaction to estimate.
+
+        Returns:
+            int: The estimated gas used.
+        """
+        if not self.gas_cache:
+            simulated = await self.simulate(transaction)
+            return simulated.gas_info.gas_used
+        gas_used = self.gas_cache.get(transaction)
+        if gas_used is not None:
+            return gas_used
+        try:
+            simulated = await self.simulate(transaction)
+        except grpc.RpcError as e:
+            logger.info(f"Simulation failed, using the offline gas table: {e}")
+            return self.gas_cache.estimate(transaction)
+        self.gas_cache.update(transaction, simulated.gas_info.gas_used)
+        return simulated.gas_info.gas_used
 
-        transaction = builder.build_transaction(wallet, transaction.body.messages, fee)
+    def refresh_gas_estimate(self, wallet: Wallet, transaction: Tx):
+        """
+        Simulates a transaction in the background and stores its gas in `gas_cache`.
+
+        The simulated transaction is signed with the account sequence queried from
+        the node rather than a locally allocated one, which concurrent sends may
+        take meanwhile. Failed simulations (e.g. because a transaction of the
+        account is pending) are ignored; the shape is refreshed again on a later
+        send.
+
+        Args:
+            wallet (Wallet): The wallet signing the transaction.
+            transaction (Tx): The transaction to simulate.
+        """
+        self.gas_cache.start_refresh(transaction)
+
+        async def refresh():
+            try:
+                account = await self.get_account(wallet.address)
+                simulated = await self.simulate(
+                    self.builder.build_transaction(
+                        wallet,
+                        transaction.body.messages,
+                        transaction.auth_info.fee,
+                        sequence=account.sequence,
+                    )
+                )
+            except Exception as e:
+                logger.debug(f"Gas estimate refresh failed: {e}")
+                self.gas_cache.cancel_refresh(transaction)
+            else:
+                self.gas_cache.update(transaction, simulated.gas_info.gas_used)
 
-        return await self.broadcast(transaction, mode)
+        task = asyncio.ensure_future(refresh())
+        self._gas_refreshes.add(task)
+        task.add_done_callback(self._gas_refreshes.discard)
 
     async def send_message(
         self, wallet: Wallet, message: Message, mode=BroadcastMode.BROADCAST_MODE_SYNC
@@ -816,15 +1257,12 @@ class MutatingNodeClient(QueryNodeClient):
         Returns:
             The response from the broadcast.
         """
-        if self.sequence_manager:
-            await self.sequence_manager.before_send(wallet)
-
-        response = await self.send(wallet, self.builder.build(wallet, message), mode)
-
-        if self.sequence_manager:
-            await self.sequence_manager.after_send(wallet)
-
-        return response
+        return await self._send_with_sequence(
+            wallet,
+            lambda sequence: self.send(
+                wallet, self.builder.build(wallet, message, sequence=sequence), mode
+            ),
+        )
 
     async def broadcast_message(
         self,
@@ -845,17 +1283,63 @@ class MutatingNodeClient(QueryNodeClient):
         Returns:
             The response from the broadcast.
         """
-        if not tx_options and self.sequence_manager:
-            await self.sequence_manager.before_send(wallet)
+        if tx_options:
+            return await self.broadcast(
+                self.builder.build(wallet, message, tx_options=tx_options), mode
+            )
 
-        response = await self.broadcast(
-            self.builder.build(wallet, message, tx_options=tx_options),
-            mode,
+        return await self._send_with_sequence(
+            wallet,
+            lambda sequence: self.broadcast(
+                self.builder.build(wallet, message, sequence=sequence), mode
+            ),
+            consumes_sequence(message),
         )
 
-        if not tx_options and self.sequence_manager:
-            await self.sequence_manager.after_send(wallet)
+    async def _send_with_sequence(self, wallet: Wallet, send, consume: bool = True):
+        """
+        Signs and sends a transaction with the next sequence of the wallet.
+
+        If `sequence_mismatch_retries` is set and the node rejects the transaction
+        with an account sequence mismatch, the transaction is re-signed with the
+        sequence the node expects and sent again, at most that many times.
+
+        Args:
+            wallet (Wallet): The wallet to use for signing the transaction.
+            send: Callable building, signing and sending the transaction with the
+                given sequence (None meaning `wallet.sequence`).
+            consume (bool): Whether the transaction uses the sequence up.
+
+        Returns:
+            The response from the broadcast.
+        """
+        manager = self.sequence_manager
+        for attempt in range(self.sequence_mismatch_retries + 1):
+            sequence = None
+            if manager:
+                sequence = await manager.before_send(wallet, consume)
 
+            try:
+                response = await send(sequence)
+            except Exception:
+                if manager and consume:
+                    manager.reset(wallet)
+                raise
+
+            if manager:
+                await manager.after_send(wallet, response)
+
+            if not is_sequence_mismatch(response):
+                break
+            if not manager:
+                expected = expected_sequence(response)
+                if expected is None:
+                    break
+                wallet.sequence = expected
+            logger.info(
+                f"Account sequence mismatch for {wallet.address} "
+                f"(attempt {attempt + 1}): {response.tx_response.raw_log}"
+            )
         return response
 
     def build_transaction(self, wallet: Wallet, messages: List[Message], fee: Fee):
@@ -905,10 +1389,27 @@ class NodeClient(MutatingNodeClient):
     manage_sequence: bool = True
 
     @staticmethod
-    async def connect(config: NodeConfig) -> Self:
+    async def connect(config: NodeConfig, track_confirmations: bool = False) -> Self:
+        """
+        Creates a client of the node of the configuration.
+
+        Args:
+            config (NodeConfig): The node configuration.
+            track_confirmations (bool): Whether to follow the blocks for every
+                accepted broadcast, confirming it without querying it later (see
+                `MutatingNodeClient.broadcast`). Otherwise, blocks are only
+                followed while a transaction is awaited.
+
+        Returns:
+            NodeClient: The client.
+        """
         client = NodeClient(config.channel, Builder(config.chain_id, config.usdc_denom))
         if client.manage_sequence:
             client.sequence_manager = SequenceManager(QueryNodeClient(client.channel))
+        if track_confirmations:
+            client.confirmation_tracker = ConfirmationTracker(
+                QueryNodeClient(client.channel)
+            )
         return client
 
     async def deposit(
@@ -1099,6 +1600,116 @@ class NodeClient(MutatingNodeClient):
             tx_options=tx_options,
         )
 
+    async def send_batch(
+        self,
+        wallet: Wallet,
+        messages: List[Union[MsgPlaceOrder, MsgCancelOrder]],
+        mode=BroadcastMode.BROADCAST_MODE_SYNC,
+        tx_options: Optional[TxOptions] = None,
+    ) -> List[Tuple[OrderId, Any]]:
+        """
+        Sends many stateful order placements and cancellations, one transaction each.
+
+        The chain only accepts order placements and cancellations alone in their
+        transaction, so every message is signed on its own. The transactions take
+        consecutive sequences, allocated up front (by the `sequence_manager` if
+        any), and are broadcast concurrently. With `tx_options`, the sequences
+        follow `tx_options.sequence`, or the wallet's if it is None.
+
+        A transaction rejected by the node leaves its sequence unused, so the later
+        ones of the batch are rejected for a sequence mismatch: the wallet's
+        sequence is then resynced (with a `sequence_manager`) or set past the last
+        accepted transaction, and the rejected messages may be sent again.
+
+        Args:
+            wallet (Wallet): The wallet to use for signing the transactions.
+            messages (List[Union[MsgPlaceOrder, MsgCancelOrder]]): The messages to send, in order.
+            mode (BroadcastMode, optional): The broadcast mode. Defaults to BroadcastMode.BROADCAST_MODE_SYNC.
+            tx_options (TxOptions, optional): Options for transaction to support authenticators.
+
+        Returns:
+            List[Tuple[OrderId, Any]]: The order ID of each message with the response
+                from the broadcast of its transaction.
+
+        Raises:
+            ValueError: If a message is not a stateful order placement or cancellation.
+        """
+        order_ids = []
+        for message in messages:
+            if isinstance(message, MsgPlaceOrder):
+                order_ids.append(message.order.order_id)
+            elif isinstance(message, MsgCancelOrder):
+                order_ids.append(message.order_id)
+            else:
+                raise ValueError(f"{type(message).__name__} cannot be batched")
+            if not consumes_sequence(message):
+                raise ValueError("Short-term orders cannot be batched")
+        if not messages:
+            return []
+
+        manager = None if tx_options else self.sequence_manager
+        if manager:
+            sequences = [await manager.before_send(wallet) for _ in messages]
+        elif tx_options and tx_options.sequence is not None:
+            sequences = [tx_options.sequence + i for i in range(len(messages))]
+        else:
+            sequences = [wallet.sequence + i for i in range(len(messages))]
+
+        transactions = [
+            (
+                self.builder.build(
+                    wallet, message, tx_options=replace(tx_options, sequence=sequence)
+                )
+                if tx_options
+                else self.builder.build(wallet, message, sequence=sequence)
+            )
+            for message, sequence in zip(messages, sequences)
+        ]
+        try:
+            responses = await asyncio.gather(
+                *(self.broadcast(transaction, mode) for transaction in transactions)
+            )
+        except Exception:
+            if manager:
+                manager.reset(wallet)
+            raise
+
+        accepted = [
+            sequence
+            for sequence, response in zip(sequences, responses)
+            if response.tx_response.code == 0
+        ]
+        if manager:
+            if len(accepted) < len(sequences):
+                manager.reset(wallet)
+        elif not (tx_options and tx_options.sequence is not None):
+            wallet.sequence = accepted[-1] + 1 if accepted else sequences[0]
+        return list(zip(order_ids, responses))
+
+    async def place_orders(
+        self,
+        wallet: Wallet,
+        orders: List[Order],
+        tx_options: Optional[TxOptions] = None,
+    ) -> List[Tuple[OrderId, Any]]:
+        """
+        Places many stateful orders, one transaction each.
+
+        Args:
+            wallet (Wallet): The wallet to use for signing the transactions.
+            orders (List[Order]): The long-term or conditional orders to place.
+            tx_options (TxOptions, optional): Options for transaction to support authenticators.
+
+        Returns:
+            List[Tuple[OrderId, Any]]: The ID of each order with the response from the
+                broadcast of its transaction.
+        """
+        return await self.send_batch(
+            wallet,
+            [place_order(order) for order in orders],
+            tx_options=tx_options,
+        )
+
     async def update_leverage(
         self,
         wallet: Wallet,
@@ -1190,45 +1801,51 @@ class NodeClient(MutatingNodeClient):
         Returns:
             Tx: Returns transaction information
         """
+        sequence = None
         if self.sequence_manager:
-            await self.sequence_manager.before_send(wallet)
+            sequence = await self.sequence_manager.before_send(
+                wallet, consumes_sequence(message)
+            )
+
+        transaction = self.builder.build(wallet, message, sequence=sequence)
+        try:
+            gas_used = await self.estimate_gas(transaction)
+        except Exception:
+            if self.sequence_manager:
+                self.sequence_manager.reset(wallet)
+            raise
 
-        transaction = self.builder.build(wallet, message)
-        simulated_response = await self.simulate(transaction)
+        if self.gas_cache and self.gas_cache.needs_refresh(transaction):
+            self.refresh_gas_estimate(wallet, transaction)
 
-        response = self.builder.build_transaction(
+        return self.builder.build_transaction(
             wallet=wallet,
             messages=transaction.body.messages,
-            fee=self.builder.calculate_fee(simulated_response.gas_info.gas_used),
+            fee=self.builder.calculate_fee(gas_used),
+            sequence=transaction.auth_info.signer_infos[0].sequence,
         )
-        if self.sequence_manager:
-            await self.sequence_manager.after_send(wallet)
-        return response
 
-    async def query_transaction(self, tx_hash: str) -> Tx:
+    async def query_transaction(
+        self, tx_hash: str, timeout: float = DEFAULT_QUERY_TIMEOUT_SECS
+    ) -> Tx:
         """
         Query the network for a transaction
 
+        Transactions that are not committed yet are awaited through the confirmation
+        tracker, instead of being polled for.
+
         Args:
              tx_hash (str): Transaction hash
+             timeout (float): The maximum seconds to wait for the transaction
 
         Returns:
               Any: Transaction information
         """
-        attempts = DEFAULT_QUERY_TIMEOUT_SECS // DEFAULT_QUERY_INTERVAL_SECS
-        for _ in range(attempts):
-            try:
-                response = service_pb2_grpc.ServiceStub(self.channel).GetTx(
-                    GetTxRequest(hash=tx_hash)
-                )
-
-                if response is None or response.tx is None:
-                    raise Exception("Tx not present in broadcast response")
-                return response.tx
-            except Exception as e:
-                print(f"Error: {e}")
-                await asyncio.sleep(DEFAULT_QUERY_INTERVAL_SECS)
-        raise Exception(f"Error querying Tx: {tx_hash}")
+        try:
+            confirmation = await self.wait_for_confirmation(tx_hash, timeout)
+        except asyncio.TimeoutError as e:
+            raise Exception(f"Error querying Tx: {tx_hash}") from e
+        return confirmation.tx
 
     async def query_address(self, address: str) -> (int, int):
         """
@@ -1489,7 +2106,8 @@ class NodeClient(MutatingNodeClient):
         Places multiple limit orders distributed across a price range (scale order).
 
         Matches the dYdX frontend scale order behavior: equal size per order,
-        with prices distributed according to a geometric skew factor.
+        with prices distributed according to a geometric skew factor. Each order
+        is placed in its own transaction, with `place_orders`.
 
         Args:
             wallet (Wallet): The wallet to use for signing.
@@ -1528,41 +2146,26 @@ class NodeClient(MutatingNodeClient):
         order_size = total_size / num_orders
         prices = self._generate_skewed_prices(start_price, end_price, num_orders, skew)
 
-        # Fetch the latest sequence once before the loop, then manage it
-        # manually to avoid the sequence manager re-querying stale state
-        # between rapid successive broadcasts.
-        if self.sequence_manager:
-            await self.sequence_manager.before_send(wallet)
-        saved_sequence_manager = self.sequence_manager
-        self.sequence_manager = None
-
-        try:
-            results = []
-            for price in prices:
-                client_id = random.randint(0, MAX_CLIENT_ID)
-                oid = market.order_id(
-                    address, subaccount_number, client_id, OrderFlags.LONG_TERM
-                )
-                new_order = market.order(
-                    order_id=oid,
-                    order_type=OrderType.LIMIT,
-                    side=side,
-                    size=order_size,
-                    price=price,
-                    time_in_force=time_in_force,
-                    reduce_only=reduce_only,
-                    post_only=post_only,
-                    good_til_block_time=good_til_block_time,
-                )
-                response = await self.place_order(
-                    wallet, new_order, tx_options=tx_options
-                )
-                results.append((oid, response))
-                wallet.sequence += 1
-        finally:
-            self.sequence_manager = saved_sequence_manager
+        orders = []
+        for price in prices:
+            client_id = random.randint(0, MAX_CLIENT_ID)
+            oid = market.order_id(
+                address, subaccount_number, client_id, OrderFlags.LONG_TERM
+            )
+            new_order = market.order(
+                order_id=oid,
+                order_type=OrderType.LIMIT,
+                side=side,
+                size=order_size,
+                price=price,
+                time_in_force=time_in_force,
+                reduce_only=reduce_only,
+                post_only=post_only,
+                good_til_block_time=good_til_block_time,
+            )
+            orders.append(new_order)
 
-        return results
+        return await self.place_orders(wallet, orders, tx_options=tx_options)
 
     async def set_order_router_revenue_share(
         self, authority: str, address: str, share_ppm: int
@@ -1578,12 +2181,14 @@ class NodeClient(MutatingNodeClient):
         Returns:
             revshare_tx_query.MsgSetOrderRouterRevShareResponse: Set order router revenue share response
         """
-        return revshare_tx_grpc.MsgStub(self.channel).SetOrderRouterRevShare(
-            revshare_tx_query.MsgSetOrderRouterRevShare(
-                authority=authority,
-                order_router_rev_share=OrderRouterRevShare(
-                    address=address, share_ppm=share_ppm
-                ),
+        return await resolve(
+            self.stub(revshare_tx_grpc.MsgStub).SetOrderRouterRevShare(
+                revshare_tx_query.MsgSetOrderRouterRevShare(
+                    authority=authority,
+                    order_router_rev_share=revshare_pb2.OrderRouterRevShare(
+                        address=address, share_ppm=share_ppm
+                    ),
+                )
             )
         )
 
@@ -1602,15 +2207,17 @@ class NodeClient(MutatingNodeClient):
         Returns:
             revshare_tx_query.MsgSetMarketMapperRevenueShareResponse: Market mapper revenue share response
         """
-        return revshare_tx_grpc.MsgStub(self.channel).SetMarketMapperRevenueShare(
-            revshare_tx_query.MsgSetMarketMapperRevenueShare(
-                authority=authority,
-                params=revshare_param.MarketMapperRevenueShareParams(
-                    address=address,
-                    revenue_share_ppm=revenue_share_ppm,
-                    valid_days=valid_days,
+        return await resolve(
+            self.stub(revshare_tx_grpc.MsgStub).SetMarketMapperRevenueShare(
+                revshare_tx_query.MsgSetMarketMapperRevenueShare(
+                    authority=authority,
+                    params=revshare_param.MarketMapperRevenueShareParams(
+                        address=address,
+                        revenue_share_ppm=revenue_share_ppm,
+                        valid_days=valid_days,
+                    ),
                 ),
-            ),
+            )
         )
 
     async def set_market_mapper_revenue_share_details_for_market(
@@ -1627,15 +2234,15 @@ class NodeClient(MutatingNodeClient):
         Returns:
             revshare_query.MsgSetMarketMapperRevShareDetailsForMarketResponse: Market mapper revenue share details response
         """
-        return revshare_tx_grpc.MsgStub(
-            self.channel
-        ).SetMarketMapperRevShareDetailsForMarket(
-            revshare_tx_query.MsgSetMarketMapperRevShareDetailsForMarket(
-                authority=authority,
-                market_id=market_id,
-                params=revshare_pb2.MarketMapperRevShareDetails(
-                    expiration_ts=expiration_ts
-                ),
+        return await resolve(
+            self.stub(revshare_tx_grpc.MsgStub).SetMarketMapperRevShareDetailsForMarket(
+                revshare_tx_query.MsgSetMarketMapperRevShareDetailsForMarket(
+                    authority=authority,
+                    market_id=market_id,
+                    params=revshare_pb2.MarketMapperRevShareDetails(
+                        expiration_ts=expiration_ts
+                    ),
+                )
             )
         )
 
@@ -1653,15 +2260,17 @@ class NodeClient(MutatingNodeClient):
         Returns:
             revshare_tx_query.MsgUpdateUnconditionalRevShareConfigResponse: Update unconditional revenue share config response
         """
-        return revshare_tx_grpc.MsgStub(self.channel).UpdateUnconditionalRevShareConfig(
-            revshare_tx_query.MsgUpdateUnconditionalRevShareConfig(
-                authority=authority,
-                config=revshare_pb2.UnconditionalRevShareConfig(
-                    configs=[
-                        revshare_pb2.UnconditionalRevShareConfig.RecipientConfig(
-                            address=address, share_ppm=share_ppm
-                        )
-                    ]
-                ),
+        return await resolve(
+            self.stub(revshare_tx_grpc.MsgStub).UpdateUnconditionalRevShareConfig(
+                revshare_tx_query.MsgUpdateUnconditionalRevShareConfig(
+                    authority=authority,
+                    config=revshare_pb2.UnconditionalRevShareConfig(
+                        configs=[
+                            revshare_pb2.UnconditionalRevShareConfig.RecipientConfig(
+                                address=address, share_ppm=share_ppm
+                            )
+                        ]
+                    ),
+                )
             )
         )
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from v4_proto.cosmos.tx.v1beta1.tx_pb2 import Tx
+
+if TYPE_CHECKING:
+    from dydx_v4_client.node.client import QueryNodeClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_POLL_INTERVAL_SECS = 0.5
+DEFAULT_CONFIRMATION_TIMEOUT_SECS = 15
+
+
+def tx_hash(tx_bytes: bytes) -> str:
+    """
+    Computes the hash of a transaction, as reported by the node.
+
+    Args:
+        tx_bytes (bytes): The serialized transaction, as broadcast.
+
+    Returns:
+        str: The upper-case hex encoded SHA-256 of the transaction bytes.
+    """
+    return hashlib.sha256(tx_bytes).hexdigest().upper()
+
+
+@dataclass
+class TxConfirmation:
+    tx_hash: str
+    height: int
+    tx: Tx
+
+
+class ConfirmationTracker:
+    """
+    Resolves the confirmations of many pending transactions at once.
+
+    Instead of querying every transaction separately, the tracker follows the chain
+    block by block while any transaction is pending: each new block is fetched once,
+    its transactions are hashed locally and the matching futures are resolved. A
+    transaction is thus confirmed about one block after its inclusion, whatever the
+    number of pending transactions. The tracker only runs while it has pending
+    transactions, which are dropped once their timeout elapses.
+
+    Short-term orders are not included in blocks as transactions, so they are never
+    confirmed by the tracker.
+    """
+
+    def __init__(
+        self,
+        query_node_client: "QueryNodeClient",
+        poll_interval: float = DEFAULT_BLOCK_POLL_INTERVAL_SECS,
+    ):
+        self.query_node_client = query_node_client
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self._height: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_pending(self, tx_hash: str) -> bool:
+        return tx_hash.upper() in self._pending
+
+    def track(
+        self, tx_hash: str, timeout: float = DEFAULT_CONFIRMATION_TIMEOUT_SECS
+    ) -> asyncio.Future:
+        """
+        Starts tracking a transaction, or extends the timeout of a tracked one.
+
+        Args:
+            tx_hash (str): The hash of the transaction.
+            timeout (float): The seconds after which the transaction is dropped.
+
+        Returns:
+            asyncio.Future: Resolved with the `TxConfirmation` once the transaction
+                is included in a block, or cancelled when it is dropped.
+        """
+        key = tx_hash.upper()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        entry = self._pending.get(key)
+        if entry is None:
+            future = loop.create_future()
+        else:
+            future, previous_deadline = entry
+            deadline = max(deadline, previous_deadline)
+        self._pending[key] = (future, deadline)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return future
+
+    def forget(self, tx_hash: str):
+        """
+        Stops tracking a transaction, cancelling its future.
+
+        Args:
+            tx_hash (str): The hash of the transaction.
+        """
+        entry = self._pending.pop(tx_hash.upper(), None)
+        if entry is not None:
+            entry[0].cancel()
+
+    async def wait(
+        self, tx_hash: str, timeout: float = DEFAULT_CONFIRMATION_TIMEOUT_SECS
+    ) -> TxConfirmation:
+        """
+        Waits for a transaction to be included in a block.
+
+        Args:
+            tx_hash (str): The hash of the transaction.
+            timeout (float): The maximum seconds to wait.
+
+        Returns:
+            TxConfirmation: The height of the block and the included transaction.
+
+        Raises:
+            asyncio.TimeoutError: If the transaction was not included in time.
+        """
+        future = self.track(tx_hash, timeout)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                raise asyncio.TimeoutError(f"Tx {tx_hash} was not confirmed")
+            raise
+
+    async def _run(self):
+        try:
+            while self._pending:
+                try:
+                    await self._poll()
+                except Exception as e:
+                    logger.warning("Failed to fetch blocks: %s", e)
+                self._expire()
+                if self._pending:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            self._height = None
+
+    async def _poll(self):
+        latest = block_of(await self.query_node_client.latest_block())
+        latest_height = latest.header.height
+        if self._height is None:
+            self._height = latest_height
+
+        while self._height < latest_height:
+            response = await self.query_node_client.get_block_by_height(self._height)
+            self._process(block_of(response))
+            self._height += 1
+        if self._height == latest_height:
+            self._process(latest)
+            self._height += 1
+
+    def _process(self, block):
+        for tx_bytes in block.data.txs:
+            key = tx_hash(tx_bytes)
+            entry = self._pending.pop(key, None)
+            if entry is not None and not entry[0].done():
+                confirmation = TxConfirmation(
+                    key, block.header.height, Tx.FromString(tx_bytes)
+                )
+                entry[0].set_result(confirmation)
+
+    def _expire(self):
+        now = asyncio.get_running_loop().time()
+        for key, (future, deadline) in list(self._pending.items()):
+            if deadline <= now:
+                del self._pending[key]
+                future.cancel()
+
+
+def block_of(response):
+    """
+    Extracts the block from a `GetLatestBlock` or `GetBlockByHeight` response.
+    """
+    if response.HasField("sdk_block"):
+        return response.sdk_block
+    return response.block
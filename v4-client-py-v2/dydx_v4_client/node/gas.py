@@ -0,0 +1,111 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+from v4_proto.cosmos.tx.v1beta1.tx_pb2 import Tx
+
+# Message type URLs of the transaction and whether it selects authenticators.
+GasKey = Tuple[Tuple[str, ...], bool]
+
+DEFAULT_FALLBACK_GAS = 400_000
+DEFAULT_MAX_AGE_SECS = 600
+
+
+@dataclass
+class OfflineGasTable:
+    """
+    Static per-message gas estimates, used when a shape not cached yet cannot be
+    simulated.
+    """
+
+    entries: Dict[str, int] = field(default_factory=dict)
+    fallback_gas: int = DEFAULT_FALLBACK_GAS
+
+    def update_entry(self, type_url: str, gas: int):
+        self.entries[type_url] = int(gas)
+
+    def estimate(self, key: GasKey) -> int:
+        type_urls, _ = key
+        return sum(self.entries.get(url, self.fallback_gas) for url in type_urls)
+
+    @staticmethod
+    def default_table() -> "OfflineGasTable":
+        table = OfflineGasTable()
+        table.update_entry("/cosmos.bank.v1beta1.MsgSend", 150_000)
+        table.update_entry("/dydxprotocol.sending.MsgCreateTransfer", 250_000)
+        table.update_entry("/dydxprotocol.sending.MsgDepositToSubaccount", 250_000)
+        table.update_entry("/dydxprotocol.sending.MsgWithdrawFromSubaccount", 250_000)
+        return table
+
+
+@dataclass
+class GasEstimateCache:
+    """
+    Caches the gas used by simulated transactions, keyed by their shape.
+
+    Transactions with the same message types (in the same order) and the same
+    authenticator usage are expected to use about the same amount of gas, so a
+    single simulation serves every later transaction of that shape. Entries older
+    than `max_age_secs` are still used, but reported by `needs_refresh` so the client
+    can re-simulate in the background. Shapes which could not be simulated fall
+    back to the offline table.
+    """
+
+    offline_table: OfflineGasTable = field(
+        default_factory=OfflineGasTable.default_table
+    )
+    max_age_secs: float = DEFAULT_MAX_AGE_SECS
+    _entries: Dict[GasKey, Tuple[int, float]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _refreshing: Set[GasKey] = field(default_factory=set, init=False, repr=False)
+
+    @staticmethod
+    def key(transaction: Tx) -> GasKey:
+        return (
+            tuple(message.type_url for message in transaction.body.messages),
+            len(transaction.body.non_critical_extension_options) > 0,
+        )
+
+    def get(self, transaction: Tx) -> Optional[int]:
+        """
+        Retrieves the cached gas used by transactions of this shape, if any.
+        """
+        entry = self._entries.get(self.key(transaction))
+        return entry[0] if entry else None
+
+    def estimate(self, transaction: Tx) -> int:
+        """
+        Estimates the gas used by the transaction without simulating it.
+        """
+        gas_used = self.get(transaction)
+        if gas_used is None:
+            return self.offline_table.estimate(self.key(transaction))
+        return gas_used
+
+    def update(self, transaction: Tx, gas_used: int):
+        key = self.key(transaction)
+        self._entries[key] = (gas_used, time.monotonic())
+        self._refreshing.discard(key)
+
+    def invalidate(self, transaction: Tx):
+        """
+        Drops the cached gas of the shape, e.g. after it proved too low.
+        """
+        self._entries.pop(self.key(transaction), None)
+
+    def needs_refresh(self, transaction: Tx) -> bool:
+        """
+        Checks whether the shape should be (re-)simulated and no refresh is running.
+        """
+        key = self.key(transaction)
+        if key in self._refreshing:
+            return False
+        entry = self._entries.get(key)
+        return entry is None or time.monotonic() - entry[1] > self.max_age_secs
+
+    def start_refresh(self, transaction: Tx):
+        self._refreshing.add(self.key(transaction))
+
+    def cancel_refresh(self, transaction: Tx):
+        self._refreshing.discard(self.key(transaction))
@@ -8,7 +8,7 @@ from v4_proto.dydxprotocol.vault import query_pb2 as vault_query
 from dydx_v4_client.node.message import deposit_to_megavault, withdraw_from_megavault
 from dydx_v4_client.utility import convert_amount_to_quantums_vec, to_serializable_vec
 from dydx_v4_client.wallet import Wallet
-from dydx_v4_client.node.client import NodeClient
+from dydx_v4_client.node.client import NodeClient, resolve
 from v4_proto.dydxprotocol.vault.share_pb2 import NumShares
 
 
@@ -90,10 +90,10 @@ class MegaVault:
         Returns:
             vault_query.QueryMegavaultOwnerSharesResponse: Fetch total shares of the address
         """
-        return vault_query_grpc.QueryStub(
-            self.node_client.channel
-        ).MegavaultOwnerShares(
-            vault_query.QueryMegavaultOwnerSharesRequest(address=address)
+        return await resolve(
+            self.node_client.stub(vault_query_grpc.QueryStub).MegavaultOwnerShares(
+                vault_query.QueryMegavaultOwnerSharesRequest(address=address)
+            )
         )
 
     async def get_withdrawal_info(
@@ -108,10 +108,10 @@ class MegaVault:
         Returns:
             Any: Withdrawal info
         """
-        return vault_query_grpc.QueryStub(
-            self.node_client.channel
-        ).MegavaultWithdrawalInfo(
-            vault_query.QueryMegavaultWithdrawalInfoRequest(
-                shares_to_withdraw=NumShares(num_shares=to_serializable_vec(shares))
+        return await resolve(
+            self.node_client.stub(vault_query_grpc.QueryStub).MegavaultWithdrawalInfo(
+                vault_query.QueryMegavaultWithdrawalInfoRequest(
+                    shares_to_withdraw=NumShares(num_shares=to_serializable_vec(shares))
+                )
             )
         )
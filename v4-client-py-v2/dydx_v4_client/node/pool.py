@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+import grpc
+from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
+
+from dydx_v4_client.node.confirmation import block_of
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_CHECK_INTERVAL_SECS = 5
+DEFAULT_PROBE_TIMEOUT_SECS = 2
+DEFAULT_MAX_LAG_BLOCKS = 2
+DEFAULT_HEDGE_DELAY_SECS = 0.05
+LATENCY_SMOOTHING = 0.2
+
+# Errors after which the request is retried on the next endpoint.
+FAILOVER_CODES = frozenset(
+    [grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED]
+)
+
+GET_LATEST_BLOCK = "/cosmos.base.tendermint.v1beta1.Service/GetLatestBlock"
+
+
+def is_failover_error(error: Exception) -> bool:
+    return isinstance(error, grpc.RpcError) and error.code() in FAILOVER_CODES
+
+
+@dataclass
+class NodeEndpoint:
+    """
+    A node of a `NodePool`, with the health and latency observed so far.
+    """
+
+    url: str
+    channel: Union[grpc.Channel, grpc.aio.Channel]
+    height: int = 0
+    latency: float = math.inf
+    healthy: bool = True
+    failures: int = 0
+    # Fan-out statistics, see `NodePool.fan_out`.
+    accept_latency: float = math.inf
+    accepted: int = 0
+    rejected: int = 0
+    _methods: Dict[Tuple[str, str], Any] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _stubs: Dict[type, Any] = field(default_factory=dict, init=False, repr=False)
+
+    def stub(self, stub_type: type):
+        stub = self._stubs.get(stub_type)
+        if stub is None:
+            stub = self._stubs[stub_type] = stub_type(self.channel)
+        return stub
+
+    def method(self, kind: str, path: str, options: Dict[str, Any]):
+        key = (kind, path)
+        method = self._methods.get(key)
+        if method is None:
+            method = self._methods[key] = getattr(self.channel, kind)(path, **options)
+        return method
+
+    def record_success(self, latency: float, height: Optional[int] = None):
+        if self.latency == math.inf:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        if height is not None:
+            self.height = height
+        self.healthy = True
+
+    def record_failure(self):
+        self.failures += 1
+        self.healthy = False
+
+    def record_fan_out(self, latency: float, accepted: bool):
+        if not accepted:
+            self.rejected += 1
+            return
+        self.accepted += 1
+        if self.accept_latency == math.inf:
+            self.accept_latency = latency
+        else:
+            self.accept_latency += LATENCY_SMOOTHING * (latency - self.accept_latency)
+
+
+class NodePool:
+    """
+    Spreads gRPC requests over several nodes, in place of a single channel.
+
+    The pool can be used wherever a channel is expected: stubs built on it send each
+    unary request to the best ranked endpoint, i.e. a healthy one at most
+    `max_lag_blocks` behind the highest known block, with the lowest latency. When an
+    endpoint is unavailable or times out, the request fails over to the next one.
+    The ranking is kept up to date by probing the latest block height of every
+    endpoint each `health_check_interval` seconds, starting with the first request.
+
+    Requests to the methods in `hedged_methods` (full paths, such as
+    `/cosmos.base.tendermint.v1beta1.Service/GetLatestBlock`) are also sent to the
+    next endpoint if no response arrived within `hedge_delay` seconds, and the first
+    response wins. Hedging requires `grpc.aio` channels; with blocking channels the
+    endpoints are only tried one after another.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[NodeEndpoint],
+        health_check_interval: Optional[float] = DEFAULT_HEALTH_CHECK_INTERVAL_SECS,
+        max_lag_blocks: int = DEFAULT_MAX_LAG_BLOCKS,
+        hedged_methods: FrozenSet[str] = frozenset(),
+        hedge_delay: float = DEFAULT_HEDGE_DELAY_SECS,
+        probe_timeout: float = DEFAULT_PROBE_TIMEOUT_SECS,
+    ):
+        if not endpoints:
+            raise ValueError("A node pool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.health_check_interval = health_check_interval
+        self.max_lag_blocks = max_lag_blocks
+        self.hedged_methods = frozenset(hedged_methods)
+        self.hedge_delay = hedge_delay
+        self.probe_timeout = probe_timeout
+        self.is_aio = all(
+            isinstance(endpoint.channel, grpc.aio.Channel) for endpoint in endpoints
+        )
+        self._health_checks: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coroutine) -> asyncio.Task:
+        """
+        Runs a coroutine in a task referenced by the pool until it is done, so the
+        requests left in flight by `fan_out` and hedging are not garbage collected
+        before completing.
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def ranked(self) -> List[NodeEndpoint]:
+        """
+        Orders the endpoints from the most to the least preferred.
+        """
+        highest = max(endpoint.height for endpoint in self.endpoints)
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                not endpoint.healthy,
+                highest - endpoint.height > self.max_lag_blocks,
+                endpoint.latency,
+            ),
+        )
+
+    async def check_health(self):
+        """
+        Probes the latest block height and latency of every endpoint once.
+        """
+        await asyncio.gather(*(self._probe(endpoint) for endpoint in self.endpoints))
+
+    async def _probe(self, endpoint: NodeEndpoint):
+        method = endpoint.method(
+            "unary_unary",
+            GET_LATEST_BLOCK,
+            dict(
+                request_serializer=tendermint_query.GetLatestBlockRequest.SerializeToString,
+                response_deserializer=tendermint_query.GetLatestBlockResponse.FromString,
+            ),
+        )
+        request = tendermint_query.GetLatestBlockRequest()
+        start = time.perf_counter()
+        try:
+            if self.is_aio:
+                response = await method(request, timeout=self.probe_timeout)
+            else:
+                response = await asyncio.to_thread(
+                    method, request, timeout=self.probe_timeout
+                )
+        except Exception as e:
+            logger.warning("Node %s failed its health check: %s", endpoint.url, e)
+            endpoint.record_failure()
+            return
+        endpoint.record_success(
+            time.perf_counter() - start, block_of(response).header.height
+        )
+
+    async def fan_out(
+        self,
+        stub_type: type,
+        method: str,
+        request,
+        count: int,
+        accept: Callable[[Any], bool],
+    ):
+        """
+        Sends the same request to several endpoints at once.
+
+        The request goes to the `count` best ranked endpoints in parallel, and the
+        first accepted response is returned without waiting for the others. The
+        remaining requests still complete in the background, so that every endpoint
+        records its acceptance latency (`accept_latency`, smoothed like `latency`)
+        and its `accepted` and `rejected` counts, which can be used to prune slow
+        nodes.
+
+        Args:
+            stub_type (type): The generated stub class, e.g. `ServiceStub`.
+            method (str): The name of the stub method.
+            request: The request message.
+            count (int): The number of endpoints to send the request to.
+            accept (Callable[[Any], bool]): Whether a response is accepted.
+
+        Returns:
+            The first accepted response, or the first received one if no endpoint
+            accepted the request.
+
+        Raises:
+            grpc.RpcError: If every endpoint failed.
+        """
+        endpoints = self.ranked()[: max(count, 1)]
+        sends = [
+            self.spawn(self._send(endpoint, stub_type, method, request, accept))
+            for endpoint in endpoints
+        ]
+        first_response = None
+        error = None
+        for send in asyncio.as_completed(sends):
+            response, send_error = await send
+            if send_error is not None:
+                error = send_error
+            elif accept(response):
+                return response
+            elif first_response is None:
+                first_response = response
+        if first_response is not None:
+            return first_response
+        raise error
+
+    async def _send(
+        self,
+        endpoint: NodeEndpoint,
+        stub_type: type,
+        method: str,
+        request,
+        accept: Callable[[Any], bool],
+    ):
+        call = getattr(endpoint.stub(stub_type), method)
+        start = time.perf_counter()
+        try:
+            if self.is_aio:
+                response = await call(request)
+            else:
+                response = await asyncio.to_thread(call, request)
+        except grpc.RpcError as e:
+            if is_failover_error(e):
+                endpoint.record_failure()
+            return None, e
+        endpoint.record_fan_out(time.perf_counter() - start, accept(response))
+        return response, None
+
+    async def _run_health_checks(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_check_interval)
+
+    def _ensure_health_checks(self):
+        if self.health_check_interval is None:
+            return
+        if self._health_checks is not None and not self._health_checks.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._health_checks = asyncio.ensure_future(self._run_health_checks())
+
+    def close(self):
+        """
+        Stops the health checks and closes the channels of the endpoints.
+
+        Closing `grpc.aio` channels is asynchronous, so the returned awaitables
+        should be awaited in that case.
+        """
+        if self._health_checks is not None:
+            self._health_checks.cancel()
+        return [endpoint.channel.close() for endpoint in self.endpoints]
+
+    def unary_unary(self, path: str, **options):
+        return PooledMethod(self, "unary_unary", path, options)
+
+    def unary_stream(self, path: str, **options):
+        return PooledMethod(self, "unary_stream", path, options)
+
+    def stream_unary(self, path: str, **options):
+        return PooledMethod(self, "stream_unary", path, options)
+
+    def stream_stream(self, path: str, **options):
+        return PooledMethod(self, "stream_stream", path, options)
+
+
+class PooledMethod:
+    """
+    A gRPC method of a `NodePool`, routing every call to the pool's best endpoint.
+    """
+
+    def __init__(self, pool: NodePool, kind: str, path: str, options: Dict[str, Any]):
+        self.pool = pool
+        self.kind = kind
+        self.path = path
+        self.options = options
+
+    def __call__(self, request, **kwargs):
+        self.pool._ensure_health_checks()
+        endpoints = self.pool.ranked()
+        if self.kind != "unary_unary":
+            # Streams cannot be replayed, so they are not failed over.
+            return endpoints[0].method(self.kind, self.path, self.options)(
+                request, **kwargs
+            )
+        if self.pool.is_aio:
+            return self._call_async(endpoints, request, kwargs)
+        return self._call(endpoints, request, kwargs)
+
+    def _call(self, endpoints: List[NodeEndpoint], request, kwargs):
+        error = None
+        for endpoint in endpoints:
+            method = endpoint.method(self.kind, self.path, self.options)
+            start = time.perf_counter()
+            try:
+                response = method(request, **kwargs)
+            except grpc.RpcError as e:
+                if not is_failover_error(e):
+                    raise
+                logger.info("Node %s failed, failing over: %s", endpoint.url, e)
+                endpoint.record_failure()
+                error = e
+                continue
+            endpoint.record_success(time.perf_counter() - start)
+            return response
+        raise error
+
+    async def _call_endpoint(self, endpoint: NodeEndpoint, request, kwargs):
+        method = endpoint.method(self.kind, self.path, self.options)
+        start = time.perf_counter()
+        try:
+            response = await method(request, **kwargs)
+        except grpc.RpcError as e:
+            if is_failover_error(e):
+                logger.info("Node %s failed, failing over: %s", endpoint.url, e)
+                endpoint.record_failure()
+            raise
+        endpoint.record_success(time.perf_counter() - start)
+        return response
+
+    async def _call_async(self, endpoints: List[NodeEndpoint], request, kwargs):
+        hedged = self.path in self.pool.hedged_methods
+        queue = list(endpoints)
+        pending = set()
+        error = None
+
+        def launch():
+            endpoint = queue.pop(0)
+            pending.add(self.pool.spawn(self._call_endpoint(endpoint, request, kwargs)))
+
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.pool.hedge_delay if hedged and queue else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                pending.difference_update(done)
+                # Retrieve every exception first, so none is reported as unhandled.
+                errors = {task: task.exception() for task in done}
+                for task, task_error in errors.items():
+                    if task_error is None:
+                        return task.result()
+                for task_error in errors.values():
+                    if not is_failover_error(task_error):
+                        raise task_error
+                    error = task_error
+                if queue and (not done or not pending):
+                    # The hedge delay elapsed, or every request in flight failed.
+                    launch()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
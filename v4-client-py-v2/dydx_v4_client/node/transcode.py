@@ -0,0 +1,170 @@
+import math
+import struct
+from typing import Any, Callable, Dict
+
+from google.protobuf import descriptor_pool
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message
+from google.protobuf.message_factory import GetMessageClass
+
+Converter = Callable[[Any], Any]
+
+# Well-known types with a special JSON form, left to `MessageToDict`.
+WELL_KNOWN_TYPES = frozenset(
+    "google.protobuf." + name
+    for name in [
+        "Duration",
+        "FieldMask",
+        "ListValue",
+        "Struct",
+        "Timestamp",
+        "Value",
+        "BoolValue",
+        "BytesValue",
+        "DoubleValue",
+        "FloatValue",
+        "Int32Value",
+        "Int64Value",
+        "StringValue",
+        "UInt32Value",
+        "UInt64Value",
+    ]
+)
+
+INT64_TYPES = frozenset(
+    [
+        FieldDescriptor.CPPTYPE_INT64,
+        FieldDescriptor.CPPTYPE_UINT64,
+    ]
+)
+
+_converters: Dict[FieldDescriptor, Converter] = {}
+
+
+def message_to_dict(message: Message) -> Dict[str, Any]:
+    """
+    Converts a protobuf message to Python values in a single pass.
+
+    The result is the one of `MessageToDict`, built from cached per-field
+    converters: keys are the JSON (camelCase) field names, fields left at their
+    default value are omitted, enums become their names, 64-bit integers become
+    strings and well-known types take their JSON form. Only `bytes` fields differ:
+    they become lists of byte values instead of base64 strings, as
+    `QueryNodeClient.transcode_response` has always returned them. `Any` fields
+    of an unknown type keep their packed bytes instead of raising.
+
+    Args:
+        message (Message): The message to convert.
+
+    Returns:
+        Dict[str, Any]: The converted message.
+    """
+    return {
+        field.json_name: converter(field)(value)
+        for field, value in message.ListFields()
+    }
+
+
+def converter(field: FieldDescriptor) -> Converter:
+    """
+    Retrieves the converter of the field's values, building it on first use.
+    """
+    convert = _converters.get(field)
+    if convert is None:
+        convert = _converters[field] = build_converter(field)
+    return convert
+
+
+def build_converter(field: FieldDescriptor) -> Converter:
+    if field.message_type is not None and field.message_type.GetOptions().map_entry:
+        convert_key = map_key
+        convert_value = scalar_converter(field.message_type.fields_by_name["value"])
+        return lambda entries: {
+            convert_key(key): convert_value(value) for key, value in entries.items()
+        }
+
+    convert = scalar_converter(field)
+    if is_repeated(field):
+        if convert is identity:
+            return list
+        return lambda values: [convert(value) for value in values]
+    return convert
+
+
+def is_repeated(field: FieldDescriptor) -> bool:
+    # `label` was replaced by `is_repeated` in recent protobuf releases.
+    if hasattr(field, "is_repeated"):
+        return field.is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def map_key(key: Any) -> str:
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    return str(key)
+
+
+def scalar_converter(field: FieldDescriptor) -> Converter:
+    if field.type == FieldDescriptor.TYPE_BYTES:
+        return list
+    if field.type == FieldDescriptor.TYPE_ENUM:
+        if field.enum_type.full_name == "google.protobuf.NullValue":
+            return lambda number: None
+        names = {value.number: value.name for value in field.enum_type.values}
+        return lambda number: names.get(number, number)
+    if field.type in (FieldDescriptor.TYPE_MESSAGE, FieldDescriptor.TYPE_GROUP):
+        full_name = field.message_type.full_name
+        if full_name in WELL_KNOWN_TYPES:
+            return MessageToDict
+        if full_name == "google.protobuf.Any":
+            return any_to_dict
+        return message_to_dict
+    if field.cpp_type in INT64_TYPES:
+        return str
+    if field.cpp_type == FieldDescriptor.CPPTYPE_FLOAT:
+        return lambda value: special_float(value) or shortest_float(value)
+    if field.cpp_type == FieldDescriptor.CPPTYPE_DOUBLE:
+        return lambda value: special_float(value) or value
+    return identity
+
+
+def special_float(value: float):
+    """
+    Retrieves the JSON string of an infinite or NaN float, or None.
+    """
+    if math.isinf(value):
+        return "-Infinity" if value < 0 else "Infinity"
+    if math.isnan(value):
+        return "NaN"
+    return None
+
+
+def shortest_float(value: float) -> float:
+    """
+    Retrieves the shortest decimal of a 32-bit float field, as `MessageToDict`
+    prints them, e.g. 0.1 rather than 0.10000000149011612.
+    """
+    # 9 significant digits always round-trip a 32-bit float.
+    for precision in range(6, 10):
+        rounded = float(f"{value:.{precision}g}")
+        if struct.unpack("<f", struct.pack("<f", rounded))[0] == value:
+            return rounded
+    return value
+
+
+def identity(value: Any) -> Any:
+    return value
+
+
+def any_to_dict(packed: Message) -> Dict[str, Any]:
+    type_name = packed.type_url.rpartition("/")[2]
+    try:
+        descriptor = descriptor_pool.Default().FindMessageTypeByName(type_name)
+    except KeyError:
+        return {"@type": packed.type_url, "value": list(packed.value)}
+    message = GetMessageClass(descriptor)()
+    packed.Unpack(message)
+    if type_name in WELL_KNOWN_TYPES:
+        return {"@type": packed.type_url, "value": MessageToDict(message)}
+    return {"@type": packed.type_url, **message_to_dict(message)}
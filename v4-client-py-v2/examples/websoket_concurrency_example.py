@@ -1,9 +1,8 @@
 import asyncio
-import threading
 from typing import Any, Dict
 
 from dydx_v4_client.indexer.candles_resolution import CandlesResolution
-from dydx_v4_client.indexer.socket.websocket import IndexerSocket
+from dydx_v4_client.indexer.socket.aio import AsyncIndexerSocket
 from dydx_v4_client.network import TESTNET
 
 ETH_USD = "ENA-USD"
@@ -12,24 +11,19 @@ RESOLUTION = CandlesResolution.ONE_MINUTE
 
 class LiveCandleRepresentation:
     def __init__(self):
-        self._ws = IndexerSocket(
-            TESTNET.websocket_indexer,
-            on_message=self.handle_message,
-        )
+        self._ws = AsyncIndexerSocket(TESTNET.websocket_indexer)
         self._count = 1
         self.representation: Dict[str, Any] = {}
 
-    def wrap_async_func(self) -> None:
-        # NOTE: ._ws.connect() is a blocking async function call
-        asyncio.run(self._ws.connect())
+    async def run(self) -> None:
+        # The socket runs on the same event loop as the other tasks.
+        async with self._ws as ws:
+            async for message in ws:
+                await self.handle_message(ws, message)
 
-    def start_websocket_connection(self) -> None:
-        t = threading.Thread(target=self.wrap_async_func)
-        t.start()
-
-    def handle_message(self, ws: IndexerSocket, message: dict):
+    async def handle_message(self, ws: AsyncIndexerSocket, message: dict):
         if message["type"] == "connected":
-            ws.candles.subscribe(ETH_USD, RESOLUTION)
+            await ws.candles.subscribe(ETH_USD, RESOLUTION)
 
         if message["type"] == "channel_batch_data":
             if candle_dict := message["contents"][0]:
@@ -47,9 +41,11 @@ async def some_candle_query(live_candle: LiveCandleRepresentation):
 
 async def test():
     live_candle = LiveCandleRepresentation()
-    live_candle.start_websocket_connection()
 
-    tasks = [asyncio.create_task(some_candle_query(live_candle))]
+    tasks = [
+        asyncio.create_task(live_candle.run()),
+        asyncio.create_task(some_candle_query(live_candle)),
+    ]
     await asyncio.gather(*tasks)
 
 
@@ -188,6 +188,11 @@ async def wallet_2(node_client, key_pair_2) -> Wallet:
     return await get_wallet(node_client, key_pair_2, TEST_ADDRESS_2)
 
 
+@pytest.fixture
+def offline_wallet() -> Wallet:
+    return Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 0, 0)
+
+
 def retry_on_forbidden(max_retries=3, delay=1, skip=False):
     def decorator(func):
         @wraps(func)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.rest.backfill import (
+    RESOLUTION_SPANS,
+    CandleBackfill,
+    to_iso,
+)
+
+START = datetime(2024, 5, 1)
+
+
+class FakeMarkets:
+    """
+    Serves one candle per period, latest first, like the candles endpoint.
+    """
+
+    def __init__(
+        self, span: timedelta, count: int, fail_after: int = None, max_page: int = 100
+    ):
+        self.started_at = [to_iso(START + span * index) for index in range(count)]
+        self.fail_after = fail_after
+        self.max_page = max_page
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cancelled = 0
+
+    async def get_perpetual_market_candles(
+        self, market, resolution, from_iso, to_iso, limit
+    ):
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise ConnectionError("indexer unavailable")
+        self.requests.append((market, from_iso, to_iso))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        candles = [
+            {"startedAt": started_at, "ticker": market, "resolution": resolution}
+            for started_at in reversed(self.started_at)
+            if from_iso <= started_at <= to_iso
+        ]
+        return {"candles": candles[: min(limit, self.max_page)]}
+
+
+def test_every_resolution_has_a_span():
+    assert set(RESOLUTION_SPANS) == set(CandlesResolution)
+
+
+@pytest.mark.asyncio
+async def test_backfills_range_in_concurrent_shards():
+    markets = FakeMarkets(timedelta(minutes=1), 24 * 60 + 30)
+    backfill = CandleBackfill(markets, concurrency=4, requests_per_second=None)
+
+    candles = await backfill.backfill(
+        "BTC-USD", CandlesResolution.ONE_MINUTE, START, START + timedelta(days=1)
+    )
+
+    assert [candle["startedAt"] for candle in candles] == markets.started_at[:1440]
+    assert len(markets.requests) == 15
+    assert markets.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_fetches_each_shard_in_one_request():
+    # The range starts before the first candle, so the first shard is short.
+    markets = FakeMarkets(timedelta(hours=1), 48)
+    backfill = CandleBackfill(markets, requests_per_second=None, page_size=10)
+
+    candles = await backfill.backfill(
+        "ETH-USD",
+        CandlesResolution.ONE_HOUR,
+        START - timedelta(hours=5),
+        START + timedelta(hours=25),
+    )
+
+    assert [candle["startedAt"] for candle in candles] == markets.started_at[:25]
+    assert len(markets.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint(tmp_path):
+    checkpoint = tmp_path / "candles.jsonl"
+    end = START + timedelta(days=1)
+    failing = FakeMarkets(timedelta(minutes=1), 1440, fail_after=10)
+    with pytest.raises(ConnectionError):
+        await CandleBackfill(
+            failing, concurrency=1, requests_per_second=None, checkpoint=checkpoint
+        ).backfill("BTC-USD", CandlesResolution.ONE_MINUTE, START, end)
+    with checkpoint.open("a") as file:
+        file.write('{"shard": ["BTC-USD"')  # Cut short by the crash.
+
+    markets = FakeMarkets(timedelta(minutes=1), 1440)
+    backfill = CandleBackfill(markets, requests_per_second=None, checkpoint=checkpoint)
+    candles = await backfill.backfill(
+        "BTC-USD", CandlesResolution.ONE_MINUTE, START, end
+    )
+
+    assert len(candles) == 1440
+    assert len(markets.requests) == 5
+    assert len(checkpoint.read_text().splitlines()) == 15
+    # Completed shards are read back from the checkpoint, not kept in memory.
+    assert isinstance(backfill._completed, set) and len(backfill._completed) == 15
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_shared_by_markets():
+    markets = FakeMarkets(timedelta(days=1), 10)
+    backfill = CandleBackfill(markets, requests_per_second=100)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    results = {
+        market: candles
+        async for market, candles in backfill.backfill_markets(
+            ["BTC-USD", "ETH-USD", "SOL-USD"],
+            CandlesResolution.ONE_DAY,
+            START,
+            START + timedelta(days=10),
+        )
+    }
+
+    assert loop.time() - start >= 0.02
+    assert {market: len(candles) for market, candles in results.items()} == {
+        "BTC-USD": 10,
+        "ETH-USD": 10,
+        "SOL-USD": 10,
+    }
+
+
+@pytest.mark.asyncio
+async def test_open_shard_is_not_checkpointed(tmp_path):
+    checkpoint = tmp_path / "candles.jsonl"
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=150)
+    markets = FakeMarkets(timedelta(minutes=1), 0)
+    backfill = CandleBackfill(markets, requests_per_second=None, checkpoint=checkpoint)
+
+    for _ in range(2):
+        await backfill.backfill(
+            "BTC-USD", CandlesResolution.ONE_MINUTE, start, start + timedelta(days=1)
+        )
+
+    # The first shard is closed, the ones ending after now are fetched again.
+    assert len(checkpoint.read_text().splitlines()) == 1
+    assert len(markets.requests) == 15 + 14
+
+
+@pytest.mark.asyncio
+async def test_failed_shard_cancels_the_others():
+    markets = FakeMarkets(timedelta(minutes=1), 1440, fail_after=2)
+    backfill = CandleBackfill(markets, concurrency=4, requests_per_second=None)
+
+    with pytest.raises(ConnectionError):
+        await backfill.backfill(
+            "BTC-USD", CandlesResolution.ONE_MINUTE, START, START + timedelta(days=1)
+        )
+
+    assert markets.cancelled == 2
+    assert markets.in_flight == 0
@@ -0,0 +1,212 @@
+import asyncio
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dydx_v4_client.indexer.rest.columnar import (
+    FILL_FIELDS,
+    candle_columns,
+    decode_json,
+    fill_columns,
+    funding_columns,
+    parse_scaled,
+    parse_timestamps,
+    scale,
+    trade_columns,
+)
+from dydx_v4_client.indexer.rest.modules.markets import MarketsClient
+
+
+def test_parses_timestamps_to_epoch_nanoseconds():
+    timestamps = [
+        "2024-05-01T12:34:56.789Z",
+        "1999-02-28T23:59:59.001Z",
+        "2000-03-01T00:00:00.000Z",
+    ]
+
+    expected = np.array(
+        [timestamp[:-1] for timestamp in timestamps], dtype="datetime64[ns]"
+    ).astype(np.int64)
+    assert (parse_timestamps(timestamps) == expected).all()
+    assert parse_timestamps(["2024-05-01T12:34:56Z"])[0] == expected[0] - 789_000_000
+
+
+def test_candle_columns_are_typed():
+    columns = candle_columns(
+        {
+            "candles": [
+                {
+                    "startedAt": "2024-05-01T00:01:00.000Z",
+                    "open": "60001",
+                    "high": "60010.1",
+                    "low": "59990.5",
+                    "close": "60002.25",
+                    "baseTokenVolume": "1.5",
+                    "usdVolume": "90003.37",
+                    "trades": 12,
+                    "startingOpenInterest": "1234.5",
+                },
+                {
+                    "startedAt": "2024-05-01T00:00:00.000Z",
+                    "open": "60000",
+                    "high": "60001",
+                    "low": "59999",
+                    "close": "60001",
+                    "baseTokenVolume": "0",
+                    "usdVolume": "0",
+                    "trades": 0,
+                    "startingOpenInterest": "1234.5",
+                },
+            ]
+        }
+    )
+
+    assert columns["startedAt"].dtype == np.int64
+    assert columns["startedAt"][0] - columns["startedAt"][1] == 60_000_000_000
+    assert columns["close"].dtype == np.float64
+    assert columns["close"].tolist() == [60002.25, 60001.0]
+    assert columns["trades"].tolist() == [12, 0]
+
+
+def test_scaled_prices_and_missing_fields():
+    trades = [
+        {
+            "id": "a",
+            "side": "BUY",
+            "size": "0.001",
+            "price": "60002.25",
+            "type": "LIMIT",
+            "createdAt": "2024-05-01T00:00:00.000Z",
+            "createdAtHeight": "100",
+        },
+        {
+            "id": "b",
+            "side": "SELL",
+            "size": "2",
+            "price": "0.1",
+            "createdAt": "2024-05-01T00:00:01.000Z",
+            "createdAtHeight": "101",
+        },
+    ]
+
+    columns = trade_columns(trades, decimals=6)
+
+    assert columns["price"].tolist() == [60002250000, 100000]
+    assert columns["size"].tolist() == [1000, 2000000]
+    assert columns["createdAtHeight"].tolist() == [100, 101]
+    assert columns["side"].tolist() == ["BUY", "SELL"]
+    assert columns["type"].tolist() == ["LIMIT", None]
+
+
+def test_empty_responses():
+    assert len(funding_columns({"historicalFunding": []})["rate"]) == 0
+    assert len(fill_columns({})["createdAt"]) == 0
+
+
+def test_missing_timestamps_are_nat():
+    timestamps = parse_timestamps(["2024-05-01T00:00:00.000Z", None])
+
+    assert timestamps[1] == np.datetime64("NaT").astype(np.int64)
+
+
+def test_scaled_values_are_exact_beyond_float_precision():
+    trades = [{"price": "12345678901.123456789", "size": "0.0000005"}]
+
+    columns = trade_columns(trades, decimals=8)
+
+    assert columns["price"].dtype == np.int64
+    assert columns["price"].tolist() == [1234567890112345679]
+    assert columns["size"].tolist() == [50]
+
+
+def test_invalid_timestamps_are_rejected():
+    with pytest.raises(ValueError):
+        parse_timestamps(["2024-13-01T00:00:00.000Z"])
+    with pytest.raises(ValueError):
+        parse_timestamps(["2024-05-01T00:0x:00.000Z"])
+    # Other separators are left to `numpy.datetime64`.
+    assert (
+        parse_timestamps(["2024-05-01 00:00:00.000Z"])[0]
+        == parse_timestamps(["2024-05-01T00:00:00.000Z"])[0]
+    )
+
+
+def test_scaled_parse_rounds_half_to_even():
+    values = ["2.5", "3.5", "-2.5", "-0.05", "7", "0.125", "1.0000001", "1e-3"]
+
+    for decimals in (0, 1, 2):
+        assert parse_scaled(values, decimals).tolist() == [
+            scale(value, decimals) for value in values
+        ]
+
+
+def test_decode_json_matches_decoded_items():
+    fills = [
+        {
+            "id": "a",
+            "side": "BUY",
+            "price": "60002.25",
+            "size": "0.1",
+            "createdAt": "2024-05-01T00:00:00.000Z",
+            "createdAtHeight": "100",
+            "subaccountNumber": 0,
+        },
+        {
+            "id": "b",
+            "side": "SELL",
+            "price": "60001",
+            "size": "2",
+            "fee": "0.5",
+            "createdAt": "2024-05-01T00:00:01.000Z",
+            "createdAtHeight": "101",
+            "subaccountNumber": 0,
+        },
+    ]
+    content = json.dumps({"fills": fills, "pageSize": 2, "meta": {"x": 1}})
+
+    columns = decode_json(content, FILL_FIELDS, decimals=2)
+    expected = fill_columns(fills, decimals=2)
+
+    assert columns.keys() == expected.keys()
+    for field in columns:
+        np.testing.assert_array_equal(columns[field], expected[field])
+    assert columns["fee"][1] == 50
+
+
+@pytest.mark.asyncio
+async def test_market_candles_as_columns():
+    body = json.dumps(
+        {
+            "candles": [
+                {"startedAt": "2024-05-01T00:01:00.000Z", "close": "2.5", "trades": 3},
+                {"startedAt": "2024-05-01T00:00:00.000Z", "close": "1", "trades": 0},
+            ]
+        }
+    ).encode()
+
+    async def serve(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+    listener = await asyncio.start_server(serve, "localhost", 0)
+    try:
+        async with MarketsClient(
+            f"http://localhost:{listener.sockets[0].getsockname()[1]}"
+        ) as markets:
+            columns = await markets.get_perpetual_market_candles(
+                "BTC-USD", "1MIN", columnar=True, decimals=1
+            )
+    finally:
+        listener.close()
+
+    assert columns["close"].tolist() == [25, 10]
+    assert columns["trades"].tolist() == [3, 0]
+    assert columns["startedAt"][0] - columns["startedAt"][1] == 60_000_000_000
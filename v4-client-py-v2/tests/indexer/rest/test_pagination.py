@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from dydx_v4_client.indexer.rest.modules.account import AccountClient
+from dydx_v4_client.indexer.rest.modules.markets import MarketsClient
+from dydx_v4_client.indexer.rest.shared.pagination import MAX_PAGE_SIZE, TimeCursor
+
+
+class FakeIndexer:
+    """
+    Serves descending-height items like the indexer, "before or at" the cursor.
+    """
+
+    def __init__(self, field: str, heights, delay: float = 0):
+        self.field = field
+        self.items = [
+            {"id": str(index), "ticker": str(index), "createdAtHeight": str(height)}
+            for index, height in enumerate(heights)
+        ]
+        self.delay = delay
+        self.requests = []
+
+    async def get(self, request_path, params={}):
+        self.requests.append(params)
+        await asyncio.sleep(self.delay)
+        height = params.get("createdBeforeOrAtHeight")
+        page = params.get("page")
+        items = [
+            item
+            for item in self.items
+            if height is None or int(item["createdAtHeight"]) <= height
+        ]
+        if page is not None:
+            items = items[(page - 1) * params["limit"] :]
+        return {self.field: items[: params["limit"]]}
+
+
+def heights():
+    # Several items per height, so pages split heights.
+    return [1000 - index // 3 for index in range(250)]
+
+
+@pytest.mark.asyncio
+async def test_iterates_every_page_without_duplicates():
+    indexer = FakeIndexer("fills", heights())
+    client = AccountClient("http://indexer")
+    client.get = indexer.get
+
+    fills = [
+        fill async for fill in client.iter_subaccount_fills("dydx1", 0, page_size=50)
+    ]
+
+    assert [fill["id"] for fill in fills] == [str(index) for index in range(250)]
+    assert indexer.requests[1]["createdBeforeOrAtHeight"] == 984
+
+
+@pytest.mark.asyncio
+async def test_rereads_height_filling_a_page_with_a_larger_limit():
+    indexer = FakeIndexer("trades", [7] * 10 + [6] * 3)
+    client = MarketsClient("http://indexer")
+    client.get = indexer.get
+
+    trades = [
+        trade
+        async for trade in client.iter_perpetual_market_trades("BTC-USD", page_size=5)
+    ]
+
+    assert [trade["id"] for trade in trades] == [str(index) for index in range(13)]
+    assert [
+        (request.get("createdBeforeOrAtHeight"), request["limit"])
+        for request in indexer.requests
+    ] == [(None, 5), (7, 5), (7, 10), (7, 20)]
+
+
+@pytest.mark.asyncio
+async def test_raises_when_a_height_exceeds_the_largest_page():
+    indexer = FakeIndexer("trades", [7] * (MAX_PAGE_SIZE + 1))
+    client = MarketsClient("http://indexer")
+    client.get = indexer.get
+
+    with pytest.raises(ValueError):
+        async for _ in client.iter_perpetual_market_trades("BTC-USD", page_size=500):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_prefetches_next_page_and_cancels_it_on_exit():
+    indexer = FakeIndexer("transfers", heights(), delay=0.01)
+    client = AccountClient("http://indexer")
+    client.get = indexer.get
+
+    transfers = client.iter_subaccount_transfers("dydx1", 0, page_size=50)
+    await transfers.__anext__()
+    await asyncio.sleep(0)
+    assert len(indexer.requests) == 2
+
+    await transfers.aclose()
+    await asyncio.sleep(0.02)
+    assert len(indexer.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_funding_payments_are_paged_by_number():
+    indexer = FakeIndexer("fundingPayments", heights()[:120])
+    client = AccountClient("http://indexer")
+    client.get = indexer.get
+
+    payments = [
+        payment
+        async for payment in client.iter_funding_payments("dydx1", 0, page_size=50)
+    ]
+
+    assert len(payments) == 120
+    assert [request["page"] for request in indexer.requests] == [None, 2, 3]
+
+
+def test_time_cursor_starts_at_last_timestamp():
+    cursor = TimeCursor("createdAt")
+    items = [
+        {"createdAt": "2024-05-01T00:00:01.000Z"},
+        {"createdAt": "2024-05-01T00:00:00.000Z"},
+    ]
+
+    assert cursor.advance(None, items) == "2024-05-01T00:00:00.000Z"
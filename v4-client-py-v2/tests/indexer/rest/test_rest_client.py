@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dydx_v4_client.indexer.rest.indexer_client import IndexerClient
+from dydx_v4_client.indexer.rest.shared.rest import RestClient
+
+
+class IndexerServer:
+    """
+    Answers every HTTP/1.1 request with an empty JSON object, keeping connections alive.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            self.requests.append(head.split(b" ")[1].decode())
+            body = json.dumps({}).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+
+    async def serve(self, reader, writer):
+        try:
+            await self.handle(reader, writer)
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+
+@pytest.fixture
+async def indexer_server():
+    server = IndexerServer()
+    listener = await asyncio.start_server(server.serve, "localhost", 0)
+    port = listener.sockets[0].getsockname()[1]
+    yield server, f"http://localhost:{port}"
+    listener.close()
+
+
+@pytest.mark.asyncio
+async def test_modules_share_connections(indexer_server):
+    server, host = indexer_server
+
+    async with IndexerClient(host) as indexer:
+        for _ in range(3):
+            await indexer.markets.get_perpetual_markets("BTC-USD")
+            await indexer.utility.get_height()
+            await indexer.account.get_subaccounts("dydx1")
+
+    assert len(server.requests) == 9
+    assert server.connections == 1
+    assert indexer._http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_standalone_client_owns_its_connections(indexer_server):
+    server, host = indexer_server
+
+    async with RestClient(host) as client:
+        await client.get("/v4/height")
+        await client.get("/v4/height")
+
+    assert server.connections == 1
+    assert client.http_client.is_closed
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_client_can_be_used_from_successive_event_loops():
+    server = ThreadingHTTPServer(("localhost", 0), JsonHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    indexer = IndexerClient(f"http://localhost:{server.server_address[1]}")
+
+    async def get_height():
+        async with indexer:
+            height = await indexer.utility.get_height()
+            # No task is left pending, to be destroyed with the loop.
+            assert asyncio.all_tasks() == {asyncio.current_task()}
+            return height
+
+    for _ in range(2):
+        assert asyncio.run(get_height()) == {}
+        assert indexer._http_client.is_closed
+
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_the_clients_of_other_running_loops():
+    indexer = IndexerClient("http://localhost")
+    other_client = []
+    started = threading.Event()
+    stop = threading.Event()
+
+    def run_other_loop():
+        async def main():
+            other_client.append(indexer._http_client.client)
+            started.set()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+
+        asyncio.run(main())
+
+    thread = threading.Thread(target=run_other_loop)
+    thread.start()
+    try:
+        started.wait()
+        client = indexer._http_client.client
+        assert client is not other_client[0]
+
+        await indexer.close()
+        await asyncio.wait_for(asyncio.to_thread(wait_closed, other_client[0]), 1)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert client.is_closed
+    assert indexer._http_client.is_closed
+
+
+def wait_closed(client):
+    while not client.is_closed:
+        threading.Event().wait(0.01)
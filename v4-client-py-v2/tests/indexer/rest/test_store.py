@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.rest.backfill import to_iso
+from dydx_v4_client.indexer.rest.modules.account import AccountClient
+from dydx_v4_client.indexer.rest.modules.markets import MarketsClient
+from dydx_v4_client.indexer.rest.store import HistoryStore
+
+START = datetime(2024, 5, 1)
+ADDRESS = "dydx14zzueazeh0hj67cghhf9jypslcf9sh2n5k6art"
+
+
+class FakeIndexer:
+    """
+    Serves fills and candles from memory, counting the requests.
+    """
+
+    def __init__(self):
+        self.fills = []
+        self.candles = []
+        self.requests = []
+        self.fail_after = None
+        self.account = AccountClient("http://indexer")
+        self.account.get = self.get
+        self.markets = MarketsClient("http://indexer")
+        self.markets.get = self.get
+
+    def add_fills(self, heights):
+        for height in heights:
+            index = len(self.fills)
+            self.fills.append(
+                {
+                    "id": f"fill-{index}",
+                    "createdAtHeight": str(height),
+                    "createdAt": to_iso(START + timedelta(seconds=height)),
+                }
+            )
+
+    def add_candles(self, count: int):
+        for _ in range(count):
+            started_at = START + timedelta(minutes=len(self.candles))
+            self.candles.append({"startedAt": to_iso(started_at), "close": "1"})
+
+    async def get(self, request_path, params={}):
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise ConnectionError("indexer unavailable")
+        self.requests.append((request_path, params))
+        if request_path == "/v4/fills":
+            height = params["createdBeforeOrAtHeight"]
+            fills = [
+                fill
+                for fill in reversed(self.fills)
+                if height is None or int(fill["createdAtHeight"]) <= height
+            ]
+            return {"fills": fills[: params["limit"]]}
+        candles = [
+            candle
+            for candle in reversed(self.candles)
+            if params["fromISO"] <= candle["startedAt"] <= params["toISO"]
+        ]
+        return {"candles": candles[: params["limit"]]}
+
+
+@pytest.fixture
+def indexer():
+    return FakeIndexer()
+
+
+@pytest.mark.asyncio
+async def test_sync_fills_fetches_only_newer_ones(indexer, tmp_path):
+    indexer.add_fills(range(1, 301))
+    with HistoryStore(tmp_path / "history.db", indexer) as store:
+        assert await store.sync_fills(ADDRESS, 0) == 300
+        indexer.add_fills([300, 301, 302])
+        indexer.requests.clear()
+
+        # Fills of the last stored height are fetched again, in case more came.
+        assert await store.sync_fills(ADDRESS, 0) == 4
+        assert len(indexer.requests) == 1
+
+        fills = store.fills(ADDRESS, 0)
+        assert len(fills) == 303
+        assert fills[-1]["id"] == "fill-302"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_first_sync_is_redone(indexer, tmp_path, monkeypatch):
+    monkeypatch.setattr("dydx_v4_client.indexer.rest.store.WRITE_BATCH_SIZE", 50)
+    indexer.add_fills(range(1, 301))
+    indexer.fail_after = 2
+    with HistoryStore(tmp_path / "history.db", indexer) as store:
+        with pytest.raises(ConnectionError):
+            await store.sync_fills(ADDRESS, 0)
+        # The newest fills were stored, but not the older ones.
+        assert 0 < len(store.fills(ADDRESS, 0)) < 300
+        assert store.synced_height("fills", f"{ADDRESS}/0") is None
+
+        indexer.fail_after = None
+        await store.sync_fills(ADDRESS, 0)
+
+        assert len(store.fills(ADDRESS, 0)) == 300
+        assert store.synced_height("fills", f"{ADDRESS}/0") == 300
+
+
+@pytest.mark.asyncio
+async def test_range_queries_read_the_database_only(indexer, tmp_path):
+    path = tmp_path / "history.db"
+    indexer.add_fills(range(1, 101))
+    with HistoryStore(path, indexer) as store:
+        await store.sync_fills(ADDRESS, 0)
+
+    with HistoryStore(path) as store:
+        fills = store.fills(
+            ADDRESS, 0, START + timedelta(seconds=10), START + timedelta(seconds=20)
+        )
+        assert [fill["createdAtHeight"] for fill in fills] == [
+            str(height) for height in range(10, 20)
+        ]
+        assert store.fills(ADDRESS, 1) == []
+
+
+@pytest.mark.asyncio
+async def test_sync_candles_resumes_from_last_candle(indexer, tmp_path):
+    indexer.add_candles(150)
+    with HistoryStore(tmp_path / "history.db", indexer) as store:
+        count = await store.sync_candles(
+            "BTC-USD",
+            CandlesResolution.ONE_MINUTE,
+            since=START,
+            until=START + timedelta(minutes=150),
+        )
+        assert count == 150
+
+        indexer.add_candles(10)
+        indexer.requests.clear()
+        count = await store.sync_candles(
+            "BTC-USD",
+            CandlesResolution.ONE_MINUTE,
+            since=START,
+            until=START + timedelta(minutes=160),
+        )
+
+        # The last stored candle is refreshed, as it may have been open.
+        assert count == 11
+        assert indexer.requests[0][1]["fromISO"] == to_iso(
+            START + timedelta(minutes=149)
+        )
+        candles = store.candles("BTC-USD", CandlesResolution.ONE_MINUTE)
+        assert len(candles) == 160
+
+
+@pytest.mark.asyncio
+async def test_sync_candles_accepts_aware_until(indexer, tmp_path):
+    indexer.add_candles(30)
+    with HistoryStore(tmp_path / "history.db", indexer) as store:
+        count = await store.sync_candles(
+            "BTC-USD",
+            CandlesResolution.ONE_MINUTE,
+            since=START,
+            until=(START + timedelta(minutes=30)).replace(tzinfo=timezone.utc),
+        )
+
+        assert count == 30
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from dydx_v4_client.indexer.rest.indexer_client import IndexerClient
+from dydx_v4_client.indexer.rest.shared.throttling import (
+    RetryPolicy,
+    TokenBucket,
+    retry_after,
+)
+
+FAST_RETRY = RetryPolicy(max_retries=2, base_delay=0.001, max_delay=0.001)
+
+
+class ThrottlingServer:
+    """
+    Answers with the scripted statuses first, then with an empty JSON object.
+    """
+
+    def __init__(self, *statuses: int, retry_after: str = "0"):
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.request_times = []
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                self.request_times.append(time.monotonic())
+                status = self.statuses.pop(0) if self.statuses else 200
+                writer.write(
+                    f"HTTP/1.1 {status} Status\r\nRetry-After: {self.retry_after}\r\n"
+                    "Content-Type: application/json\r\nContent-Length: 2\r\n\r\n{}".encode()
+                )
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+
+async def start(server: ThrottlingServer) -> str:
+    listener = await asyncio.start_server(server.serve, "localhost", 0)
+    return f"http://localhost:{listener.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.asyncio
+async def test_throttled_requests_are_retried():
+    server = ThrottlingServer(429, 503)
+    async with IndexerClient(await start(server), retry=FAST_RETRY) as indexer:
+        assert await indexer.utility.get_height() == {}
+
+    assert len(server.request_times) == 3
+    assert indexer.metrics.throttled == 1
+    assert indexer.metrics.retried == 2
+    assert indexer.metrics.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_last_retry():
+    server = ThrottlingServer(429, 429, 429, 429)
+    async with IndexerClient(await start(server), retry=FAST_RETRY) as indexer:
+        with pytest.raises(httpx.HTTPStatusError):
+            await indexer.markets.get_perpetual_markets()
+
+    assert len(server.request_times) == 3
+    assert indexer.metrics.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_are_not_retried_by_default():
+    server = ThrottlingServer(429)
+    async with IndexerClient(await start(server)) as indexer:
+        with pytest.raises(httpx.HTTPStatusError):
+            await indexer.utility.get_height()
+
+    assert len(server.request_times) == 1
+    assert indexer.metrics.retried == 0
+
+
+async def wait_throttled(indexer: IndexerClient):
+    while not indexer.metrics.throttled:
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_holds_back_every_module():
+    server = ThrottlingServer(429, retry_after="0.2")
+    async with IndexerClient(
+        await start(server), rate_limit=100, retry=FAST_RETRY
+    ) as indexer:
+        throttled = asyncio.ensure_future(indexer.utility.get_height())
+        await asyncio.wait_for(wait_throttled(indexer), 5)
+        await asyncio.gather(throttled, indexer.markets.get_perpetual_markets())
+
+    first, *others = server.request_times
+    assert len(others) == 2
+    assert all(later - first >= 0.15 for later in others)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_shared_by_modules():
+    server = ThrottlingServer()
+    async with IndexerClient(await start(server), rate_limit=50, burst=1) as indexer:
+        await indexer.utility.get_height()  # Opens the connection pool.
+        await asyncio.gather(
+            *(indexer.utility.get_height() for _ in range(3)),
+            *(indexer.markets.get_perpetual_markets() for _ in range(3)),
+        )
+
+    # The span of the requests, as single intervals vary with the scheduling.
+    times = server.request_times[1:]
+    assert times[-1] - times[0] >= 5 * 0.02 * 0.8
+    assert indexer.metrics.requests == 7
+    assert indexer.metrics.queued >= 5
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_bursts():
+    bucket = TokenBucket(rate=10, burst=3)
+
+    waits = [await bucket.acquire() for _ in range(4)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.1, abs=0.02)
+
+
+def test_retry_after_seconds_and_dates():
+    request = httpx.Request("GET", "http://indexer")
+
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "2"})) == 2
+    date = httpx.Response(
+        429,
+        headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"},
+        request=request,
+    )
+    assert retry_after(date) == 0
+    assert retry_after(httpx.Response(429)) is None
@@ -0,0 +1,399 @@
+import asyncio
+import base64
+import hashlib
+import json
+import ssl
+import struct
+
+import pytest
+from websocket import ABNF
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.socket.aio import (
+    MESSAGE_TOO_BIG,
+    WEBSOCKET_GUID,
+    AsyncIndexerSocket,
+    WebSocketClosed,
+    WebSocketConnection,
+)
+
+
+class FakeIndexerSocketServer:
+    """
+    A websocket server replying like the indexer: "connected", then "subscribed"
+    and one update per subscription, and "unsubscribed". Messages are split into
+    two frames. With `drop`, the first connection is dropped after an update, and
+    the `message_id`s in `skip` are never sent.
+    """
+
+    def __init__(self):
+        self.received = []
+        self.pongs = []
+        self.connections = 0
+        self.drop = False
+        self.skip = set()
+        self.message_ids = {}
+
+    async def send(self, writer, message):
+        message_id = self.message_ids.get(writer, 0)
+        if message_id in self.skip:
+            self.skip.discard(message_id)
+            message_id += 1
+        self.message_ids[writer] = message_id + 1
+        payload = json.dumps({**message, "message_id": message_id}).encode()
+        middle = len(payload) // 2
+        writer.write(
+            ABNF(
+                0, opcode=ABNF.OPCODE_TEXT, mask_value=0, data=payload[:middle]
+            ).format()
+            + ABNF(
+                1, opcode=ABNF.OPCODE_CONT, mask_value=0, data=payload[middle:]
+            ).format()
+        )
+        await writer.drain()
+
+    async def read_frame(self, reader):
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        mask = await reader.readexactly(4)
+        return first & 0x0F, ABNF.mask(mask, await reader.readexactly(length))
+
+    async def serve(self, reader, writer):
+        try:
+            await self.handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def handle(self, reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        key = next(
+            line.split(":")[1].strip()
+            for line in head.split("\r\n")
+            if line.lower().startswith("sec-websocket-key")
+        )
+        accept = base64.b64encode(
+            hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        self.connections += 1
+        await self.send(
+            writer, {"type": "connected", "connection_id": str(self.connections)}
+        )
+        writer.write(
+            ABNF(1, opcode=ABNF.OPCODE_PING, mask_value=0, data=b"hi").format()
+        )
+        while True:
+            opcode, payload = await self.read_frame(reader)
+            if opcode == ABNF.OPCODE_PONG:
+                self.pongs.append(payload)
+                continue
+            if opcode == ABNF.OPCODE_PING:
+                # Left unanswered, as by a half-open connection.
+                continue
+            if opcode == ABNF.OPCODE_CLOSE:
+                writer.close()
+                return
+            message = json.loads(payload)
+            self.received.append(message)
+            reply = {"channel": message["channel"], "id": message.get("id")}
+            if message["type"] == "unsubscribe":
+                await self.send(writer, {"type": "unsubscribed", **reply})
+                continue
+            await self.send(writer, {"type": "subscribed", **reply, "contents": {}})
+            await self.send(
+                writer,
+                {"type": "channel_data", **reply, "contents": {"x": "y" * 200}},
+            )
+            if self.drop and self.connections == 1:
+                writer.close()
+                return
+
+
+@pytest.fixture
+async def socket_url():
+    server = FakeIndexerSocketServer()
+    listener = await asyncio.start_server(server.serve, "localhost", 0)
+    yield server, f"ws://localhost:{listener.sockets[0].getsockname()[1]}/v4/ws"
+    listener.close()
+
+
+@pytest.mark.asyncio
+async def test_subscribes_and_iterates_messages(socket_url):
+    server, url = socket_url
+    messages = []
+
+    async with AsyncIndexerSocket(url) as socket:
+        async for message in socket:
+            messages.append(message)
+            if message["type"] == "connected":
+                channel = await socket.candles.subscribe(
+                    "ETH-USD", CandlesResolution.ONE_MINUTE
+                )
+                assert channel is socket.candles
+            elif message["type"] == "channel_data":
+                await socket.candles.unsubscribe(
+                    "ETH-USD", CandlesResolution.ONE_MINUTE
+                )
+            elif message["type"] == "unsubscribed":
+                break
+
+    assert [message["type"] for message in messages] == [
+        "connected",
+        "subscribed",
+        "channel_data",
+        "unsubscribed",
+    ]
+    assert messages[2]["id"] == "ETH-USD/1MIN"
+    assert server.received[0] == {
+        "type": "subscribe",
+        "channel": "v4_candles",
+        "id": "ETH-USD/1MIN",
+        "batched": True,
+    }
+    assert server.received[1]["type"] == "unsubscribe"
+    assert server.pongs == [b"hi"]
+    assert socket.candles.subscriptions == {}
+
+
+@pytest.mark.asyncio
+async def test_iteration_ends_when_closed(socket_url):
+    server, url = socket_url
+    socket = await AsyncIndexerSocket(url).connect()
+
+    assert (await socket.recv())["type"] == "connected"
+    await socket.close()
+
+    assert [message async for message in socket] == []
+
+
+@pytest.mark.asyncio
+async def test_reconnects_and_replays_subscriptions(socket_url):
+    server, url = socket_url
+    server.drop = True
+    messages = []
+
+    async with AsyncIndexerSocket(url, reconnect_delay=0.01) as socket:
+        async for message in socket:
+            messages.append(message)
+            if message["type"] == "connected":
+                # Active subscriptions are not sent again on reconnection.
+                await socket.markets.subscribe()
+                await socket.trades.subscribe("ETH-USD")
+            elif message["type"] == "channel_data" and len(messages) > 6:
+                break
+
+    assert [message["type"] for message in messages] == [
+        "connected",
+        "subscribed",
+        "channel_data",
+        "resynced",
+        "connected",
+        "subscribed",
+        "channel_data",
+    ]
+    assert messages[3]["subscriptions"] == 2
+    assert socket.reconnects == 1
+    assert server.connections == 2
+    assert server.received[0] == {
+        "type": "subscribe",
+        "channel": "v4_markets",
+        "batched": True,
+    }
+    # The subscription sent as the connection dropped is replayed too.
+    assert server.received[-2:] == [
+        {"type": "subscribe", "channel": "v4_trades", "id": "ETH-USD", "batched": True},
+        server.received[0],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_does_not_reconnect_when_disabled(socket_url):
+    server, url = socket_url
+    server.drop = True
+
+    async with AsyncIndexerSocket(url, reconnect=False) as socket:
+        await socket.markets.subscribe()
+        messages = [message["type"] async for message in socket]
+
+    assert messages == ["connected", "subscribed", "channel_data"]
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_gap_renews_stateful_subscriptions(socket_url):
+    server, url = socket_url
+    server.skip = {3}
+    messages = []
+
+    async with AsyncIndexerSocket(url) as socket:
+        await socket.order_book.subscribe("ETH-USD")
+        await socket.trades.subscribe("ETH-USD")
+        async for message in socket:
+            messages.append((message["type"], message.get("channel")))
+            if len(messages) == 8:
+                break
+
+    # Only the order book, rebuilt from updates, is renewed for a new snapshot.
+    assert messages == [
+        ("connected", None),
+        ("subscribed", "v4_orderbook"),
+        ("channel_data", "v4_orderbook"),
+        ("subscribed", "v4_trades"),
+        ("channel_data", "v4_trades"),
+        ("unsubscribed", "v4_orderbook"),
+        ("subscribed", "v4_orderbook"),
+        ("channel_data", "v4_orderbook"),
+    ]
+    assert server.received[2:] == [
+        {"type": "unsubscribe", "channel": "v4_orderbook", "id": "ETH-USD"},
+        {
+            "type": "subscribe",
+            "channel": "v4_orderbook",
+            "id": "ETH-USD",
+            "batched": True,
+        },
+    ]
+    assert socket.sequence.gaps == 1
+    assert socket.sequence.resyncs == 1
+
+
+@pytest.mark.asyncio
+async def test_run_dispatches_to_subscription_handlers(socket_url):
+    server, url = socket_url
+    trades, other = [], []
+
+    async def on_trades(message):
+        trades.append(message["type"])
+        if message["type"] == "channel_data":
+            await socket.close()
+
+    async with AsyncIndexerSocket(url) as socket:
+        await socket.trades.subscribe("ETH-USD", handler=on_trades)
+        await socket.run(on_message=lambda message: other.append(message["type"]))
+
+    assert trades == ["subscribed", "channel_data"]
+    assert other == ["connected"]
+
+
+class BrokenWriter:
+    """
+    A stream writer whose connection was reset.
+    """
+
+    def __init__(self):
+        self.closed = False
+
+    def writelines(self, data):
+        pass
+
+    async def drain(self):
+        raise ConnectionResetError()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_failed_pong_closes_the_connection():
+    reader = asyncio.StreamReader()
+    reader.feed_data(
+        ABNF(1, opcode=ABNF.OPCODE_PING, mask_value=0, data=b"hi").format()
+    )
+    writer = BrokenWriter()
+    connection = WebSocketConnection(reader, writer)
+
+    with pytest.raises(WebSocketClosed):
+        await connection.recv()
+
+    assert connection.closed
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_handshake_times_out():
+    async def silent(reader, writer):
+        await reader.read()
+
+    listener = await asyncio.start_server(silent, "localhost", 0)
+    url = f"ws://localhost:{listener.sockets[0].getsockname()[1]}/v4/ws"
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await AsyncIndexerSocket(url, open_timeout=0.05).connect()
+    finally:
+        listener.close()
+
+
+class RecordingWriter(BrokenWriter):
+    """
+    A stream writer keeping what was written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.written = []
+
+    def writelines(self, data):
+        self.written.extend(data)
+
+    async def drain(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_oversized_message_closes_the_connection():
+    reader = asyncio.StreamReader()
+    reader.feed_data(
+        ABNF(1, opcode=ABNF.OPCODE_TEXT, mask_value=0, data=b"x" * 100).format()
+    )
+    writer = RecordingWriter()
+    connection = WebSocketConnection(reader, writer, ping_interval=None, max_size=10)
+
+    with pytest.raises(WebSocketClosed):
+        await connection.recv()
+
+    assert writer.closed
+    assert ABNF.mask(writer.written[0][2:6], writer.written[0][6:]) == struct.pack(
+        "!H", MESSAGE_TOO_BIG
+    )
+
+
+@pytest.mark.asyncio
+async def test_tls_failure_closes_the_connection():
+    class FailingReader:
+        async def readexactly(self, n):
+            raise ssl.SSLError("decryption failed or bad record mac")
+
+    writer = RecordingWriter()
+    connection = WebSocketConnection(FailingReader(), writer, ping_interval=None)
+
+    with pytest.raises(WebSocketClosed):
+        await connection.recv()
+
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_unresponsive_connection_is_closed(socket_url):
+    _, url = socket_url
+    connection = await WebSocketConnection.open(
+        url, ping_interval=0.05, ping_timeout=0.05
+    )
+    assert json.loads(await connection.recv())["type"] == "connected"
+
+    with pytest.raises(WebSocketClosed):
+        await asyncio.wait_for(connection.recv(), 1)
+
+
+@pytest.mark.asyncio
+async def test_failed_subscription_is_not_tracked():
+    socket = AsyncIndexerSocket("ws://localhost/v4/ws")
+
+    with pytest.raises(WebSocketClosed):
+        await socket.trades.subscribe("ETH-USD")
+
+    assert socket.trades.subscriptions == {}
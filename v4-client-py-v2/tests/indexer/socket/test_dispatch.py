@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from websocket import WebSocketConnectionClosedException
+
+from dydx_v4_client.indexer.candles_resolution import CandlesResolution
+from dydx_v4_client.indexer.socket.websocket import IndexerSocket
+
+
+def socket(on_message=None):
+    socket = IndexerSocket("ws://indexer", on_message=on_message)
+    socket.send = lambda text: None
+    return socket
+
+
+def receive(socket, message):
+    socket.on_message(socket, json.dumps(message))
+
+
+def test_messages_go_to_their_subscription_handler():
+    eth, btc, other = [], [], []
+    indexer_socket = socket(on_message=lambda ws, message: other.append(message))
+    indexer_socket.trades.subscribe("ETH-USD", handler=eth.append)
+    indexer_socket.candles.subscribe(
+        "BTC-USD", CandlesResolution.ONE_MINUTE, handler=btc.append
+    )
+
+    receive(indexer_socket, {"type": "connected"})
+    receive(
+        indexer_socket,
+        {"type": "channel_data", "channel": "v4_trades", "id": "ETH-USD"},
+    )
+    receive(
+        indexer_socket,
+        {"type": "channel_data", "channel": "v4_candles", "id": "BTC-USD/1MIN"},
+    )
+    receive(
+        indexer_socket,
+        {"type": "channel_data", "channel": "v4_trades", "id": "SOL-USD"},
+    )
+
+    assert [message["id"] for message in eth] == ["ETH-USD"]
+    assert [message["id"] for message in btc] == ["BTC-USD/1MIN"]
+    assert [message.get("id") for message in other] == [None, "SOL-USD"]
+
+
+def test_unsubscribing_removes_the_handler():
+    handled, other = [], []
+    indexer_socket = socket(on_message=lambda ws, message: other.append(message))
+    indexer_socket.markets.subscribe(handler=handled.append)
+    message = {"type": "channel_data", "channel": "v4_markets"}
+
+    receive(indexer_socket, message)
+    indexer_socket.markets.unsubscribe()
+    receive(indexer_socket, message)
+
+    assert handled == [message]
+    assert other == [message]
+
+
+def test_process_reports_unhandled_messages():
+    indexer_socket = socket()
+    handled = []
+    indexer_socket.subaccounts.subscribe("dydx1", 0, handler=handled.append)
+
+    assert indexer_socket.subaccounts.process({"id": "dydx1/0"})
+    assert not indexer_socket.subaccounts.process({"id": "dydx1/1"})
+    assert handled == [{"id": "dydx1/0"}]
+
+
+def test_failed_subscription_is_not_tracked():
+    indexer_socket = socket()
+    indexer_socket.trades.subscribe("ETH-USD")
+
+    def closed(text):
+        raise WebSocketConnectionClosedException()
+
+    indexer_socket.send = closed
+    with pytest.raises(WebSocketConnectionClosedException):
+        indexer_socket.trades.subscribe("BTC-USD", handler=print)
+
+    assert list(indexer_socket.trades.subscriptions) == ["ETH-USD"]
+    assert "BTC-USD" not in indexer_socket.trades.handlers
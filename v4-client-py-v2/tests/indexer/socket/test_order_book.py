@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+from dydx_v4_client.indexer.socket.order_book import (
+    BookSide,
+    LocalOrderBook,
+    OrderBooks,
+)
+from dydx_v4_client.indexer.socket.websocket import MessageSequence, OrderBook
+
+SNAPSHOT = {
+    "type": "subscribed",
+    "channel": "v4_orderbook",
+    "id": "ETH-USD",
+    "contents": {
+        "bids": [
+            {"price": "1999", "size": "2"},
+            {"price": "2000", "size": "1"},
+            {"price": "1998", "size": "5"},
+        ],
+        "asks": [
+            {"price": "2002", "size": "3"},
+            {"price": "2001", "size": "1.5"},
+        ],
+    },
+}
+
+
+def book() -> LocalOrderBook:
+    book = LocalOrderBook("ETH-USD")
+    book.apply(SNAPSHOT)
+    return book
+
+
+def test_snapshot_sets_sorted_levels():
+    order_book = book()
+
+    assert order_book.synced
+    assert order_book.best_bid == (Decimal("2000"), Decimal("1"))
+    assert order_book.best_ask == (Decimal("2001"), Decimal("1.5"))
+    assert order_book.bids.top(2) == [
+        (Decimal("2000"), Decimal("1")),
+        (Decimal("1999"), Decimal("2")),
+    ]
+    assert [price for price, _ in order_book.asks] == [
+        Decimal("2001"),
+        Decimal("2002"),
+    ]
+    assert order_book.spread == Decimal("1")
+    assert order_book.mid == Decimal("2000.5")
+    assert not order_book.is_crossed
+
+
+def test_updates_set_and_remove_levels():
+    order_book = book()
+
+    order_book.apply(
+        {
+            "type": "channel_batch_data",
+            "id": "ETH-USD",
+            "contents": [
+                {"bids": [["2000", "0"]]},
+                {"bids": [["1999.5", "4"]], "asks": [["2001", "2"]]},
+            ],
+        }
+    )
+    order_book.apply(
+        {"type": "channel_data", "id": "ETH-USD", "contents": {"asks": [["2003", "1"]]}}
+    )
+
+    assert order_book.best_bid == (Decimal("1999.5"), Decimal("4"))
+    assert order_book.best_ask == (Decimal("2001"), Decimal("2"))
+    assert len(order_book.bids) == 3
+    assert len(order_book.asks) == 3
+
+
+def test_removing_missing_level_is_ignored():
+    side = BookSide(descending=False)
+    side.update(Decimal("1"), Decimal("0"))
+
+    assert len(side) == 0
+    assert side.best is None
+    assert side.top(3) == []
+
+
+def test_depth_queries():
+    order_book = book()
+
+    assert order_book.asks.price_for_size(Decimal("2")) == Decimal("2002")
+    assert order_book.asks.vwap(Decimal("3")) == Decimal("2001.5")
+    assert order_book.asks.vwap(Decimal("10")) is None
+    assert order_book.bids.price_for_size(Decimal("1")) == Decimal("2000")
+    assert order_book.bids.size_within(Decimal("1999")) == Decimal("3")
+    assert order_book.asks.size_within(Decimal("2001.5")) == Decimal("1.5")
+
+
+def test_detects_crossed_book():
+    order_book = book()
+    order_book.apply(
+        {"type": "channel_data", "id": "ETH-USD", "contents": {"bids": [["2001", "1"]]}}
+    )
+
+    assert order_book.is_crossed
+
+
+def test_order_books_route_and_resync():
+    books = OrderBooks()
+
+    assert books.process({"type": "connected"}) is None
+    assert books.process(SNAPSHOT) is books["ETH-USD"]
+    assert books.process({"type": "channel_data", "channel": "v4_trades"}) is None
+
+    books.process({"type": "resynced", "subscriptions": 1})
+    assert not books["ETH-USD"].synced
+    books.process(SNAPSHOT)
+    assert books["ETH-USD"].synced
+
+    books.process({"type": "unsubscribed", "channel": "v4_orderbook", "id": "ETH-USD"})
+    assert "ETH-USD" not in books
+
+
+def test_gap_marks_books_out_of_sync():
+    channel = OrderBook(app=None)
+    channel.subscriptions["ETH-USD"] = {"id": "ETH-USD", "batched": True}
+    sequence = MessageSequence([channel])
+    books = OrderBooks(sequence)
+
+    def receive(message):
+        sequence.check(message)
+        return books.process(message)
+
+    receive({"type": "connected", "message_id": 0})
+    receive({**SNAPSHOT, "message_id": 1})
+    assert books["ETH-USD"].synced
+
+    receive({"type": "channel_data", "channel": "v4_trades", "message_id": 3})
+    assert not books["ETH-USD"].synced
+    receive({"type": "channel_data", "channel": "v4_trades", "message_id": 4})
+    assert not books["ETH-USD"].synced
+
+    receive({**SNAPSHOT, "message_id": 5})
+    assert books["ETH-USD"].synced
@@ -0,0 +1,101 @@
+import json
+
+from dydx_v4_client.indexer.socket.websocket import IndexerSocket, MessageSequence
+
+
+def socket():
+    socket = IndexerSocket("ws://indexer", on_message=lambda ws, message: None)
+    socket.sent = []
+    socket.send = lambda text: socket.sent.append(json.loads(text))
+    return socket
+
+
+def message(message_id, type="channel_data", channel="v4_orderbook", id="ETH-USD"):
+    return {"type": type, "channel": channel, "id": id, "message_id": message_id}
+
+
+def test_consecutive_messages_pass():
+    indexer_socket = socket()
+    indexer_socket.order_book.subscribe("ETH-USD")
+    sequence = indexer_socket.sequence
+
+    assert sequence.check({"type": "connected", "message_id": 0}) == []
+    assert sequence.check(message(1, "subscribed")) == []
+    assert sequence.check(message(2)) == []
+    assert sequence.check({"type": "resynced"}) == []
+    assert sequence.gaps == 0
+
+
+def test_gap_renews_each_stateful_subscription_once():
+    indexer_socket = socket()
+    indexer_socket.order_book.subscribe("ETH-USD")
+    indexer_socket.order_book.subscribe("BTC-USD")
+    indexer_socket.trades.subscribe("ETH-USD")
+    indexer_socket.subaccounts.subscribe("dydx1", 0)
+    sequence = indexer_socket.sequence
+    sequence.check({"type": "connected", "message_id": 0})
+
+    renewed = sequence.check(message(2))
+
+    assert [(channel.channel, id) for channel, id in renewed] == [
+        ("v4_orderbook", "ETH-USD"),
+        ("v4_orderbook", "BTC-USD"),
+        ("v4_subaccounts", "dydx1/0"),
+    ]
+    # Pending renewals are not repeated, until their snapshot arrives.
+    assert [id for _, id in sequence.check(message(1))] == []
+    sequence.check(message(2, "subscribed"))
+    assert [id for _, id in sequence.check(message(5))] == ["ETH-USD"]
+    assert sequence.gaps == 3
+    assert sequence.resyncs == 4
+
+
+def test_new_connection_restarts_numbering():
+    sequence = MessageSequence([])
+    sequence.check({"type": "connected", "message_id": 0})
+    sequence.check(message(1))
+
+    assert sequence.check({"type": "connected", "message_id": 0}) == []
+    assert sequence.check(message(1)) == []
+    assert sequence.gaps == 0
+
+
+def test_gap_resubscribes_on_message():
+    received = []
+    indexer_socket = IndexerSocket(
+        "ws://indexer", on_message=lambda ws, message: received.append(message)
+    )
+    sent = []
+    indexer_socket.send = lambda text: sent.append(json.loads(text))
+    indexer_socket.order_book.subscribe("ETH-USD")
+    on_message = indexer_socket.on_message
+
+    on_message(indexer_socket, json.dumps({"type": "connected", "message_id": 0}))
+    on_message(indexer_socket, json.dumps(message(4)))
+
+    assert len(received) == 2
+    assert sent[1:] == [
+        {"type": "unsubscribe", "channel": "v4_orderbook", "id": "ETH-USD"},
+        {
+            "type": "subscribe",
+            "channel": "v4_orderbook",
+            "id": "ETH-USD",
+            "batched": True,
+        },
+    ]
+
+
+def test_unsubscribing_discards_pending_renewal():
+    indexer_socket = socket()
+    indexer_socket.order_book.subscribe("ETH-USD")
+    sequence = indexer_socket.sequence
+    sequence.check({"type": "connected", "message_id": 0})
+    sequence.check(message(2))
+
+    # The unsubscription of the renewal itself keeps it pending.
+    sequence.check(message(3, "unsubscribed"))
+    assert sequence.pending == {("v4_orderbook", "ETH-USD")}
+
+    indexer_socket.order_book.unsubscribe("ETH-USD")
+    sequence.check(message(4, "unsubscribed"))
+    assert sequence.pending == set()
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import grpc
+import pytest
+from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
+from v4_proto.cosmos.base.tendermint.v1beta1 import (
+    query_pb2_grpc as tendermint_query_grpc,
+)
+
+from dydx_v4_client.network import local_node, make_insecure_aio
+from dydx_v4_client.node.client import NodeClient
+
+ROUND_TRIP_SECS = 0.2
+CONCURRENT_CALLS = 50
+
+
+class SlowTendermintService(tendermint_query_grpc.ServiceServicer):
+    async def GetLatestBlock(self, request, context):
+        await asyncio.sleep(ROUND_TRIP_SECS)
+        response = tendermint_query.GetLatestBlockResponse()
+        response.block.header.height = 42
+        return response
+
+
+@pytest.fixture
+async def aio_node_client():
+    server = grpc.aio.server()
+    tendermint_query_grpc.add_ServiceServicer_to_server(SlowTendermintService(), server)
+    port = server.add_insecure_port("localhost:0")
+    await server.start()
+
+    network = make_insecure_aio(
+        local_node,
+        rest_indexer="",
+        websocket_indexer="",
+        node_url=f"localhost:{port}",
+    )
+    yield await NodeClient.connect(network.node)
+
+    await network.node.channel.close()
+    await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_aio_query(aio_node_client):
+    assert await aio_node_client.latest_block_height() == 42
+
+
+@pytest.mark.asyncio
+async def test_aio_queries_overlap(aio_node_client):
+    await aio_node_client.latest_block_height()
+
+    start = time.perf_counter()
+    heights = await asyncio.gather(
+        *(aio_node_client.latest_block_height() for _ in range(CONCURRENT_CALLS))
+    )
+    elapsed = time.perf_counter() - start
+
+    assert heights == [42] * CONCURRENT_CALLS
+    assert elapsed < ROUND_TRIP_SECS * 5
@@ -0,0 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from v4_proto.cosmos.tx.v1beta1.tx_pb2 import AuthInfo, Fee, Tx, TxBody
+
+from dydx_v4_client.key_pair import KeyPair
+from dydx_v4_client.node.builder import (
+    DEFAULT_FEE,
+    Builder,
+    TxOptions,
+    as_any,
+    get_signature,
+    get_signer_info,
+)
+from dydx_v4_client.node.message import send_token
+from dydx_v4_client.wallet import Wallet
+from tests.conftest import DYDX_TEST_PRIVATE_KEY, RECIPIENT, TEST_ADDRESS
+
+
+def legacy_build(builder, wallet, message, sequence, account_number, fee=DEFAULT_FEE):
+    body = TxBody(messages=[as_any(message)], memo=builder.memo)
+    auth_info = AuthInfo(
+        signer_infos=[get_signer_info(wallet.public_key, sequence)],
+        fee=fee,
+    )
+    signature = get_signature(
+        wallet.key, body, auth_info, account_number, builder.chain_id
+    )
+    return Tx(body=body, auth_info=auth_info, signatures=[signature])
+
+
+@pytest.fixture
+def builder():
+    return Builder("dydx-testnet-4", "adv4tnt")
+
+
+@pytest.fixture
+def message():
+    return send_token(TEST_ADDRESS, RECIPIENT, 1000, "adv4tnt")
+
+
+@pytest.mark.parametrize(
+    "account_number, sequence", [(0, 0), (0, 7), (12345, 0), (12345, 300)]
+)
+def test_build_matches_legacy_encoding(builder, message, account_number, sequence):
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), account_number, sequence)
+
+    transaction = builder.build(wallet, message)
+
+    expected = legacy_build(builder, wallet, message, sequence, account_number)
+    assert transaction.SerializeToString() == expected.SerializeToString()
+
+
+@pytest.mark.parametrize("fee", [Fee(), None])
+def test_build_matches_legacy_encoding_of_empty_fee(builder, message, fee):
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 1, 1)
+
+    transaction = builder.build_transaction(wallet, [as_any(message)], fee)
+
+    expected = legacy_build(builder, wallet, message, 1, 1, fee)
+    assert transaction.SerializeToString() == expected.SerializeToString()
+
+
+def test_signing_context_is_reused(builder, message):
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 3, 0)
+
+    builder.build(wallet, message)
+    context = builder.signing_context(wallet)
+    wallet.sequence = 1
+    transaction = builder.build(wallet, message)
+
+    assert builder.signing_context(wallet) is context
+    assert transaction.auth_info.signer_infos[0].sequence == 1
+
+
+def test_tx_options_select_account(builder, message):
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 3, 5)
+    tx_options = TxOptions(authenticators=[1], sequence=9, account_number=4)
+
+    transaction = builder.build(wallet, message, tx_options=tx_options)
+
+    assert transaction.auth_info.signer_infos[0].sequence == 9
+    assert len(transaction.body.non_critical_extension_options) == 1
+    assert transaction.signatures[0] == get_signature(
+        wallet.key, transaction.body, transaction.auth_info, 4, builder.chain_id
+    )
+
+
+def bulk_transactions(message):
+    key_pairs = [KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), KeyPair.from_hex("01" * 32)]
+    return [
+        (Wallet(key_pairs[index % 2], index % 2, 0), [message] * (1 + index % 3), index)
+        for index in range(10)
+    ]
+
+
+def test_build_many_matches_build(builder, message):
+    transactions = bulk_transactions(message)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        built = builder.build_many(transactions, executor=executor, chunk_size=3)
+
+    expected = [
+        builder.build_transaction(
+            wallet, [as_any(message) for message in messages], DEFAULT_FEE, None, seq
+        ).SerializeToString()
+        for wallet, messages, seq in transactions
+    ]
+    assert built == expected
+
+
+def test_build_many_reuses_thread_pool(builder, message):
+    transactions = bulk_transactions(message)
+
+    try:
+        built = builder.build_many(transactions, chunk_size=3)
+        executor = builder.executor()
+        assert builder.build_many(transactions[:2]) == built[:2]
+        assert builder.executor() is executor
+        assert isinstance(executor, ThreadPoolExecutor)
+    finally:
+        builder.close()
+
+    expected = [
+        builder.build_transaction(
+            wallet, [as_any(message) for message in messages], DEFAULT_FEE, None, seq
+        ).SerializeToString()
+        for wallet, messages, seq in transactions
+    ]
+    assert built == expected
+
+
+def test_build_many_with_tx_options(builder, message):
+    transactions = bulk_transactions(message)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        built = builder.build_many(
+            transactions,
+            executor=executor,
+            tx_options=TxOptions(authenticators=[1], sequence=None, account_number=4),
+        )
+
+    expected = [
+        builder.build_transaction(
+            wallet,
+            [as_any(message) for message in messages],
+            DEFAULT_FEE,
+            TxOptions(authenticators=[1], sequence=seq, account_number=4),
+        ).SerializeToString()
+        for wallet, messages, seq in transactions
+    ]
+    assert built == expected
+
+
+def test_build_many_rejects_tx_options_sequence(builder, message):
+    with pytest.raises(ValueError):
+        builder.build_many(
+            bulk_transactions(message),
+            tx_options=TxOptions(authenticators=[1], sequence=3, account_number=4),
+        )
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+
+import grpc
+import pytest
+from v4_proto.cosmos.base.abci.v1beta1.abci_pb2 import TxResponse
+from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
+from v4_proto.cosmos.base.tendermint.v1beta1.types_pb2 import Block
+from v4_proto.cosmos.tx.v1beta1.service_pb2 import BroadcastTxResponse, GetTxResponse
+from v4_proto.cosmos.tx.v1beta1.tx_pb2 import Tx
+
+from dydx_v4_client import OrderFlags
+from dydx_v4_client.network import NodeConfig
+from dydx_v4_client.node.builder import Builder
+from dydx_v4_client.node.client import NodeClient
+from dydx_v4_client.node.confirmation import ConfirmationTracker, tx_hash
+from dydx_v4_client.node.message import cancel_order, order_id, send_token
+from dydx_v4_client.wallet import Wallet
+from tests.conftest import (
+    RECIPIENT,
+    TEST_ADDRESS,
+    TEST_CLOB_PAIR_ID,
+)
+
+POLL_INTERVAL = 0.01
+
+
+class FakeChain:
+    """
+    Produces a block on every `mine`, serving them like the tendermint service.
+    """
+
+    def __init__(self, height: int = 100):
+        self.blocks = {height: []}
+        self.height = height
+        self.block_queries = 0
+
+    def mine(self, *transactions: bytes):
+        self.height += 1
+        self.blocks[self.height] = list(transactions)
+
+    def response(self, height: int):
+        block = Block()
+        block.header.height = height
+        block.data.txs.extend(self.blocks[height])
+        return tendermint_query.GetBlockByHeightResponse(sdk_block=block)
+
+    async def latest_block(self):
+        self.block_queries += 1
+        return self.response(self.height)
+
+    async def get_block_by_height(self, height: int):
+        self.block_queries += 1
+        return self.response(height)
+
+
+class FakeServiceStub:
+    def __init__(self, chain: FakeChain):
+        self.chain = chain
+
+    async def BroadcastTx(self, request):
+        return BroadcastTxResponse(tx_response=TxResponse(code=0))
+
+    async def GetTx(self, request):
+        for height, transactions in self.chain.blocks.items():
+            for tx_bytes in transactions:
+                if tx_hash(tx_bytes) == request.hash.upper():
+                    return GetTxResponse(
+                        tx=Tx.FromString(tx_bytes),
+                        tx_response=TxResponse(height=height),
+                    )
+        raise grpc.RpcError()
+
+
+class FakeNodeClient(NodeClient):
+    chain: FakeChain = None
+
+    def stub(self, stub_type):
+        return FakeServiceStub(self.chain)
+
+    async def latest_block(self):
+        return await self.chain.latest_block()
+
+    async def get_block_by_height(self, height: int):
+        return await self.chain.get_block_by_height(height)
+
+
+def transfer(wallet: Wallet, sequence: int):
+    message = send_token(TEST_ADDRESS, RECIPIENT, 1000, "adv4tnt")
+    return Builder("dydx-testnet-4", "adv4tnt").build(
+        wallet, message, sequence=sequence
+    )
+
+
+def test_tx_hash_is_upper_case_sha256():
+    assert tx_hash(b"tx") == hashlib.sha256(b"tx").hexdigest().upper()
+
+
+@pytest.mark.asyncio
+async def test_tracker_confirms_many_transactions_per_block(offline_wallet):
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, poll_interval=POLL_INTERVAL)
+    transactions = [
+        transfer(offline_wallet, index).SerializeToString() for index in range(50)
+    ]
+
+    waiters = asyncio.gather(
+        *(tracker.wait(tx_hash(transaction).lower()) for transaction in transactions)
+    )
+    await asyncio.sleep(POLL_INTERVAL * 2)
+    chain.mine(*transactions[:25])
+    chain.mine()
+    chain.mine(*transactions[25:])
+    confirmations = await waiters
+
+    assert [confirmation.height for confirmation in confirmations] == [101] * 25 + [
+        103
+    ] * 25
+    # One query per poll and per skipped block, regardless of the pending count.
+    assert chain.block_queries < 20
+    assert not tracker.is_pending(tx_hash(transactions[0]))
+
+
+@pytest.mark.asyncio
+async def test_tracker_times_out_and_stops():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, poll_interval=POLL_INTERVAL)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await tracker.wait(tx_hash(b"never"), timeout=POLL_INTERVAL * 3)
+
+    await asyncio.sleep(POLL_INTERVAL * 3)
+    assert not tracker.is_pending(tx_hash(b"never"))
+    assert tracker._task.done()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_registers_local_hash(offline_wallet):
+    chain = FakeChain()
+    node = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+    node.chain = chain
+    node.confirmation_tracker = ConfirmationTracker(chain, POLL_INTERVAL)
+    transaction = transfer(offline_wallet, 0)
+
+    await node.broadcast(transaction)
+
+    expected_hash = tx_hash(transaction.SerializeToString())
+    assert node.confirmation_tracker.is_pending(expected_hash)
+    chain.mine(transaction.SerializeToString())
+    confirmation = await node.wait_for_confirmation(expected_hash)
+    assert confirmation.height == 101
+    assert confirmation.tx == transaction
+
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_register_short_term_orders(offline_wallet):
+    node = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+    node.chain = FakeChain()
+    node.confirmation_tracker = ConfirmationTracker(node.chain, POLL_INTERVAL)
+    oid = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.SHORT_TERM)
+    transaction = node.builder.build(
+        offline_wallet, cancel_order(oid, good_til_block=10)
+    )
+
+    await node.broadcast(transaction)
+
+    assert not node.confirmation_tracker.is_pending(
+        tx_hash(transaction.SerializeToString())
+    )
+
+
+@pytest.mark.asyncio
+async def test_query_transaction_waits_for_block(offline_wallet):
+    node = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+    node.chain = FakeChain()
+    transaction = transfer(offline_wallet, 3)
+    tx_bytes = transaction.SerializeToString()
+
+    query = asyncio.ensure_future(node.query_transaction(tx_hash(tx_bytes)))
+    await asyncio.sleep(0.1)
+    node.chain.mine(tx_bytes)
+
+    assert await query == transaction
+
+
+@pytest.mark.asyncio
+async def test_connect_tracks_confirmations_on_request():
+    config = NodeConfig("dydx-testnet-4", "adv4tnt", "ibc/usdc", None)
+
+    assert (await NodeClient.connect(config)).confirmation_tracker is None
+    node = await NodeClient.connect(config, track_confirmations=True)
+    assert node.confirmation_tracker is not None
+
+
+@pytest.mark.asyncio
+async def test_untracked_broadcast_is_confirmed_when_awaited(offline_wallet):
+    node = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+    node.chain = FakeChain()
+    transaction = transfer(offline_wallet, 0)
+    tx_bytes = transaction.SerializeToString()
+
+    await node.broadcast(transaction)
+    node.chain.mine(tx_bytes)
+    await asyncio.sleep(POLL_INTERVAL * 3)
+    assert node.chain.block_queries == 0
+
+    confirmation = await node.wait_for_confirmation(tx_hash(tx_bytes))
+    assert confirmation.height == 101
+    assert confirmation.tx == transaction
+    assert not node.confirmation_tracker.is_pending(tx_hash(tx_bytes))
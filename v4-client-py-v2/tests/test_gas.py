@@ -0,0 +1,161 @@
+import asyncio
+
+import grpc
+import pytest
+from v4_proto.cosmos.auth.v1beta1.auth_pb2 import BaseAccount
+from v4_proto.cosmos.base.abci.v1beta1.abci_pb2 import GasInfo, TxResponse
+from v4_proto.cosmos.tx.v1beta1.service_pb2 import (
+    BroadcastTxResponse,
+    SimulateResponse,
+)
+
+from dydx_v4_client.node.builder import Builder
+from dydx_v4_client.node.client import NodeClient
+from dydx_v4_client.node.gas import GasEstimateCache, OfflineGasTable
+from dydx_v4_client.node.message import send_token
+from tests.conftest import RECIPIENT, TEST_ADDRESS
+
+SIMULATED_GAS = 90_000
+ACCOUNT_SEQUENCE = 41
+
+
+class FakeNodeClient(NodeClient):
+    simulations = 0
+    simulated_sequences = None
+    fees = None
+    sequences = None
+    codes = None
+    simulation_error = None
+
+    async def get_account(self, address):
+        return BaseAccount(address=address, sequence=ACCOUNT_SEQUENCE)
+
+    async def simulate(self, transaction):
+        if self.simulation_error is not None:
+            raise self.simulation_error
+        self.simulations += 1
+        self.simulated_sequences = (self.simulated_sequences or []) + [
+            transaction.auth_info.signer_infos[0].sequence
+        ]
+        return SimulateResponse(gas_info=GasInfo(gas_used=SIMULATED_GAS))
+
+    async def broadcast(self, transaction, mode=None):
+        self.fees = (self.fees or []) + [transaction.auth_info.fee.gas_limit]
+        self.sequences = (self.sequences or []) + [
+            transaction.auth_info.signer_infos[0].sequence
+        ]
+        if self.codes:
+            return BroadcastTxResponse(tx_response=self.codes.pop(0))
+        return BroadcastTxResponse(tx_response=TxResponse(code=0))
+
+
+def token_transfer():
+    return send_token(TEST_ADDRESS, RECIPIENT, 1000, "adv4tnt")
+
+
+@pytest.mark.asyncio
+async def test_send_simulates_without_cache(offline_wallet):
+    client = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+
+    await client.send_message(offline_wallet, token_transfer())
+    await client.send_message(offline_wallet, token_transfer())
+
+    assert client.simulations == 2
+
+
+@pytest.mark.asyncio
+async def test_send_uses_cached_gas_estimate(offline_wallet):
+    client = FakeNodeClient(
+        None, Builder("dydx-testnet-4", "adv4tnt"), gas_cache=GasEstimateCache()
+    )
+
+    # The first transaction of a shape is simulated, the later ones are not.
+    await client.send_message(offline_wallet, token_transfer())
+    await asyncio.sleep(0)
+    await client.send_message(offline_wallet, token_transfer())
+    await client.send_message(offline_wallet, token_transfer())
+
+    assert client.simulations == 1
+    assert client.fees[0] == client.fees[1] == client.fees[2]
+
+
+@pytest.mark.asyncio
+async def test_stale_estimate_is_refreshed_with_account_sequence(offline_wallet):
+    cache = GasEstimateCache(max_age_secs=-1)
+    client = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"), gas_cache=cache)
+    cache.update(client.builder.build(offline_wallet, token_transfer()), 1_000)
+
+    await client.send_message(offline_wallet, token_transfer())
+    await asyncio.sleep(0)
+
+    assert client.simulated_sequences == [ACCOUNT_SEQUENCE]
+    assert (
+        cache.get(client.builder.build(offline_wallet, token_transfer()))
+        == SIMULATED_GAS
+    )
+
+
+@pytest.mark.asyncio
+async def test_offline_table_is_used_when_simulation_fails(offline_wallet):
+    table = OfflineGasTable()
+    table.update_entry("/cosmos.bank.v1beta1.MsgSend", 150_000)
+    cache = GasEstimateCache(offline_table=table)
+    client = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"), gas_cache=cache)
+    client.simulation_error = grpc.RpcError()
+
+    await client.send_message(offline_wallet, token_transfer())
+
+    assert client.fees[0] == client.builder.calculate_fee(150_000).gas_limit
+
+
+@pytest.mark.asyncio
+async def test_out_of_gas_resimulates_and_resends(offline_wallet):
+    cache = GasEstimateCache()
+    client = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"), gas_cache=cache)
+    cache.update(client.builder.build(offline_wallet, token_transfer()), 1_000)
+    client.codes = [TxResponse(codespace="sdk", code=11, raw_log="out of gas")]
+
+    response = await client.send_message(offline_wallet, token_transfer())
+
+    assert response.tx_response.code == 0
+    assert client.simulations == 1
+    assert client.sequences[0] == client.sequences[1]
+    assert client.fees[0] < client.fees[1]
+    assert (
+        cache.get(client.builder.build(offline_wallet, token_transfer()))
+        == SIMULATED_GAS
+    )
+
+
+@pytest.mark.asyncio
+async def test_delivered_out_of_gas_is_not_resent(offline_wallet):
+    cache = GasEstimateCache()
+    client = FakeNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"), gas_cache=cache)
+    cache.update(client.builder.build(offline_wallet, token_transfer()), 1_000)
+    client.codes = [TxResponse(codespace="sdk", code=11, height=5)]
+
+    response = await client.send_message(offline_wallet, token_transfer())
+
+    assert response.tx_response.code == 11
+    assert len(client.sequences) == 1
+    assert cache.get(client.builder.build(offline_wallet, token_transfer())) is None
+
+
+def test_gas_cache_keys_by_shape(offline_wallet):
+    builder = Builder("dydx-testnet-4", "adv4tnt")
+    cache = GasEstimateCache(offline_table=OfflineGasTable(fallback_gas=1000))
+    single = builder.build(offline_wallet, token_transfer())
+    double = builder.build_transaction(
+        offline_wallet, list(single.body.messages) * 2, None
+    )
+
+    assert cache.estimate(single) == 1000
+    assert cache.estimate(double) == 2000
+    assert cache.needs_refresh(single)
+
+    cache.update(single, 500)
+
+    assert cache.estimate(single) == 500
+    assert cache.estimate(double) == 2000
+    assert not cache.needs_refresh(single)
+    assert cache.needs_refresh(double)
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+from dydx_v4_client.lazy import lazy_import
+
+
+def test_client_import_defers_query_modules():
+    code = (
+        "import sys\n"
+        "from dydx_v4_client.node.client import NodeClient, gov_query\n"
+        "assert 'v4_proto.cosmos.gov.v1.query_pb2' not in sys.modules\n"
+        "assert 'bip_utils' not in sys.modules\n"
+        "assert gov_query.QueryProposalsRequest().DESCRIPTOR.name == 'QueryProposalsRequest'\n"
+        "assert 'v4_proto.cosmos.gov.v1.query_pb2' in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_lazy_import_returns_loaded_module():
+    import v4_proto.cosmos.tx.v1beta1.tx_pb2 as tx_pb2
+
+    assert lazy_import("v4_proto.cosmos.tx.v1beta1.tx_pb2") is tx_pb2
+
+
+def test_lazy_import_loads_once_across_threads():
+    code = (
+        "from concurrent.futures import ThreadPoolExecutor\n"
+        "from dydx_v4_client.lazy import lazy_import\n"
+        "staking = lazy_import('v4_proto.cosmos.staking.v1beta1.query_pb2')\n"
+        "with ThreadPoolExecutor(max_workers=8) as executor:\n"
+        "    names = list(executor.map(\n"
+        "        lambda _: staking.QueryValidatorsRequest.DESCRIPTOR.name, range(64)\n"
+        "    ))\n"
+        "assert names == ['QueryValidatorsRequest'] * 64\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+import pytest
+
+from dydx_v4_client import network
+
+
+def test_import_builds_no_presets():
+    code = (
+        "import sys\n"
+        "import dydx_v4_client.network as network\n"
+        "assert 'TESTNET' not in vars(network) and 'LOCAL' not in vars(network)\n"
+        "assert 'dydx_v4_client.node.pool' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_presets_are_cached():
+    assert network.TESTNET is network.TESTNET
+    assert network.TESTNET.node.chain_id == "dydx-testnet-4"
+    assert "TESTNET" in vars(network)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        network.MAINNET
@@ -0,0 +1,237 @@
+import asyncio
+import socket
+import time
+from concurrent import futures
+
+import grpc
+import pytest
+from v4_proto.cosmos.base.abci.v1beta1.abci_pb2 import TxResponse
+from v4_proto.cosmos.base.tendermint.v1beta1 import query_pb2 as tendermint_query
+from v4_proto.cosmos.base.tendermint.v1beta1 import (
+    query_pb2_grpc as tendermint_query_grpc,
+)
+from v4_proto.cosmos.tx.v1beta1 import service_pb2_grpc as tx_service_grpc
+from v4_proto.cosmos.tx.v1beta1.service_pb2 import BroadcastTxResponse
+
+from dydx_v4_client import OrderFlags
+from dydx_v4_client.key_pair import KeyPair
+from dydx_v4_client.network import local_node, make_insecure, make_insecure_aio
+from dydx_v4_client.node.client import NodeClient
+from dydx_v4_client.node.message import cancel_order, order_id, send_token
+from dydx_v4_client.node.pool import GET_LATEST_BLOCK, NodePool
+from dydx_v4_client.wallet import Wallet
+from tests.conftest import DYDX_TEST_PRIVATE_KEY, TEST_ADDRESS, TEST_CLOB_PAIR_ID
+
+SLOW_SECS = 0.5
+
+
+class TendermintService(tendermint_query_grpc.ServiceServicer):
+    def __init__(self, height: int, delay: float = 0):
+        self.height = height
+        self.delay = delay
+        self.calls = 0
+
+    async def GetLatestBlock(self, request, context):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        response = tendermint_query.GetLatestBlockResponse()
+        response.block.header.height = self.height
+        return response
+
+
+async def start_server(service: TendermintService):
+    server = grpc.aio.server()
+    tendermint_query_grpc.add_ServiceServicer_to_server(service, server)
+    port = server.add_insecure_port("localhost:0")
+    await server.start()
+    return server, f"localhost:{port}"
+
+
+def unused_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return f"localhost:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+async def nodes():
+    services = [TendermintService(100), TendermintService(100)]
+    servers = [await start_server(service) for service in services]
+    yield services, [url for _, url in servers]
+    for server, _ in servers:
+        await server.stop(None)
+
+
+async def connect(make_network, urls, **pool_options) -> NodeClient:
+    network = make_network(
+        local_node,
+        rest_indexer="",
+        websocket_indexer="",
+        node_url=urls,
+        health_check_interval=None,
+        **pool_options,
+    )
+    return await NodeClient.connect(network.node)
+
+
+@pytest.mark.asyncio
+async def test_fails_over_unavailable_node(nodes):
+    services, urls = nodes
+    client = await connect(make_insecure_aio, [unused_url(), urls[0]])
+    pool: NodePool = client.channel
+
+    assert await client.latest_block_height() == 100
+
+    assert not pool.endpoints[0].healthy
+    assert pool.ranked()[0] is pool.endpoints[1]
+    assert services[0].calls == 1
+
+
+class BlockingTendermintService(tendermint_query_grpc.ServiceServicer):
+    def GetLatestBlock(self, request, context):
+        response = tendermint_query.GetLatestBlockResponse()
+        response.block.header.height = 100
+        return response
+
+
+@pytest.mark.asyncio
+async def test_blocking_channels_fail_over():
+    # Blocking calls hold the event loop, so the server runs on its own threads.
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    tendermint_query_grpc.add_ServiceServicer_to_server(
+        BlockingTendermintService(), server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    client = await connect(make_insecure, [unused_url(), f"localhost:{port}"])
+
+    assert await client.latest_block_height() == 100
+    assert not client.channel.endpoints[0].healthy
+    server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_health_checks_rank_lagging_node_last(nodes):
+    services, urls = nodes
+    services[0].height = 90
+    client = await connect(make_insecure_aio, urls)
+    pool: NodePool = client.channel
+
+    await pool.check_health()
+
+    assert [endpoint.height for endpoint in pool.endpoints] == [90, 100]
+    assert pool.ranked()[0].url == urls[1]
+    await client.latest_block_height()
+    assert services[1].calls == 2
+
+
+@pytest.mark.asyncio
+async def test_hedged_read_returns_fastest_response(nodes):
+    services, urls = nodes
+    services[0].delay = SLOW_SECS
+    client = await connect(
+        make_insecure_aio, urls, hedged_methods={GET_LATEST_BLOCK}, hedge_delay=0.02
+    )
+
+    start = time.perf_counter()
+    assert await client.latest_block_height() == 100
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < SLOW_SECS / 2
+    assert services[0].calls == 1 and services[1].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_application_errors_are_not_failed_over(nodes):
+    services, urls = nodes
+    client = await connect(make_insecure_aio, urls)
+
+    with pytest.raises(grpc.RpcError) as error:
+        await client.get_node_info()
+
+    assert error.value.code() == grpc.StatusCode.UNIMPLEMENTED
+    assert all(endpoint.healthy for endpoint in client.channel.endpoints)
+
+
+class TxService(tx_service_grpc.ServiceServicer):
+    def __init__(self, delay: float, code: int = 0):
+        self.delay = delay
+        self.code = code
+        self.received = []
+
+    async def BroadcastTx(self, request, context):
+        self.received.append(request.tx_bytes)
+        await asyncio.sleep(self.delay)
+        return BroadcastTxResponse(tx_response=TxResponse(code=self.code))
+
+
+@pytest.fixture
+async def validators():
+    services = [TxService(SLOW_SECS), TxService(0.01, code=19), TxService(0.05)]
+    servers = []
+    for service in services:
+        server = grpc.aio.server()
+        tx_service_grpc.add_ServiceServicer_to_server(service, server)
+        port = server.add_insecure_port("localhost:0")
+        await server.start()
+        servers.append((server, f"localhost:{port}"))
+    yield services, [url for _, url in servers]
+    for server, _ in servers:
+        await server.stop(None)
+
+
+def short_term_cancel(client: NodeClient):
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 0, 0)
+    oid = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.SHORT_TERM)
+    return client.builder.build(wallet, cancel_order(oid, good_til_block=10))
+
+
+@pytest.mark.asyncio
+async def test_short_term_broadcast_returns_first_accepted(validators):
+    services, urls = validators
+    client = await connect(make_insecure_aio, urls)
+    client.short_term_fanout = 3
+    transaction = short_term_cancel(client)
+
+    start = time.perf_counter()
+    response = await client.broadcast(transaction)
+    elapsed = time.perf_counter() - start
+
+    assert response.tx_response.code == 0
+    assert elapsed < SLOW_SECS / 2
+    assert all(
+        service.received == [transaction.SerializeToString()] for service in services
+    )
+    # The slow send is still in flight, referenced by the pool until it is done.
+    assert len(client.channel._tasks) == 1
+    await asyncio.sleep(SLOW_SECS)
+    assert not client.channel._tasks
+    slow, rejecting, fast = client.channel.endpoints
+    assert (rejecting.accepted, rejecting.rejected) == (0, 1)
+    assert fast.accepted == 1 and slow.accepted == 1
+    assert fast.accept_latency < slow.accept_latency
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fanout_returns_rejection_if_none_accepts(validators):
+    services, urls = validators
+    client = await connect(make_insecure_aio, urls[1:2])
+
+    response = await client.broadcast(short_term_cancel(client), fanout=3)
+
+    assert response.tx_response.code == 19
+
+
+@pytest.mark.asyncio
+async def test_long_term_broadcast_is_not_fanned_out(validators):
+    services, urls = validators
+    client = await connect(make_insecure_aio, urls[1:])
+    client.short_term_fanout = 3
+    wallet = Wallet(KeyPair.from_hex(DYDX_TEST_PRIVATE_KEY), 0, 0)
+    transaction = client.builder.build(
+        wallet, send_token(TEST_ADDRESS, TEST_ADDRESS, 1, "adv4tnt")
+    )
+
+    await client.broadcast(transaction)
+
+    assert sum(len(service.received) for service in services) == 1
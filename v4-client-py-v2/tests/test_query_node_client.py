@@ -2,6 +2,7 @@ import asyncio
 import random
 import time
 
+import grpc
 import pytest
 
 from dydx_v4_client.node_helper_type import ExtendedSubaccount
@@ -42,9 +43,27 @@ from v4_proto.cosmos.gov.v1 import query_pb2 as gov_query
 from v4_proto.dydxprotocol.subaccounts import query_pb2 as subaccount_query
 from v4_proto.dydxprotocol.ratelimit import query_pb2 as rate_query
 from v4_proto.dydxprotocol.affiliates import query_pb2 as affiliate_query
+from v4_proto.cosmos.bank.v1beta1 import query_pb2_grpc as bank_query_grpc
+from v4_proto.dydxprotocol.clob import query_pb2_grpc as clob_query_grpc
+from dydx_v4_client.node.client import QueryNodeClient
 from tests.conftest import TEST_ADDRESS_3
 
 
+def test_stubs_are_cached_per_channel():
+    channel = grpc.insecure_channel("localhost:9090")
+    client = QueryNodeClient(channel)
+
+    bank_stub = client.stub(bank_query_grpc.QueryStub)
+    assert client.stub(bank_query_grpc.QueryStub) is bank_stub
+    assert client.stub(clob_query_grpc.QueryStub) is not bank_stub
+
+    client.channel = grpc.insecure_channel("localhost:9091")
+    assert client.stub(bank_query_grpc.QueryStub) is not bank_stub
+
+    channel.close()
+    client.channel.close()
+
+
 @pytest.mark.asyncio
 async def test_get_account_balances(node_client, test_address):
     result = await node_client.get_account_balances(test_address)
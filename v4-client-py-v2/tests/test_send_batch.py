@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+from v4_proto.cosmos.base.abci.v1beta1.abci_pb2 import TxResponse
+from v4_proto.cosmos.tx.v1beta1.service_pb2 import BroadcastTxResponse
+from v4_proto.dydxprotocol.clob.order_pb2 import Order
+
+from dydx_v4_client import OrderFlags
+from dydx_v4_client.node.builder import Builder, TxOptions
+from dydx_v4_client.node.client import NodeClient, SequenceManager
+from dydx_v4_client.node.market import Market
+from dydx_v4_client.node.message import cancel_order, order_id, place_order
+from tests.conftest import TEST_ADDRESS, TEST_CLOB_PAIR_ID
+
+
+class RecordingNodeClient(NodeClient):
+    transactions = None
+    codes = None
+    in_flight = 0
+    max_in_flight = 0
+
+    async def broadcast(self, transaction, mode=None):
+        self.transactions = (self.transactions or []) + [transaction]
+        code = self.codes.pop(0) if self.codes else 0
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return BroadcastTxResponse(
+            tx_response=TxResponse(txhash=str(len(self.transactions)), code=code)
+        )
+
+
+def sequences(client: RecordingNodeClient):
+    return [tx.auth_info.signer_infos[0].sequence for tx in client.transactions]
+
+
+def long_term_order(client_id: int) -> Order:
+    return Order(
+        order_id=order_id(
+            TEST_ADDRESS, 0, client_id, TEST_CLOB_PAIR_ID, OrderFlags.LONG_TERM
+        ),
+        good_til_block_time=10,
+    )
+
+
+@pytest.fixture
+def client() -> RecordingNodeClient:
+    return RecordingNodeClient(None, Builder("dydx-testnet-4", "adv4tnt"))
+
+
+@pytest.mark.asyncio
+async def test_place_orders_one_transaction_each(client, offline_wallet):
+    orders = [long_term_order(client_id) for client_id in range(3)]
+
+    results = await client.place_orders(offline_wallet, orders)
+
+    assert [len(tx.body.messages) for tx in client.transactions] == [1, 1, 1]
+    assert sequences(client) == [0, 1, 2]
+    assert client.max_in_flight == 3
+    assert [oid for oid, _ in results] == [order.order_id for order in orders]
+    assert offline_wallet.sequence == 3
+
+
+@pytest.mark.asyncio
+async def test_rejected_transaction_leaves_its_sequence_unused(client, offline_wallet):
+    orders = [long_term_order(client_id) for client_id in range(3)]
+    messages = [place_order(order) for order in orders[:2]] + [
+        cancel_order(orders[0].order_id, good_til_block_time=10)
+    ]
+    # The transaction after the rejected one is ahead of the account sequence.
+    client.codes = [0, 11, 32]
+
+    results = await client.send_batch(offline_wallet, messages)
+
+    assert sequences(client) == [0, 1, 2]
+    assert [response.tx_response.code for _, response in results] == [0, 11, 32]
+    assert offline_wallet.sequence == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_transaction_resyncs_sequence_manager(client, offline_wallet):
+    client.sequence_manager = SequenceManager(None)
+    orders = [long_term_order(client_id) for client_id in range(3)]
+    client.codes = [0, 11, 32]
+
+    await client.place_orders(offline_wallet, orders)
+    offline_wallet.sequence = 1  # As queried from the node again.
+    await client.place_orders(offline_wallet, orders[:1])
+
+    assert sequences(client) == [0, 1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_tx_options_sequences_are_consecutive(client, offline_wallet):
+    orders = [long_term_order(client_id) for client_id in range(3)]
+    tx_options = TxOptions(authenticators=[1], sequence=20, account_number=3)
+
+    await client.place_orders(offline_wallet, orders, tx_options=tx_options)
+
+    assert sequences(client) == [20, 21, 22]
+    assert all(tx.body.non_critical_extension_options for tx in client.transactions)
+    assert tx_options.sequence == 20
+    assert offline_wallet.sequence == 0
+
+
+@pytest.mark.asyncio
+async def test_scale_order_with_tx_options(client, offline_wallet):
+    market = Market(
+        {
+            "clobPairId": str(TEST_CLOB_PAIR_ID),
+            "atomicResolution": -9,
+            "quantumConversionExponent": -9,
+            "stepBaseQuantums": 1000000,
+            "subticksPerTick": 1000000,
+        }
+    )
+    tx_options = TxOptions(authenticators=[1], sequence=20, account_number=3)
+
+    results = await client.place_scale_order(
+        offline_wallet,
+        market,
+        TEST_ADDRESS,
+        0,
+        Order.Side.SIDE_BUY,
+        total_size=3,
+        start_price=1.0,
+        end_price=2.0,
+        num_orders=3,
+        good_til_block_time=10,
+        tx_options=tx_options,
+    )
+
+    assert len(results) == 3
+    assert sequences(client) == [20, 21, 22]
+
+
+@pytest.mark.asyncio
+async def test_short_term_orders_cannot_be_batched(client, offline_wallet):
+    short_term = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.SHORT_TERM)
+
+    with pytest.raises(ValueError):
+        await client.send_batch(
+            offline_wallet, [cancel_order(short_term, good_til_block=10)]
+        )
+    assert client.transactions is None
@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+from v4_proto.cosmos.auth.v1beta1.auth_pb2 import BaseAccount
+from v4_proto.cosmos.base.abci.v1beta1.abci_pb2 import TxResponse
+from v4_proto.cosmos.tx.v1beta1.service_pb2 import BroadcastTxResponse
+from v4_proto.dydxprotocol.clob.order_pb2 import Order
+
+from dydx_v4_client import OrderFlags
+from dydx_v4_client.node.builder import Builder
+from dydx_v4_client.node.client import (
+    MutatingNodeClient,
+    SequenceManager,
+    consumes_sequence,
+    expected_sequence,
+)
+from dydx_v4_client.node.message import cancel_order, order_id, place_order
+from tests.conftest import TEST_ADDRESS, TEST_CLOB_PAIR_ID
+
+ACCOUNT_SEQUENCE = 10
+
+
+class FakeQueryNodeClient:
+    def __init__(self, sequence: int):
+        self.sequence = sequence
+        self.queries = 0
+
+    async def get_account(self, address: str) -> BaseAccount:
+        self.queries += 1
+        await asyncio.sleep(0)
+        return BaseAccount(address=address, sequence=self.sequence)
+
+
+def sequence_mismatch(expected: int, got: int) -> BroadcastTxResponse:
+    return BroadcastTxResponse(
+        tx_response=TxResponse(
+            codespace="sdk",
+            code=32,
+            raw_log=f"account sequence mismatch, expected {expected}, got {got}: incorrect account sequence",
+        )
+    )
+
+
+class FakeChainNodeClient(MutatingNodeClient):
+    chain_sequence = ACCOUNT_SEQUENCE
+    sent = None
+
+    async def broadcast(self, transaction, mode=None):
+        sequence = transaction.auth_info.signer_infos[0].sequence
+        self.sent = (self.sent or []) + [sequence]
+        if sequence != self.chain_sequence:
+            return sequence_mismatch(self.chain_sequence, sequence)
+        self.chain_sequence += 1
+        return BroadcastTxResponse(tx_response=TxResponse(code=0))
+
+
+def long_term_cancel():
+    oid = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.LONG_TERM)
+    return cancel_order(oid, good_til_block_time=10)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_get_distinct_sequences(offline_wallet):
+    query_node_client = FakeQueryNodeClient(ACCOUNT_SEQUENCE)
+    manager = SequenceManager(query_node_client)
+
+    sequences = await asyncio.gather(
+        *(manager.before_send(offline_wallet) for _ in range(20))
+    )
+
+    assert sorted(sequences) == list(range(ACCOUNT_SEQUENCE, ACCOUNT_SEQUENCE + 20))
+    assert query_node_client.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_short_term_sends_do_not_consume_sequence(offline_wallet):
+    manager = SequenceManager(FakeQueryNodeClient(ACCOUNT_SEQUENCE))
+
+    assert await manager.before_send(offline_wallet, consume=False) == ACCOUNT_SEQUENCE
+    assert await manager.before_send(offline_wallet) == ACCOUNT_SEQUENCE
+    assert await manager.before_send(offline_wallet) == ACCOUNT_SEQUENCE + 1
+
+
+@pytest.mark.asyncio
+async def test_resync_on_sequence_mismatch(offline_wallet):
+    query_node_client = FakeQueryNodeClient(ACCOUNT_SEQUENCE)
+    manager = SequenceManager(query_node_client)
+
+    sequence = await manager.before_send(offline_wallet)
+    await manager.before_send(offline_wallet)
+    await manager.after_send(offline_wallet, sequence_mismatch(sequence - 3, sequence))
+
+    assert await manager.before_send(offline_wallet) == sequence - 3
+    assert query_node_client.queries == 1
+
+    await manager.after_send(
+        offline_wallet, BroadcastTxResponse(tx_response=TxResponse())
+    )
+    assert await manager.before_send(offline_wallet) == sequence - 2
+
+    manager.reset(offline_wallet)
+    assert await manager.before_send(offline_wallet) == ACCOUNT_SEQUENCE
+    assert query_node_client.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_without_query_client_uses_wallet_sequence(offline_wallet):
+    manager = SequenceManager(None)
+    offline_wallet.sequence = 5
+
+    assert await manager.before_send(offline_wallet) == 5
+    assert await manager.before_send(offline_wallet) == 6
+    assert offline_wallet.sequence == 6
+
+
+def test_expected_sequence():
+    assert expected_sequence(sequence_mismatch(1460, 1459)) == 1460
+    assert expected_sequence(BroadcastTxResponse(tx_response=TxResponse())) is None
+
+
+def test_consumes_sequence():
+    short_term = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.SHORT_TERM)
+    long_term = order_id(TEST_ADDRESS, 0, 1, TEST_CLOB_PAIR_ID, OrderFlags.LONG_TERM)
+
+    assert not consumes_sequence(cancel_order(short_term, good_til_block=10))
+    assert consumes_sequence(cancel_order(long_term, good_til_block_time=10))
+    assert not consumes_sequence(place_order(Order(order_id=short_term)))
+    assert consumes_sequence(place_order(Order(order_id=long_term)))
+
+
+@pytest.mark.asyncio
+async def test_sequence_mismatch_is_not_retried_by_default(offline_wallet):
+    client = FakeChainNodeClient(
+        None,
+        Builder("dydx-testnet-4", "adv4tnt"),
+        SequenceManager(FakeQueryNodeClient(ACCOUNT_SEQUENCE - 2)),
+    )
+
+    response = await client.broadcast_message(offline_wallet, long_term_cancel())
+
+    assert response.tx_response.code == 32
+    assert client.sent == [ACCOUNT_SEQUENCE - 2]
+
+
+@pytest.mark.asyncio
+async def test_sequence_mismatch_is_re_signed(offline_wallet):
+    client = FakeChainNodeClient(
+        None,
+        Builder("dydx-testnet-4", "adv4tnt"),
+        SequenceManager(FakeQueryNodeClient(ACCOUNT_SEQUENCE - 2)),
+        sequence_mismatch_retries=2,
+    )
+
+    responses = await asyncio.gather(
+        *(
+            client.broadcast_message(offline_wallet, long_term_cancel())
+            for _ in range(3)
+        )
+    )
+
+    assert all(response.tx_response.code == 0 for response in responses)
+    assert client.chain_sequence == ACCOUNT_SEQUENCE + 3
+
+
+@pytest.mark.asyncio
+async def test_sequence_mismatch_is_re_signed_without_manager(offline_wallet):
+    client = FakeChainNodeClient(
+        None, Builder("dydx-testnet-4", "adv4tnt"), sequence_mismatch_retries=1
+    )
+
+    response = await client.broadcast_message(offline_wallet, long_term_cancel())
+
+    assert response.tx_response.code == 0
+    assert client.sent == [0, ACCOUNT_SEQUENCE]
+    assert offline_wallet.sequence == ACCOUNT_SEQUENCE
@@ -0,0 +1,171 @@
+import importlib
+import struct
+
+import pytest
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.json_format import MessageToDict
+from v4_proto.cosmos.auth.v1beta1.auth_pb2 import BaseAccount
+from v4_proto.cosmos.auth.v1beta1.query_pb2 import QueryAccountResponse
+from v4_proto.cosmos.gov.v1.gov_pb2 import Proposal, ProposalStatus
+from v4_proto.dydxprotocol.clob.order_pb2 import Order
+from v4_proto.dydxprotocol.subaccounts.asset_position_pb2 import AssetPosition
+from v4_proto.dydxprotocol.subaccounts.perpetual_position_pb2 import (
+    PerpetualPosition,
+)
+from v4_proto.dydxprotocol.subaccounts.subaccount_pb2 import Subaccount, SubaccountId
+
+from dydx_v4_client.node.builder import as_any
+from dydx_v4_client.node.client import QueryNodeClient
+from dydx_v4_client.node.transcode import (
+    is_repeated,
+    message_to_dict,
+    shortest_float,
+)
+from tests.conftest import TEST_ADDRESS
+
+
+def test_only_bytes_fields_are_decoded():
+    subaccount = Subaccount(
+        id=SubaccountId(owner="abcd", number=1),
+        asset_positions=[AssetPosition(asset_id=0, quantums=b"\x02\x0f", index=1000)],
+        perpetual_positions=[
+            PerpetualPosition(perpetual_id=1, quantums=b"\x03", funding_index=b"\x02")
+        ],
+        margin_enabled=True,
+    )
+
+    assert QueryNodeClient.transcode_response(subaccount) == {
+        "id": {"owner": "abcd", "number": 1},
+        "assetPositions": [{"quantums": [2, 15], "index": "1000"}],
+        "perpetualPositions": [
+            {"perpetualId": 1, "quantums": [3], "fundingIndex": [2]}
+        ],
+        "marginEnabled": True,
+    }
+
+
+def test_enums_any_and_timestamps():
+    proposal = Proposal(id=3, status=ProposalStatus.PROPOSAL_STATUS_PASSED)
+    proposal.submit_time.FromSeconds(1700000000)
+    proposal.messages.append(as_any(BaseAccount(address=TEST_ADDRESS, sequence=5)))
+
+    assert message_to_dict(proposal) == {
+        "id": "3",
+        "messages": [
+            {
+                "@type": "/cosmos.auth.v1beta1.BaseAccount",
+                "address": TEST_ADDRESS,
+                "sequence": "5",
+            }
+        ],
+        "status": "PROPOSAL_STATUS_PASSED",
+        "submitTime": "2023-11-14T22:13:20Z",
+    }
+
+
+def test_matches_message_to_dict_for_scalar_fields():
+    order = Order(side=Order.SIDE_SELL, good_til_block=5, client_metadata=7)
+    response = QueryAccountResponse(account=as_any(BaseAccount(address="a")))
+
+    assert message_to_dict(order) == MessageToDict(order)
+    assert message_to_dict(response) == MessageToDict(response)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(0.1, 0.1), (1 / 3, 0.33333334), (3.4028234663852886e38, 3.4028235e38)],
+)
+def test_float_fields_are_shortest_round_trips(value, expected):
+    single = struct.unpack("<f", struct.pack("<f", value))[0]
+
+    assert shortest_float(single) == expected
+
+
+QUERY_MODULES = [
+    "v4_proto.cosmos.auth.v1beta1.query_pb2",
+    "v4_proto.cosmos.bank.v1beta1.query_pb2",
+    "v4_proto.cosmos.base.tendermint.v1beta1.query_pb2",
+    "v4_proto.cosmos.distribution.v1beta1.query_pb2",
+    "v4_proto.cosmos.gov.v1.query_pb2",
+    "v4_proto.cosmos.staking.v1beta1.query_pb2",
+    "v4_proto.cosmos.tx.v1beta1.service_pb2",
+    "v4_proto.dydxprotocol.accountplus.query_pb2",
+    "v4_proto.dydxprotocol.affiliates.query_pb2",
+    "v4_proto.dydxprotocol.bridge.query_pb2",
+    "v4_proto.dydxprotocol.clob.query_pb2",
+    "v4_proto.dydxprotocol.feetiers.query_pb2",
+    "v4_proto.dydxprotocol.perpetuals.query_pb2",
+    "v4_proto.dydxprotocol.prices.query_pb2",
+    "v4_proto.dydxprotocol.ratelimit.query_pb2",
+    "v4_proto.dydxprotocol.revshare.query_pb2",
+    "v4_proto.dydxprotocol.rewards.query_pb2",
+    "v4_proto.dydxprotocol.stats.query_pb2",
+    "v4_proto.dydxprotocol.subaccounts.query_pb2",
+]
+
+SCALARS = {
+    FieldDescriptor.CPPTYPE_INT32: -7,
+    FieldDescriptor.CPPTYPE_UINT32: 7,
+    FieldDescriptor.CPPTYPE_INT64: -(2**40),
+    FieldDescriptor.CPPTYPE_UINT64: 2**40 + 1,
+    FieldDescriptor.CPPTYPE_DOUBLE: 1.5,
+    FieldDescriptor.CPPTYPE_FLOAT: 0.1,
+    FieldDescriptor.CPPTYPE_BOOL: True,
+    FieldDescriptor.CPPTYPE_STRING: "s",
+}
+
+
+def response_types():
+    for name in QUERY_MODULES:
+        module = importlib.import_module(name)
+        for message_name in module.DESCRIPTOR.message_types_by_name:
+            if message_name.endswith("Response"):
+                yield getattr(module, message_name)
+
+
+def scalar(field: FieldDescriptor):
+    if field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        return field.enum_type.values[-1].number
+    return SCALARS[field.cpp_type]
+
+
+def fill(message, depth: int = 0):
+    """
+    Sets every field but the bytes ones, which `message_to_dict` keeps as lists.
+    """
+    full_name = message.DESCRIPTOR.full_name
+    if full_name in ("google.protobuf.Timestamp", "google.protobuf.Duration"):
+        message.FromSeconds(1700000000)
+        return
+    if full_name == "google.protobuf.Any":
+        message.Pack(BaseAccount(address=TEST_ADDRESS, sequence=5))
+        return
+    if depth > 3:
+        return
+    for field in message.DESCRIPTOR.fields:
+        if field.type == FieldDescriptor.TYPE_BYTES:
+            continue
+        value = getattr(message, field.name)
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            key_field = field.message_type.fields_by_name["key"]
+            value_field = field.message_type.fields_by_name["value"]
+            if value_field.type == FieldDescriptor.TYPE_BYTES:
+                continue
+            if value_field.message_type is None:
+                value[scalar(key_field)] = scalar(value_field)
+            else:
+                fill(value[scalar(key_field)], depth + 1)
+        elif field.message_type is not None:
+            fill(value.add() if is_repeated(field) else value, depth + 1)
+        elif is_repeated(field):
+            value.extend([scalar(field)] * 2)
+        else:
+            setattr(message, field.name, scalar(field))
+
+
+@pytest.mark.parametrize("response_type", list(response_types()))
+def test_matches_message_to_dict_for_query_responses(response_type):
+    response = response_type()
+    fill(response)
+
+    assert message_to_dict(response) == MessageToDict(response)